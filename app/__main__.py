@@ -0,0 +1,6 @@
+"""Run the production server with ``python -m app``."""
+
+from app.server import main
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,20 @@
 
 from fastapi import APIRouter
 
+from app.api.v1.edi.cargo_item_controller import router as cargo_item_router
 from app.api.v1.edi.edi_decode_controller import router as decode_router
+from app.api.v1.edi.edi_decode_job_controller import router as decode_job_router
 from app.api.v1.edi.edi_generate_controller import router as generate_router
+from app.api.v1.edi.edi_message_controller import router as message_router
+from app.api.v1.edi.edi_stats_controller import router as stats_router
 
 # Create a router for all EDI operations
 router = APIRouter(prefix="/edi")
 
-# Include the generate and decode routers
+# Include the generate, decode, decode job, cargo item, message and statistics routers
 router.include_router(generate_router)
 router.include_router(decode_router)
+router.include_router(decode_job_router)
+router.include_router(cargo_item_router)
+router.include_router(message_router)
+router.include_router(stats_router)
@@ -0,0 +1,129 @@
+"""Cargo item query controller."""
+
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+
+from app.config import get_settings
+from app.constants import EOutputFormat
+from app.constants.error_messages import EErrorMessage
+from app.db.cargo_repository import LOOKUP_FIELDS, CargoRepository
+from app.models.cargo_item import CargoItem
+from app.models.responses import CargoItemPageResponse
+from app.services.cargo_export import EXPORT_MEDIA_TYPES, export_cargo_items
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.projection import parse_fields, project_document
+from app.utils.serialization import model_response
+
+router = APIRouter(tags=["EDI"])
+
+
+def _lookup_filters(
+    container_number: Optional[str],
+    master_bill_of_lading_number: Optional[str],
+    house_bill_of_lading_number: Optional[str],
+) -> dict[str, str]:
+    """Collect the lookup field values given in the query string."""
+    values = {
+        "container_number": container_number,
+        "master_bill_of_lading_number": master_bill_of_lading_number,
+        "house_bill_of_lading_number": house_bill_of_lading_number,
+    }
+    return {field: values[field] for field in LOOKUP_FIELDS if values[field] is not None}
+
+
+@router.get("/cargo-items", response_model=CargoItemPageResponse)
+async def search_cargo_items_handler(
+    http_request: Request,
+    container_number: Optional[str] = None,
+    master_bill_of_lading_number: Optional[str] = None,
+    house_bill_of_lading_number: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; id is always included"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: Optional[int] = Query(None, gt=0),
+) -> Response:
+    """
+    Search stored cargo items by identifier and creation time, newest first.
+
+    ``created_from`` is inclusive and ``created_to`` exclusive. Pages are keyed on (created_at, _id),
+    so following ``next_cursor`` stays fast however deep the results go.
+    """
+    settings = get_settings()
+    try:
+        selected = parse_fields(fields)
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+
+    filters = _lookup_filters(container_number, master_bill_of_lading_number, house_bill_of_lading_number)
+
+    page_size = min(limit or settings.CARGO_QUERY_PAGE_SIZE, settings.CARGO_QUERY_MAX_PAGE_SIZE)
+    # Fetch one extra document to know whether there is a next page
+    docs = await CargoRepository.search_cargo_items(
+        filters, page_size + 1, after=after, created_from=created_from, created_to=created_to, fields=selected
+    )
+    next_cursor = (
+        encode_cursor(docs[page_size - 1]["created_at"], docs[page_size - 1]["_id"]) if len(docs) > page_size else None
+    )
+
+    return model_response(
+        http_request,
+        CargoItemPageResponse.model_construct(
+            cargo_items=[project_document(doc, selected) for doc in docs[:page_size]], next_cursor=next_cursor
+        ),
+    )
+
+
+@router.get("/cargo-items/export", response_class=StreamingResponse)
+async def export_cargo_items_handler(
+    container_number: Optional[str] = None,
+    master_bill_of_lading_number: Optional[str] = None,
+    house_bill_of_lading_number: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to export; id is always included"),
+    format: EOutputFormat = EOutputFormat.NDJSON,
+    gzip: bool = Query(False, description="Download a gzip-compressed file"),
+) -> StreamingResponse:
+    """
+    Export stored cargo items as an NDJSON or CSV download, oldest first.
+
+    Items are read through a cursor in batches of ``EXPORT_BATCH_SIZE`` and encoded as they arrive, so the
+    export can cover millions of items without holding them in memory. ``created_from`` is inclusive and
+    ``created_to`` exclusive, e.g. ``created_from=2026-09-01&created_to=2026-10-01`` for September.
+    """
+    try:
+        selected = parse_fields(fields)
+        chunks = export_cargo_items(
+            format,
+            _lookup_filters(container_number, master_bill_of_lading_number, house_bill_of_lading_number),
+            get_settings().EXPORT_BATCH_SIZE,
+            created_from=created_from,
+            created_to=created_to,
+            fields=selected,
+            compress=gzip,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+
+    filename = f"cargo-items.{format.value}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        chunks,
+        media_type="application/gzip" if gzip else EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/cargo-items/{cargo_item_id}", response_model=CargoItem)
+async def get_cargo_item_handler(cargo_item_id: str, http_request: Request) -> Response:
+    """Get a stored cargo item by ID."""
+    cargo_item = await CargoRepository.get_cargo_item(cargo_item_id)
+    if cargo_item is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=EErrorMessage.CARGO_ITEM_NOT_FOUND.value.format(cargo_item_id)
+        )
+    return model_response(http_request, cargo_item)
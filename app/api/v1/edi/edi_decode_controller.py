@@ -1,15 +1,33 @@
 """EDI decoding controller."""
 
-from typing import Any
+import asyncio
+from typing import Any, Optional, Union
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 from pydantic import BaseModel
 
+from app.config import get_settings
+from app.constants import EResponseView
 from app.constants.error_messages import EErrorMessage
-from app.db.cargo_repository import CargoRepository
 from app.db.edi_repository import EDIRepository
-from app.models.responses import EDIDecodeResponse, ProcessingError
+from app.db.outbox import repositories
+from app.db.resilience import request_deadline
+from app.models.cargo_item import CargoItem
+from app.models.responses import (
+    CargoItemChange,
+    EDIBatchDecodeResponse,
+    EDIBatchDecodeResult,
+    EDIDecodeDiffResponse,
+    EDIDecodeFieldsResponse,
+    EDIDecodeResponse,
+    EDIIdsResponse,
+    EDISummaryResponse,
+    ProcessingError,
+)
 from app.services.edi_decode import EDIDecodingService
+from app.services.manifest_summary import summarize_cargo_items
+from app.utils.projection import parse_fields, project_item
+from app.utils.serialization import model_response
 
 router = APIRouter(tags=["EDI"])
 
@@ -18,6 +36,13 @@ class DecodeEDIRequest(BaseModel):
     """Request model for EDI decoding."""
 
     edi_content: str
+    previous_message_id: Optional[str] = None  # Decode as an amendment of this stored message
+
+
+class DecodeEDIBatchRequest(BaseModel):
+    """Request model for EDI batch decoding."""
+
+    documents: list[str]
 
 
 def _convert_errors_to_dict(errors: list[ProcessingError]) -> list[dict[str, Any]]:
@@ -25,27 +50,113 @@ def _convert_errors_to_dict(errors: list[ProcessingError]) -> list[dict[str, Any
     return [{"message": error.message, "index": error.index} for error in errors]
 
 
-@router.post("/decode")
-async def decode_edi_handler(request: DecodeEDIRequest) -> EDIDecodeResponse:
-    """Decode EDI message into cargo items and store in database."""
+async def _items_response(
+    http_request: Request,
+    cargo_items: list[CargoItem],
+    errors: Optional[list[dict[str, Any]]],
+    message_id: Optional[str],
+    view: EResponseView,
+    fields: Optional[list[str]],
+    summary: bool,
+) -> Response:
+    """Respond with as much of the decoded items as the view asks for, serialising nothing else."""
+    if view == EResponseView.IDS:
+        return model_response(
+            http_request,
+            EDIIdsResponse.model_construct(
+                cargo_item_ids=[item.id for item in cargo_items if item.id], errors=errors, message_id=message_id
+            ),
+        )
+
+    # Large manifests take a while to summarise, so keep it off the event loop
+    manifest_summary = None
+    if summary or view == EResponseView.SUMMARY:
+        manifest_summary = await asyncio.to_thread(summarize_cargo_items, cargo_items)
+    if view == EResponseView.SUMMARY:
+        return model_response(
+            http_request,
+            EDISummaryResponse.model_construct(summary=manifest_summary, errors=errors, message_id=message_id),
+        )
+
+    if fields is not None:
+        return model_response(
+            http_request,
+            EDIDecodeFieldsResponse.model_construct(
+                cargo_items=[project_item(item, fields) for item in cargo_items],
+                errors=errors,
+                message_id=message_id,
+                summary=manifest_summary,
+            ),
+        )
+
+    # The items were built by the service, so skip re-validating them
+    return model_response(
+        http_request,
+        EDIDecodeResponse.model_construct(
+            cargo_items=cargo_items, errors=errors, message_id=message_id, summary=manifest_summary
+        ),
+    )
+
+
+@router.post(
+    "/decode",
+    response_model=Union[
+        EDIDecodeResponse, EDIDecodeFieldsResponse, EDIIdsResponse, EDISummaryResponse, EDIDecodeDiffResponse
+    ],
+)
+async def decode_edi_handler(
+    request: DecodeEDIRequest,
+    http_request: Request,
+    summary: bool = Query(False, description="Include per-manifest totals computed from the decoded items"),
+    view: EResponseView = EResponseView.FULL,
+    fields: Optional[str] = Query(None, description="Comma-separated item fields to return; id is always included"),
+) -> Response:
+    """
+    Decode EDI message into cargo items and store in database.
+
+    With ``previous_message_id``, the message is decoded as an amendment: only LIN groups that differ from the
+    previous version are parsed and stored, and the response lists the added, changed and removed items.
+
+    With ``summary``, a full decode also returns the manifest's totals: packages per cargo type and per container,
+    and house bills per master bill. ``view=ids`` returns only the stored item IDs and ``view=summary`` only the
+    totals; in the full view, ``fields`` limits the items to the given fields. None of these apply to amendments.
+    """
     # Check for empty content
     if not request.edi_content:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=EErrorMessage.NO_ITEMS)
-
-    # Initialize services
-    cargo_repository = CargoRepository()
-    edi_repository = EDIRepository()
-    edi_service = EDIDecodingService(cargo_repository, edi_repository)
-
-    # Process the EDI message
-    cargo_items, errors = await edi_service.decode_edi_message(request.edi_content)
+    try:
+        selected = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    if request.previous_message_id is not None and (summary or view != EResponseView.FULL or selected is not None):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=EErrorMessage.AMENDMENT_VIEW_UNSUPPORTED)
+
+    # Initialize services; with the outbox enabled, writes are appended locally and replayed in the background
+    settings = get_settings()
+    cargo_repository, edi_repository = repositories()
+    edi_service = EDIDecodingService(
+        cargo_repository,
+        edi_repository,
+        pipeline_batch_groups=settings.DECODE_PIPELINE_BATCH_GROUPS,
+        pipeline_queue_size=settings.DECODE_PIPELINE_QUEUE_SIZE,
+    )
+
+    # Database calls share one deadline, so a failing-over database cannot hold the request indefinitely
+    with request_deadline(settings.REQUEST_DEADLINE_SECONDS):
+        if request.previous_message_id is not None:
+            return await _decode_amendment(edi_service, request, http_request)
+
+        # Process the EDI message; items that could not be stored are still returned, with the storage error
+        cargo_items, errors = await edi_service.decode_edi_message(request.edi_content)
 
     # Convert errors to dictionary format if they exist
     error_dicts = _convert_errors_to_dict(errors) if errors else None
 
     # If we have cargo items, return them with any errors (partial success)
     if cargo_items:
-        return EDIDecodeResponse(cargo_items=cargo_items, errors=error_dicts)
+        return await _items_response(
+            http_request, cargo_items, error_dicts, edi_service.message_id, view, selected, summary
+        )
 
     # If we have no items but have errors, all segments were invalid
     if errors:
@@ -53,3 +164,69 @@ async def decode_edi_handler(request: DecodeEDIRequest) -> EDIDecodeResponse:
 
     # Should never reach here, but just in case
     raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to decode EDI message")
+
+
+async def _decode_amendment(
+    edi_service: EDIDecodingService, request: DecodeEDIRequest, http_request: Request
+) -> Response:
+    """Decode an amended message and respond with its differences to the previous version."""
+    if not await EDIRepository.edi_message_exists(request.previous_message_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=EErrorMessage.MESSAGE_NOT_FOUND.value.format(request.previous_message_id),
+        )
+
+    diff, errors = await edi_service.decode_amendment(request.edi_content, request.previous_message_id)
+    error_dicts = _convert_errors_to_dict(errors) if errors else None
+    if diff is None:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=error_dicts)
+
+    return model_response(
+        http_request,
+        EDIDecodeDiffResponse.model_construct(
+            message_id=edi_service.message_id,
+            previous_message_id=request.previous_message_id,
+            added=diff.added,
+            changed=[
+                CargoItemChange.model_construct(previous_id=previous_id, cargo_item=item)
+                for previous_id, item in diff.changed
+            ],
+            removed=diff.removed,
+            unchanged=diff.unchanged,
+            errors=error_dicts,
+        ),
+    )
+
+
+@router.post("/decode/batch", response_model=EDIBatchDecodeResponse)
+async def decode_edi_batch_handler(request: DecodeEDIBatchRequest, http_request: Request) -> Response:
+    """Decode several EDI messages in one request, reporting results and errors per document."""
+    settings = get_settings()
+
+    # Check for empty and oversized batches
+    if not request.documents:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=EErrorMessage.NO_ITEMS)
+    if len(request.documents) > settings.BATCH_DECODE_MAX_DOCUMENTS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=EErrorMessage.TOO_MANY_DOCUMENTS.value.format(
+                len(request.documents), settings.BATCH_DECODE_MAX_DOCUMENTS
+            ),
+        )
+
+    edi_service = EDIDecodingService(*repositories())
+    results = await edi_service.decode_edi_messages(request.documents, settings.BATCH_DECODE_CONCURRENCY)
+
+    return model_response(
+        http_request,
+        EDIBatchDecodeResponse.model_construct(
+            results=[
+                EDIBatchDecodeResult.model_construct(
+                    index=index,
+                    cargo_items=cargo_items,
+                    errors=_convert_errors_to_dict(errors) if errors else None,
+                )
+                for index, (cargo_items, errors) in enumerate(results)
+            ]
+        ),
+    )
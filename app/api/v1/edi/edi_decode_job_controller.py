@@ -0,0 +1,116 @@
+"""Asynchronous EDI decode job controller."""
+
+from collections.abc import AsyncIterator
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from pydantic import ValidationError
+
+from app.api.v1.edi.edi_decode_controller import DecodeEDIRequest
+from app.config import get_settings
+from app.constants.error_messages import EErrorMessage
+from app.db.cargo_repository import CargoRepository
+from app.db.decode_job_repository import DecodeJobRepository
+from app.models.responses import DecodeJobCreatedResponse, DecodeJobProgress, DecodeJobResponse
+from app.utils.serialization import model_response
+
+router = APIRouter(tags=["EDI"])
+
+_JOB_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "text/plain": {"schema": {"type": "string"}},
+        "application/json": {"schema": DecodeEDIRequest.model_json_schema()},
+    },
+}
+
+
+async def _payload_chunks(request: Request, max_size: int) -> AsyncIterator[bytes]:
+    """Yield the EDI document from a raw or JSON request body, enforcing the payload size limit."""
+    if request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            body = DecodeEDIRequest.model_validate_json(await request.body())
+        except ValidationError as e:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.errors()) from e
+        chunks: AsyncIterator[bytes] = _single_chunk(body.edi_content.encode("utf-8"))
+    else:
+        chunks = request.stream()
+
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > max_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=EErrorMessage.JOB_PAYLOAD_TOO_LARGE.value.format(max_size),
+            )
+        if chunk:
+            yield chunk
+
+
+async def _single_chunk(data: bytes) -> AsyncIterator[bytes]:
+    """Yield data as a single chunk."""
+    yield data
+
+
+@router.post(
+    "/decode/jobs",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=DecodeJobCreatedResponse,
+    openapi_extra={"requestBody": _JOB_REQUEST_BODY},
+)
+async def create_decode_job_handler(http_request: Request) -> Response:
+    """Accept an EDI document for background decoding and return its job ID immediately."""
+    settings = get_settings()
+    try:
+        job = await DecodeJobRepository.create_job(_payload_chunks(http_request, settings.DECODE_JOB_MAX_PAYLOAD_BYTES))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=EErrorMessage.NO_ITEMS.value) from e
+
+    # Let an idle worker in this process pick the job up without waiting for its next poll
+    pool = getattr(http_request.app.state, "decode_job_pool", None)
+    if pool is not None:
+        pool.notify()
+
+    response = model_response(
+        http_request,
+        DecodeJobCreatedResponse.model_construct(job_id=job.id, status=job.status),
+        status_code=status.HTTP_202_ACCEPTED,
+    )
+    response.headers["Location"] = str(http_request.url_for("get_decode_job_handler", job_id=job.id))
+    return response
+
+
+@router.get("/decode/jobs/{job_id}", response_model=DecodeJobResponse)
+async def get_decode_job_handler(
+    job_id: str,
+    http_request: Request,
+    cursor: int = Query(-1, description="Return items after this LIN group index"),
+    limit: Optional[int] = Query(None, gt=0),
+) -> Response:
+    """Get a decode job's status, progress and a page of its decoded items."""
+    settings = get_settings()
+    job = await DecodeJobRepository.get_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=EErrorMessage.JOB_NOT_FOUND.value.format(job_id)
+        )
+
+    page_size = min(limit or settings.DECODE_JOB_PAGE_SIZE, settings.DECODE_JOB_MAX_PAGE_SIZE)
+    page = await CargoRepository.find_job_cargo_items(job.id, cursor, page_size)
+
+    return model_response(
+        http_request,
+        DecodeJobResponse.model_construct(
+            job_id=job.id,
+            status=job.status,
+            progress=DecodeJobProgress(processed_groups=job.processed_groups, total_groups=job.total_groups),
+            cargo_item_count=job.cargo_item_count,
+            error_count=job.error_count,
+            errors=[error.model_dump() for error in job.errors] or None,
+            cargo_items=[item for _, item in page],
+            next_cursor=page[-1][0] if len(page) == page_size else None,
+            created_at=job.created_at,
+            completed_at=job.completed_at,
+        ),
+    )
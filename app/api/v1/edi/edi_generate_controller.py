@@ -1,13 +1,26 @@
 """EDI generation controller."""
 
-from typing import Any
+import asyncio
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Any, Optional, Union
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, ConfigDict
 
+from app.config import get_settings
+from app.constants import EResponseView
 from app.constants.error_messages import EErrorMessage
-from app.models.responses import EDIGenerateResponse
+from app.db.cargo_repository import LOOKUP_FIELDS, CargoRepository
+from app.db.edi_repository import EDIRepository
+from app.db.resilience import request_deadline
+from app.models.cargo_item import CargoItem
+from app.models.responses import EDIGenerateResponse, EDIIdsResponse, EDISummaryResponse
 from app.services.edi_generate import EDIGenerationService
+from app.services.manifest_summary import summarize_cargo_items
+from app.utils.cargo_edi import generate_edi_segment
+from app.utils.serialization import model_response
 
 router = APIRouter(tags=["EDI"])
 
@@ -20,23 +33,53 @@ class GenerateEDIRequest(BaseModel):
     model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=True)
 
 
-@router.post("/generate")
-async def generate_edi_handler(request: GenerateEDIRequest) -> EDIGenerateResponse:
-    """Generate EDI messages from a list of cargo items."""
+@router.post("/generate", response_model=Union[EDIGenerateResponse, EDIIdsResponse, EDISummaryResponse])
+async def generate_edi_handler(
+    request: GenerateEDIRequest, http_request: Request, view: EResponseView = EResponseView.FULL
+) -> Response:
+    """
+    Generate EDI messages from a list of cargo items.
+
+    The message is always generated and stored; ``view=ids`` returns the IDs of the stored items and
+    ``view=summary`` the totals of the items instead of the EDI content.
+    """
     # Check for empty request
     if not request.items:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=EErrorMessage.NO_ITEMS.value)
 
-    # Use EDI generation service
+    # Use EDI generation service; its database calls share one deadline
     service = EDIGenerationService()
-    edi_content, errors = await service.generate_edi_message(request.items)
+    with request_deadline(get_settings().REQUEST_DEADLINE_SECONDS):
+        edi_content, errors = await service.generate_edi_message(request.items)
 
     # Convert errors to dictionaries if there are any
     error_dicts = [{"index": e.index, "message": e.message} for e in errors] if errors else None
 
     # If we have EDI content, return it with any errors (partial success)
+    if edi_content and view == EResponseView.IDS:
+        return model_response(
+            http_request,
+            EDIIdsResponse.model_construct(
+                cargo_item_ids=[item.id for item in service.cargo_items if item.id],
+                errors=error_dicts,
+                message_id=service.message_id,
+            ),
+        )
+    if edi_content and view == EResponseView.SUMMARY:
+        manifest_summary = await asyncio.to_thread(summarize_cargo_items, service.cargo_items)
+        return model_response(
+            http_request,
+            EDISummaryResponse.model_construct(
+                summary=manifest_summary, errors=error_dicts, message_id=service.message_id
+            ),
+        )
     if edi_content:
-        return EDIGenerateResponse(edi_content=edi_content, errors=error_dicts)
+        return model_response(
+            http_request,
+            EDIGenerateResponse.model_construct(
+                edi_content=edi_content, errors=error_dicts, message_id=service.message_id
+            ),
+        )
 
     # If we have no content but have errors, all items were invalid
     if errors:
@@ -44,3 +87,60 @@ async def generate_edi_handler(request: GenerateEDIRequest) -> EDIGenerateRespon
 
     # Should never reach here, but just in case
     raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to generate EDI message")
+
+
+async def _stream_edi(first_batch: list[CargoItem], batches: AsyncIterator[list[CargoItem]]) -> AsyncIterator[str]:
+    """Yield the EDI segments of each batch, numbering lines continuously across batches."""
+    yield "".join(generate_edi_segment(item, index) for index, item in enumerate(first_batch, start=1))
+    line_index = len(first_batch) + 1
+    async for batch in batches:
+        yield "".join(generate_edi_segment(item, index) for index, item in enumerate(batch, start=line_index))
+        line_index += len(batch)
+
+
+@router.get("/regenerate", response_class=StreamingResponse)
+async def regenerate_edi_handler(
+    message_id: Optional[str] = None,
+    container_number: Optional[str] = None,
+    master_bill_of_lading_number: Optional[str] = None,
+    house_bill_of_lading_number: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> StreamingResponse:
+    """
+    Regenerate EDI from stored cargo items without storing anything.
+
+    Items come either from a stored message, in message order, or from lookup filters and a creation time
+    range, oldest first. They are read through a cursor in batches of ``REGENERATE_BATCH_SIZE`` and streamed
+    out as they are generated, so server memory stays flat however many items match.
+    """
+    values = {
+        "container_number": container_number,
+        "master_bill_of_lading_number": master_bill_of_lading_number,
+        "house_bill_of_lading_number": house_bill_of_lading_number,
+    }
+    filters = {field: values[field] for field in LOOKUP_FIELDS if values[field] is not None}
+    has_filters = bool(filters) or created_from is not None or created_to is not None
+    if (message_id is None) == (not has_filters):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=EErrorMessage.REGENERATE_SOURCE_REQUIRED.value
+        )
+
+    batch_size = get_settings().REGENERATE_BATCH_SIZE
+    if message_id is not None:
+        cargo_item_ids = await EDIRepository.get_cargo_item_ids(message_id)
+        if cargo_item_ids is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail=EErrorMessage.MESSAGE_NOT_FOUND.value.format(message_id)
+            )
+        batches = CargoRepository.iter_cargo_items_by_ids(cargo_item_ids, batch_size)
+    else:
+        batches = CargoRepository.iter_cargo_items(filters, batch_size, created_from, created_to)
+
+    # Read the first batch up front so an empty result is still a proper 404 rather than an empty stream
+    try:
+        first_batch = await batches.__anext__()
+    except StopAsyncIteration:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=EErrorMessage.NO_ITEMS.value) from None
+
+    return StreamingResponse(_stream_edi(first_batch, batches), media_type="text/plain")
@@ -0,0 +1,114 @@
+"""Stored EDI message controller."""
+
+import hashlib
+from typing import Any, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+
+from app.config import get_settings
+from app.constants.error_messages import EErrorMessage
+from app.db.cargo_repository import CargoRepository
+from app.db.edi_repository import EDIRepository
+from app.db.partitions import as_utc
+from app.models.responses import EDIMessageCargoItemsResponse, EDIMessageResponse
+from app.utils.http_cache import (
+    cache_headers,
+    etag_matches,
+    not_modified,
+    representation_etag,
+    revalidate_headers,
+    version_etag,
+)
+from app.utils.projection import parse_fields, project_document
+from app.utils.serialization import model_response
+
+router = APIRouter(tags=["EDI"])
+
+
+def _items_version(docs: list[dict[str, Any]]) -> Optional[str]:
+    """Version stamp of the items an upsert can still change, or None if none of them can."""
+    updated = [as_utc(doc["updated_at"]).isoformat() for doc in docs if doc.get("natural_key")]
+    if not updated:
+        return None
+    return hashlib.sha256(",".join(updated).encode()).hexdigest()[:16]
+
+
+def _message_not_found(message_id: str) -> HTTPException:
+    """Build the 404 error for an unknown message."""
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND, detail=EErrorMessage.MESSAGE_NOT_FOUND.value.format(message_id)
+    )
+
+
+@router.get("/messages/{message_id}", response_model=EDIMessageResponse)
+async def get_edi_message_handler(message_id: str, http_request: Request) -> Response:
+    """Get a stored EDI message; answers If-None-Match with 304 since stored messages never change."""
+    max_age = get_settings().MESSAGE_CACHE_MAX_AGE_SECONDS
+    etag = representation_etag(http_request, message_id)
+    if etag_matches(http_request.headers.get("if-none-match"), etag):
+        if not await EDIRepository.edi_message_exists(message_id):
+            raise _message_not_found(message_id)
+        return not_modified(cache_headers(etag, max_age))
+
+    message = await EDIRepository.get_edi_message(message_id)
+    if message is None:
+        raise _message_not_found(message_id)
+
+    response = model_response(
+        http_request,
+        EDIMessageResponse.model_construct(
+            id=message.id,
+            edi_content=message.edi_content,
+            cargo_item_ids=message.cargo_item_ids,
+            created_at=message.created_at,
+        ),
+    )
+    response.headers.update(cache_headers(etag, max_age))
+    return response
+
+
+@router.get("/messages/{message_id}/cargo-items", response_model=EDIMessageCargoItemsResponse)
+async def get_edi_message_cargo_items_handler(
+    message_id: str,
+    http_request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; id is always included"),
+) -> Response:
+    """
+    Get the cargo items of a stored EDI message with one query, in message order.
+
+    Items stored by natural-key upserts change when a later message re-sends them, so a response containing any
+    gets a weak ETag from their update times and must be revalidated; other responses are immutable.
+    """
+    try:
+        selected = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+
+    max_age = get_settings().MESSAGE_CACHE_MAX_AGE_SECONDS
+    etag = representation_etag(http_request, message_id, "items", *(selected or ["all"]))
+    if etag_matches(http_request.headers.get("if-none-match"), etag):
+        if not await EDIRepository.edi_message_exists(message_id):
+            raise _message_not_found(message_id)
+        return not_modified(cache_headers(etag, max_age))
+
+    cargo_item_ids = await EDIRepository.get_cargo_item_ids(message_id)
+    if cargo_item_ids is None:
+        raise _message_not_found(message_id)
+    docs = await CargoRepository.find_cargo_items_by_ids(cargo_item_ids, selected)
+
+    headers = cache_headers(etag, max_age)
+    version = _items_version(docs)
+    if version is not None:
+        etag = version_etag(http_request, message_id, "items", *(selected or ["all"]), version)
+        headers = revalidate_headers(etag)
+        if etag_matches(http_request.headers.get("if-none-match"), etag):
+            return not_modified(headers)
+
+    response = model_response(
+        http_request,
+        EDIMessageCargoItemsResponse.model_construct(
+            message_id=message_id, cargo_items=[project_document(doc, selected) for doc in docs]
+        ),
+    )
+    response.headers.update(headers)
+    return response
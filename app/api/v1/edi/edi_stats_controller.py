@@ -0,0 +1,60 @@
+"""Cargo statistics controller."""
+
+from collections import defaultdict
+from datetime import UTC, date, datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request, Response, status
+
+from app.config import get_settings
+from app.constants import ECargoType
+from app.constants.error_messages import EErrorMessage
+from app.db.cargo_stats_repository import CargoStatsRepository
+from app.models.responses import CargoDailyStats, CargoStatsResponse, CargoTypeTotals
+from app.utils.serialization import model_response
+
+router = APIRouter(tags=["EDI"])
+
+
+@router.get("/stats", response_model=CargoStatsResponse)
+async def get_cargo_stats_handler(
+    http_request: Request,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    cargo_type: Optional[ECargoType] = None,
+) -> Response:
+    """
+    Get the number of cargo items and packages stored per day and cargo type.
+
+    Both dates are inclusive UTC days; by default the last ``STATS_DEFAULT_DAYS`` days up to today are returned.
+    Counts come from rollups maintained as items are written, so this reads one document per day and cargo type.
+    """
+    settings = get_settings()
+    date_to = date_to or datetime.now(UTC).date()
+    date_from = date_from or date_to - timedelta(days=settings.STATS_DEFAULT_DAYS - 1)
+    if date_from > date_to:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=EErrorMessage.INVALID_DATE_RANGE.value)
+    if (date_to - date_from).days + 1 > settings.STATS_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=EErrorMessage.DATE_RANGE_TOO_LONG.value.format(settings.STATS_MAX_DAYS),
+        )
+
+    docs = await CargoStatsRepository.get_daily_stats(date_from, date_to, cargo_type.value if cargo_type else None)
+    totals: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+    for doc in docs:
+        totals[doc["cargo_type"]][0] += doc["items"]
+        totals[doc["cargo_type"]][1] += doc["packages"]
+
+    return model_response(
+        http_request,
+        CargoStatsResponse.model_construct(
+            date_from=date_from,
+            date_to=date_to,
+            days=[CargoDailyStats.model_construct(**doc) for doc in docs],
+            totals=[
+                CargoTypeTotals.model_construct(cargo_type=name, items=items, packages=packages)
+                for name, (items, packages) in sorted(totals.items())
+            ],
+        ),
+    )
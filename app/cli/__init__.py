@@ -0,0 +1,25 @@
+"""Command-line tools, run with ``python -m app.cli <command>``."""
+
+import argparse
+from typing import Optional
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser with one subcommand per tool."""
+    # Subcommands pull in parsers and repositories, so import them only when the CLI runs
+    from app.cli import archive, decode, export, generate, ingest
+
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Clear AI backend command-line tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    decode.add_parser(subparsers)
+    generate.add_parser(subparsers)
+    export.add_parser(subparsers)
+    ingest.add_parser(subparsers)
+    archive.add_parser(subparsers)
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Run a command-line tool and return its exit code."""
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
@@ -0,0 +1,8 @@
+"""Run the command-line tools with ``python -m app.cli``."""
+
+import sys
+
+from app.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""Retention of monthly buckets: ``python -m app.cli archive``."""
+
+import argparse
+import asyncio
+import sys
+
+from app.config import get_settings
+from app.services.retention import RetentionService
+
+
+async def _archive(service: RetentionService, dry_run: bool) -> int:
+    """Archive expired buckets, or only list them for a dry run."""
+    if dry_run:
+        for name in await service.expired_buckets():
+            print(name)
+        return 0
+
+    archived = await service.run_once()
+    print(f"✅ Archived {len(archived)} buckets with {sum(archived.values())} documents", file=sys.stderr)
+    return 0
+
+
+def run(args: argparse.Namespace) -> int:
+    """Archive and drop expired monthly buckets and return the exit code."""
+    service = RetentionService.from_settings(get_settings())
+    if args.retention_months is not None:
+        service.retention_months = args.retention_months
+    if args.archive_dir:
+        service.archive_dir = args.archive_dir
+    return asyncio.run(_archive(service, args.dry_run))
+
+
+def add_parser(subparsers: argparse._SubParsersAction) -> None:
+    """Register the archive command."""
+    parser = subparsers.add_parser(
+        "archive", help="Archive monthly buckets older than the retention period to gzipped files, then drop them"
+    )
+    parser.add_argument(
+        "--retention-months", type=int, help="Whole months to keep (default: PARTITION_RETENTION_MONTHS)"
+    )
+    parser.add_argument("--archive-dir", help="Directory for archive files (default: PARTITION_ARCHIVE_DIR)")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the buckets that would be archived")
+    parser.set_defaults(handler=run)
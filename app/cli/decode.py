@@ -0,0 +1,335 @@
+"""Bulk EDI decoder: ``python -m app.cli decode``."""
+
+import argparse
+import asyncio
+import fnmatch
+import mmap
+import os
+import sys
+import time
+from collections.abc import Iterable, Iterator
+from datetime import UTC, datetime
+from functools import partial
+from multiprocessing import Pool
+from typing import Any, NamedTuple, Optional
+
+from app.config import get_settings
+from app.constants import ECargoType, EOutputFormat
+from app.constants.error_messages import EErrorMessage
+from app.db.cargo_repository import CargoRepository
+from app.db.edi_repository import EDIRepository
+from app.db.partitions import derived_object_id
+from app.models.cargo_item import CargoItem
+from app.server import resolve_worker_count
+from app.utils.cargo_edi.message_processor import parse_edi_message
+from app.utils.tabular import CARGO_ITEM_COLUMNS, infer_format, open_writer
+
+DECODE_COLUMNS: dict[str, type] = {"source_file": str, **CARGO_ITEM_COLUMNS}
+ERROR_COLUMNS: dict[str, type] = {"source_file": str, "index": int, "message": str}
+
+
+class DecodedFile(NamedTuple):
+    """Result of decoding one EDI file in a worker process."""
+
+    path: str
+    size: int
+    rows: list[dict[str, Any]]
+    errors: list[dict[str, Any]]
+    edi_content: Optional[str] = None  # Only sent back to the parent when the file will be stored
+    read_error: Optional[str] = None
+
+
+def collect_files(paths: list[str], pattern: str, recursive: bool) -> list[str]:
+    """Expand files and directories into a sorted list of EDI file paths."""
+    files = set()
+    for path in paths:
+        if not os.path.isdir(path):
+            files.add(os.path.abspath(path))
+            continue
+        for root, dirs, names in os.walk(path):
+            files.update(os.path.abspath(os.path.join(root, name)) for name in fnmatch.filter(names, pattern))
+            if not recursive:
+                dirs.clear()
+    return sorted(files)
+
+
+def decode_file(path: str, keep_content: bool = False) -> DecodedFile:
+    """
+    Decode one EDI file.
+
+    The file is memory-mapped and decoded straight from the mapping, so it is not read into an
+    intermediate bytes buffer first.
+
+    Args:
+        path: The EDI file
+        keep_content: Return the EDI text so the parent process can store it
+
+    Returns:
+        The decoded rows and errors
+    """
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    edi_content = str(mapped, "ascii")
+            else:
+                edi_content = ""
+    except UnicodeDecodeError:
+        errors = [{"source_file": path, "index": None, "message": EErrorMessage.ERR_ASCII_CHARS.value}]
+        return DecodedFile(path, size, [], errors)
+    except OSError as e:
+        return DecodedFile(path, 0, [], [], read_error=EErrorMessage.FAILED_TO_READ_FILE.value.format(path, e))
+
+    cargo_items, errors = parse_edi_message(edi_content)
+    rows = [{"source_file": path, **item.model_dump(mode="json", exclude={"id", "created_at"})} for item in cargo_items]
+    error_rows = [{"source_file": path, "index": error.index, "message": error.message} for error in errors]
+    return DecodedFile(path, size, rows, error_rows, edi_content if keep_content and rows else None)
+
+
+def _decode_files(paths: list[str], workers: int, keep_content: bool) -> Iterator[DecodedFile]:
+    """Decode files across a process pool, yielding results as they complete."""
+    decode = partial(decode_file, keep_content=keep_content)
+    if workers <= 1 or len(paths) <= 1:
+        yield from map(decode, paths)
+        return
+
+    # Hand out several files per task so small files do not pay one round trip each
+    chunksize = max(1, min(16, len(paths) // (workers * 4)))
+    with Pool(workers) as pool:
+        yield from pool.imap_unordered(decode, paths, chunksize)
+
+
+async def store_decoded(files: list[DecodedFile], stored_at: Optional[dict[str, datetime]] = None) -> None:
+    """
+    Bulk-load decoded files through the repositories, filling in each row's ID.
+
+    Each item and message ID is derived from its file, position and storage time, so storing the same files
+    with the same times again, e.g. after a crash before they were checkpointed, does not duplicate them.
+
+    Args:
+        files: Decoded files whose EDI content was kept
+        stored_at: Storage time of each file, as recorded by the checkpoint; now for files without one
+    """
+    files = [decoded for decoded in files if decoded.rows]
+    if not files:
+        return
+
+    now = datetime.now(UTC)
+    cargo_items, message_ids = [], []
+    for decoded in files:
+        when = (stored_at or {}).get(decoded.path, now)
+        message_ids.append(str(derived_object_id(when, decoded.path)))
+        for index, row in enumerate(decoded.rows):
+            fields = {
+                name: value for name, value in row.items() if name in CargoItem.model_fields and value is not None
+            }
+            cargo_items.append(
+                CargoItem.model_construct(
+                    **{
+                        **fields,
+                        "cargo_type": ECargoType(row["cargo_type"]),
+                        "id": str(derived_object_id(when, decoded.path, str(index))),
+                        "created_at": when,
+                    }
+                )
+            )
+
+    rows = [row for decoded in files for row in decoded.rows]
+    for row, cargo_id in zip(rows, await CargoRepository.store_cargo_items(cargo_items)):
+        row["id"] = cargo_id
+
+    await EDIRepository.store_edi_messages(
+        [(decoded.edi_content, [row["id"] for row in decoded.rows]) for decoded in files], message_ids
+    )
+
+
+class Checkpoint:
+    """
+    Append-only record of files that have been fully processed.
+
+    Files about to be stored are recorded first, as ``@<storage time>\t<path>`` lines, so a run that stops
+    before checkpointing them stores them again at the same time, under the same IDs.
+    """
+
+    PENDING_PREFIX = "@"
+
+    def __init__(self, path: str):
+        """Load the files already recorded at path."""
+        self.done: set[str] = set()
+        self.pending: dict[str, datetime] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.rstrip("\n")
+                    if line.startswith(self.PENDING_PREFIX):
+                        stored_at, pending_path = line[len(self.PENDING_PREFIX) :].split("\t", 1)
+                        self.pending[pending_path] = datetime.fromisoformat(stored_at)
+                    elif line.strip():
+                        self.done.add(line)
+        self.file = open(path, "a", encoding="utf-8")
+
+    def __contains__(self, path: str) -> bool:
+        """Check whether a file was already processed."""
+        return path in self.done
+
+    def _write(self, lines: Iterable[str]) -> None:
+        """Append lines and make them durable."""
+        self.file.writelines(f"{line}\n" for line in lines)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def begin(self, paths: Iterable[str]) -> dict[str, datetime]:
+        """
+        Durably record files that are about to be stored.
+
+        Returns:
+            Storage time of each file: the one recorded by an earlier run if it stopped before finishing the file
+        """
+        now = datetime.now(UTC)
+        started = {path: self.pending.get(path, now) for path in paths}
+        self._write(
+            f"{self.PENDING_PREFIX}{stored_at.isoformat()}\t{path}"
+            for path, stored_at in started.items()
+            if path not in self.pending
+        )
+        self.pending.update(started)
+        return started
+
+    def record(self, paths: Iterable[str]) -> None:
+        """Durably record processed files."""
+        self._write(paths)
+
+    def close(self) -> None:
+        """Close the checkpoint file."""
+        self.file.close()
+
+
+class Throughput:
+    """Running totals for the throughput report."""
+
+    def __init__(self):
+        """Start the clock."""
+        self.started = time.perf_counter()
+        self.files = 0
+        self.bytes = 0
+        self.items = 0
+        self.errors = 0
+
+    def add(self, files: list[DecodedFile]) -> None:
+        """Count a batch of processed files."""
+        self.files += len(files)
+        self.bytes += sum(decoded.size for decoded in files)
+        self.items += sum(len(decoded.rows) for decoded in files)
+        self.errors += sum(len(decoded.errors) for decoded in files)
+
+    def report(self) -> str:
+        """Describe totals and rates so far."""
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        megabytes = self.bytes / 1_000_000
+        return (
+            f"{self.files} files, {megabytes:.1f} MB, {self.items} cargo items, {self.errors} errors "
+            f"in {elapsed:.2f}s ({self.files / elapsed:.1f} files/s, {megabytes / elapsed:.2f} MB/s, "
+            f"{self.items / elapsed:.0f} items/s)"
+        )
+
+
+def run(args: argparse.Namespace) -> int:
+    """Decode the requested files and return the exit code."""
+    output_format = EOutputFormat(args.format) if args.format else infer_format(args.output)
+    paths = collect_files(args.paths, args.pattern, args.recursive)
+    checkpoint = Checkpoint(args.checkpoint) if args.checkpoint else None
+    pending = [path for path in paths if checkpoint is None or path not in checkpoint]
+    resuming = len(pending) < len(paths)
+    if resuming:
+        print(f"⏭️ Skipping {len(paths) - len(pending)} files recorded in {args.checkpoint}", file=sys.stderr)
+
+    try:
+        gzip_level = get_settings().EXPORT_GZIP_LEVEL
+        writer = open_writer(args.output, output_format, DECODE_COLUMNS, append=resuming, gzip_level=gzip_level)
+        errors_writer = (
+            open_writer(args.errors, infer_format(args.errors), ERROR_COLUMNS, append=resuming, gzip_level=gzip_level)
+            if args.errors
+            else None
+        )
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    workers = resolve_worker_count(args.workers)
+    runner = asyncio.Runner() if args.store else None
+    stats = Throughput()
+    last_report = stats.started
+    failed = 0
+
+    def flush(batch: list[DecodedFile]) -> None:
+        nonlocal failed, last_report
+        decoded = [result for result in batch if result.read_error is None]
+        for result in batch:
+            if result.read_error is not None:
+                print(f"❌ {result.read_error}", file=sys.stderr)
+                failed += 1
+
+        # Store first, so rows carry their IDs and a file is only checkpointed once it is durable
+        if runner is not None:
+            stored_at = checkpoint.begin(result.path for result in decoded if result.rows) if checkpoint else None
+            runner.run(store_decoded(decoded, stored_at))
+        writer.write_rows([row for result in decoded for row in result.rows])
+        writer.flush()
+        if errors_writer is not None:
+            errors_writer.write_rows([error for result in decoded for error in result.errors])
+            errors_writer.flush()
+        if checkpoint is not None:
+            checkpoint.record(result.path for result in decoded)
+
+        stats.add(decoded)
+        now = time.perf_counter()
+        if not args.quiet and now - last_report >= args.progress_interval:
+            print(f"⏳ {stats.report()}", file=sys.stderr)
+            last_report = now
+
+    try:
+        batch: list[DecodedFile] = []
+        for result in _decode_files(pending, workers, keep_content=args.store):
+            batch.append(result)
+            if len(batch) >= args.batch_files:
+                flush(batch)
+                batch = []
+        flush(batch)
+    except Exception as e:
+        print(f"❌ {EErrorMessage.PROCESSING_ERROR.value}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        writer.close()
+        if errors_writer is not None:
+            errors_writer.close()
+        if checkpoint is not None:
+            checkpoint.close()
+        if runner is not None:
+            runner.close()
+
+    if not args.quiet:
+        print(f"✅ Decoded {stats.report()}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def add_parser(subparsers: argparse._SubParsersAction) -> None:
+    """Register the decode command."""
+    parser = subparsers.add_parser("decode", help="Decode EDI files into cargo items")
+    parser.add_argument("paths", nargs="+", help="EDI files or directories of EDI files")
+    parser.add_argument("--pattern", default="*.edi", help="File name pattern for directories (default: *.edi)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Search directories recursively")
+    parser.add_argument("-o", "--output", help="Output file (default: standard output)")
+    parser.add_argument(
+        "--format",
+        choices=[output_format.value for output_format in EOutputFormat],
+        help="Output format (default: from the output file extension, else ndjson)",
+    )
+    parser.add_argument("--errors", help="Write decoding errors to this file")
+    parser.add_argument("-w", "--workers", type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--batch-files", type=int, default=64, help="Files per output and database batch")
+    parser.add_argument("--store", action="store_true", help="Bulk-load decoded items and messages into MongoDB")
+    parser.add_argument("--checkpoint", help="Record finished files here and skip them when re-run")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="Seconds between progress reports")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Do not report progress and throughput")
+    parser.set_defaults(handler=run)
@@ -0,0 +1,85 @@
+"""Bulk cargo item export: ``python -m app.cli export``."""
+
+import argparse
+import asyncio
+import sys
+import time
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import BinaryIO
+
+from app.config import get_settings
+from app.constants import EOutputFormat
+from app.constants.error_messages import EErrorMessage
+from app.db.cargo_repository import LOOKUP_FIELDS
+from app.services.cargo_export import export_cargo_items
+from app.utils.projection import parse_fields
+from app.utils.tabular import STREAMABLE_FORMATS, infer_format, is_gzip_path
+
+
+async def write_chunks(chunks: AsyncIterator[bytes], output: BinaryIO) -> int:
+    """Write an export to an open file as it is encoded and return the number of bytes written."""
+    size = 0
+    async for chunk in chunks:
+        output.write(chunk)
+        size += len(chunk)
+    output.flush()
+    return size
+
+
+def run(args: argparse.Namespace) -> int:
+    """Export the matching cargo items and return the exit code."""
+    output_format = EOutputFormat(args.format) if args.format else infer_format(args.output)
+    to_stdout = not args.output or args.output == "-"
+    filters = {field: getattr(args, field) for field in LOOKUP_FIELDS if getattr(args, field) is not None}
+    try:
+        chunks = export_cargo_items(
+            output_format,
+            filters,
+            args.batch_size or get_settings().EXPORT_BATCH_SIZE,
+            created_from=args.created_from,
+            created_to=args.created_to,
+            fields=parse_fields(args.fields),
+            compress=args.gzip or is_gzip_path(args.output),
+        )
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    started = time.perf_counter()
+    output = sys.stdout.buffer if to_stdout else open(args.output, "wb")
+    try:
+        size = asyncio.run(write_chunks(chunks, output))
+    except Exception as e:
+        print(f"❌ {EErrorMessage.PROCESSING_ERROR.value}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if not to_stdout:
+            output.close()
+
+    if not args.quiet:
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        print(f"✅ Exported {size / 1e6:.1f} MB in {elapsed:.2f}s ({size / 1e6 / elapsed:.1f} MB/s)", file=sys.stderr)
+    return 0
+
+
+def add_parser(subparsers: argparse._SubParsersAction) -> None:
+    """Register the export command."""
+    parser = subparsers.add_parser("export", help="Export stored cargo items to NDJSON or CSV")
+    parser.add_argument("-o", "--output", help="Output file, gzipped if it ends in .gz (default: standard output)")
+    parser.add_argument(
+        "--format",
+        choices=[output_format.value for output_format in STREAMABLE_FORMATS],
+        help="Output format (default: from the output file extension, else ndjson)",
+    )
+    parser.add_argument(
+        "--from", dest="created_from", type=datetime.fromisoformat, help="Items created at or after this ISO time"
+    )
+    parser.add_argument("--to", dest="created_to", type=datetime.fromisoformat, help="Items created before this time")
+    for field in LOOKUP_FIELDS:
+        parser.add_argument(f"--{field.replace('_', '-')}", dest=field, help=f"Only items with this {field}")
+    parser.add_argument("--fields", help="Comma-separated fields to export; id is always included")
+    parser.add_argument("--gzip", action="store_true", help="Gzip the output")
+    parser.add_argument("--batch-size", type=int, help="Items per database round trip (default: EXPORT_BATCH_SIZE)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Do not report throughput")
+    parser.set_defaults(handler=run)
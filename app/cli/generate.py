@@ -0,0 +1,212 @@
+"""Bulk EDI generator: ``python -m app.cli generate``."""
+
+import argparse
+import asyncio
+import csv
+import io
+import sys
+import time
+from collections.abc import Iterator
+from itertools import islice
+from typing import Any, TextIO
+
+import orjson
+
+from app.config import get_settings
+from app.constants import EOutputFormat
+from app.constants.error_messages import EErrorMessage
+from app.db.cargo_repository import CargoRepository
+from app.db.edi_repository import EDIRepository
+from app.models.cargo_item import CargoItem
+from app.models.responses import ProcessingError
+from app.services.edi_generate import validate_cargo_item
+from app.utils.cargo_edi import generate_edi_segment
+from app.utils.tabular import infer_format, open_writer
+
+ERROR_COLUMNS: dict[str, type] = {"index": int, "message": str}
+INPUT_FORMATS = (EOutputFormat.CSV, EOutputFormat.NDJSON)
+
+
+def iter_rows(stream: TextIO, input_format: EOutputFormat) -> Iterator[dict[str, Any] | ProcessingError]:
+    """
+    Stream cargo item rows from CSV or NDJSON.
+
+    Rows that cannot be read are yielded as errors, so row indexes stay aligned with the input.
+    """
+    if input_format == EOutputFormat.CSV:
+        for row in csv.DictReader(stream):
+            # Empty CSV cells mean the optional field is absent
+            yield {name: value for name, value in row.items() if name and value != ""}
+        return
+
+    for index, line in enumerate(line for line in stream if line.strip()):
+        try:
+            row = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield ProcessingError(index=index, message=str(e))
+            continue
+        if isinstance(row, dict):
+            yield row
+        else:
+            yield ProcessingError(index=index, message=EErrorMessage.INVALID_INPUT_ROW.value.format(line.strip()))
+
+
+def validate_chunk(
+    rows: list[dict[str, Any] | ProcessingError], start: int
+) -> tuple[list[tuple[int, CargoItem]], list[ProcessingError]]:
+    """
+    Validate a chunk of rows against the cargo item rules.
+
+    Returns:
+        Tuple of the valid items with their input row indexes, and the errors of the other rows
+    """
+    cargo_items, errors = [], []
+    for index, row in enumerate(rows, start=start):
+        if isinstance(row, ProcessingError):
+            errors.append(row)
+            continue
+        # Drop identifiers and timestamps from exported rows; generated items get new ones
+        cargo_item, row_errors = validate_cargo_item(
+            {name: value for name, value in row.items() if name not in ("id", "_id", "created_at")}, index
+        )
+        errors.extend(row_errors)
+        if cargo_item:
+            cargo_items.append((index, cargo_item))
+    return cargo_items, errors
+
+
+def generate_chunk(
+    cargo_items: list[tuple[int, CargoItem]], first_line_index: int
+) -> tuple[str, list[CargoItem], list[ProcessingError]]:
+    """
+    Generate the EDI segments for a chunk of items, numbering lines from first_line_index.
+
+    Args:
+        cargo_items: Items with their input row indexes, which errors are reported by
+        first_line_index: LIN number of the chunk's first generated segment
+
+    Returns:
+        Tuple of the chunk's EDI content, the items it contains and the errors of the others
+    """
+    segments, generated, errors = [], [], []
+    line_index = first_line_index
+    for row_index, cargo_item in cargo_items:
+        try:
+            segments.append(generate_edi_segment(cargo_item, line_index))
+        except Exception as e:
+            errors.append(
+                ProcessingError(
+                    index=row_index,
+                    message=EErrorMessage.FAILED_TO_GENERATE_SEGMENT.value.format(line_index, str(e)),
+                )
+            )
+            continue
+        generated.append(cargo_item)
+        line_index += 1
+    return "".join(segments), generated, errors
+
+
+def _open_input(path: str) -> TextIO:
+    """Open the input file, or standard input for "-"."""
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def run(args: argparse.Namespace) -> int:
+    """Generate EDI from the input rows and return the exit code."""
+    input_format = EOutputFormat(args.format) if args.format else infer_format(args.input)
+    if input_format not in INPUT_FORMATS:
+        print(f"❌ {EErrorMessage.UNSUPPORTED_INPUT_FORMAT.value.format(input_format.value)}", file=sys.stderr)
+        return 2
+    to_stdout = not args.output or args.output == "-"
+    if args.store and to_stdout:
+        print(f"❌ {EErrorMessage.STORE_REQUIRES_OUTPUT_FILE.value}", file=sys.stderr)
+        return 2
+
+    errors_writer = (
+        open_writer(args.errors, infer_format(args.errors), ERROR_COLUMNS, gzip_level=get_settings().EXPORT_GZIP_LEVEL)
+        if args.errors
+        else None
+    )
+    output: TextIO = sys.stdout if to_stdout else open(args.output, "w", encoding="ascii", newline="")
+    runner = asyncio.Runner() if args.store else None
+    started = time.perf_counter()
+    row_count = item_count = error_count = 0
+    cargo_ids: list[str] = []
+    message_parts: list[str] = []
+
+    def report(errors: list[ProcessingError]) -> None:
+        nonlocal error_count
+        error_count += len(errors)
+        if errors_writer is not None:
+            errors_writer.write_rows([{"index": error.index, "message": error.message} for error in errors])
+        else:
+            for error in errors:
+                print(f"❌ row {error.index}: {error.message}", file=sys.stderr)
+
+    try:
+        with _open_input(args.input) as stream:
+            rows = iter_rows(stream, input_format)
+            while chunk := list(islice(rows, args.chunk_size)):
+                valid_items, errors = validate_chunk(chunk, row_count)
+                row_count += len(chunk)
+                edi_content, cargo_items, generation_errors = generate_chunk(valid_items, item_count + 1)
+
+                # Persist the chunk before writing it, so stored items and generated lines stay in step
+                if runner is not None and cargo_items:
+                    chunk_ids = runner.run(CargoRepository.create_cargo_items(cargo_items))
+                    for cargo_item, cargo_id in zip(cargo_items, chunk_ids):
+                        cargo_item.id = cargo_id
+                    cargo_ids.extend(chunk_ids)
+                    # The stored message is one document, so its content is kept as it is generated
+                    message_parts.append(edi_content)
+
+                output.write(edi_content)
+                item_count += len(cargo_items)
+                report(errors + generation_errors)
+
+        output.flush()
+        if runner is not None and cargo_ids:
+            runner.run(EDIRepository.store_edi_message("".join(message_parts), cargo_ids))
+    except Exception as e:
+        print(f"❌ {EErrorMessage.PROCESSING_ERROR.value}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if not to_stdout:
+            output.close()
+        if errors_writer is not None:
+            errors_writer.close()
+        if runner is not None:
+            runner.close()
+
+    if not item_count:
+        print(f"❌ {EErrorMessage.NO_ITEMS.value}", file=sys.stderr)
+        return 1
+    if not args.quiet:
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        print(
+            f"✅ Generated {item_count} EDI line items from {row_count} rows with {error_count} errors "
+            f"in {elapsed:.2f}s ({row_count / elapsed:.0f} rows/s)",
+            file=sys.stderr,
+        )
+    return 1 if error_count else 0
+
+
+def add_parser(subparsers: argparse._SubParsersAction) -> None:
+    """Register the generate command."""
+    parser = subparsers.add_parser("generate", help="Generate an EDI message from CSV or NDJSON cargo items")
+    parser.add_argument("input", help='CSV or NDJSON file of cargo items, or "-" for standard input')
+    parser.add_argument(
+        "--format",
+        choices=[input_format.value for input_format in INPUT_FORMATS],
+        help="Input format (default: from the input file extension, else ndjson)",
+    )
+    parser.add_argument("-o", "--output", help="EDI output file (default: standard output)")
+    parser.add_argument("--errors", help="Write rejected rows to this file instead of standard error")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows validated and stored per chunk")
+    parser.add_argument(
+        "--store", action="store_true", help="Bulk-store the items and the EDI message in MongoDB (needs --output)"
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="Do not report throughput")
+    parser.set_defaults(handler=run)
@@ -0,0 +1,45 @@
+"""Spool directory ingestion: ``python -m app.cli ingest``."""
+
+import argparse
+import asyncio
+import signal
+import sys
+
+from app.config import get_settings
+from app.constants.error_messages import EErrorMessage
+from app.services.edi_spool import SpoolWatcher
+
+
+async def _watch(watcher: SpoolWatcher) -> None:
+    """Watch the spool directory until interrupted, then let in-flight files finish."""
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopped.set)
+
+    await watcher.start()
+    await stopped.wait()
+    print("🛑 Stopping, waiting for files being decoded...", file=sys.stderr)
+    await watcher.stop()
+
+
+def run(args: argparse.Namespace) -> int:
+    """Ingest the spool directory and return the exit code."""
+    settings = get_settings()
+    spool_dir = args.spool_dir or settings.SPOOL_DIR
+    if not spool_dir:
+        print(f"❌ {EErrorMessage.SPOOL_DIR_NOT_SET.value}", file=sys.stderr)
+        return 2
+
+    watcher = SpoolWatcher.from_settings(settings, spool_dir=spool_dir, workers=args.workers)
+    asyncio.run(watcher.run_once() if args.once else _watch(watcher))
+    return 0
+
+
+def add_parser(subparsers: argparse._SubParsersAction) -> None:
+    """Register the ingest command."""
+    parser = subparsers.add_parser("ingest", help="Decode EDI files dropped into a spool directory")
+    parser.add_argument("spool_dir", nargs="?", help="Spool directory (default: SPOOL_DIR)")
+    parser.add_argument("-w", "--workers", type=int, help="Files decoded at the same time (default: SPOOL_WORKERS)")
+    parser.add_argument("--once", action="store_true", help="Decode the files already waiting, then exit")
+    parser.set_defaults(handler=run)
@@ -1,5 +1,10 @@
+from functools import lru_cache
+from typing import Any, Optional
+
 from pydantic_settings import BaseSettings
 
+from app.constants import EContentCodec
+
 
 class Settings(BaseSettings):
     """Application settings."""
@@ -11,6 +16,106 @@ class Settings(BaseSettings):
     MONGODB_URI: str
     MONGODB_DB_NAME: str
 
+    # Server settings
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WEB_CONCURRENCY: Optional[int] = None  # Defaults to the number of usable CPUs
+    KEEP_ALIVE_SECONDS: int = 75
+    BACKLOG: int = 2048
+    GRACEFUL_SHUTDOWN_SECONDS: int = 30
+
+    # Decode pipeline settings: parsed batches queued ahead of the database writer
+    DECODE_PIPELINE_BATCH_GROUPS: int = 500
+    DECODE_PIPELINE_QUEUE_SIZE: int = 4
+
+    # Cargo item query settings
+    CARGO_QUERY_PAGE_SIZE: int = 50
+    CARGO_QUERY_MAX_PAGE_SIZE: int = 1000
+    MESSAGE_CACHE_MAX_AGE_SECONDS: int = 86400  # Stored messages never change
+    REGENERATE_BATCH_SIZE: int = 1000  # Cursor batch size when regenerating EDI from stored items
+    STATS_DEFAULT_DAYS: int = 30  # Days of cargo statistics returned when no date range is given
+    STATS_MAX_DAYS: int = 366
+    EXPORT_BATCH_SIZE: int = 5000  # Cursor batch size, and rows encoded per chunk, for cargo item exports
+    EXPORT_GZIP_LEVEL: int = 6  # Of gzipped exports and CLI output; higher levels cost far more CPU for little gain
+
+    # Stored EDI content: compressed inline above the first threshold, moved to GridFS above the second
+    EDI_CONTENT_COMPRESS_THRESHOLD_BYTES: int = 16 * 1024
+    EDI_CONTENT_GRIDFS_THRESHOLD_BYTES: int = 4 * 1024 * 1024  # Compressed size, well under the 16 MB document limit
+    EDI_CONTENT_CODEC: EContentCodec = EContentCodec.ZSTD
+    EDI_CONTENT_COMPRESSION_LEVEL: int = 3
+
+    # Upsert cargo items on (container, master bill, house bill, cargo type) instead of inserting duplicates
+    CARGO_UPSERT_NATURAL_KEY: bool = False
+
+    # Monthly collection buckets for cargo_items and edi_messages, e.g. cargo_items_2026_10
+    PARTITION_BY_MONTH: bool = False
+    PARTITION_RETENTION_MONTHS: int = 24  # Whole months kept before a bucket is archived and dropped
+    PARTITION_ARCHIVE_DIR: str = "archive"
+
+    # Spool directory ingestion settings
+    SPOOL_DIR: Optional[str] = None  # Unset disables the spool watcher in this process
+    SPOOL_WORKERS: int = 4
+    SPOOL_PATTERN: str = "*.edi"
+    SPOOL_POLL_INTERVAL_SECONDS: float = 1.0
+    SPOOL_SETTLE_SECONDS: float = 2.0  # Files modified more recently may still be uploading
+    SPOOL_CLAIM_TIMEOUT_SECONDS: float = 600.0  # Claimed files untouched this long are requeued
+
+    # Batch decode settings
+    BATCH_DECODE_MAX_DOCUMENTS: int = 1000
+    BATCH_DECODE_CONCURRENCY: int = 8
+
+    # Asynchronous decode job settings
+    DECODE_JOB_WORKERS: int = 2  # 0 disables the background workers in this process
+    DECODE_JOB_POLL_INTERVAL_SECONDS: float = 2.0
+    DECODE_JOB_LEASE_SECONDS: float = 60.0
+    DECODE_JOB_CHUNK_GROUPS: int = 1000
+    DECODE_JOB_MAX_ATTEMPTS: int = 5
+    DECODE_JOB_MAX_ERRORS: int = 1000
+    DECODE_JOB_MAX_PAYLOAD_BYTES: int = 200 * 1024 * 1024
+    DECODE_JOB_PAGE_SIZE: int = 100
+    DECODE_JOB_MAX_PAGE_SIZE: int = 1000
+
+    # Compression settings
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    MAX_DECOMPRESSED_REQUEST_SIZE: int = 100 * 1024 * 1024
+
+    # Admission control settings for the /edi endpoints
+    ADMISSION_LARGE_REQUEST_BYTES: int = 1024 * 1024
+    ADMISSION_SMALL_CONCURRENCY: int = 32
+    ADMISSION_LARGE_CONCURRENCY: int = 4
+    ADMISSION_MAX_QUEUE: int = 64
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 10.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 5
+
+    # Local outbox: decode and generate append their writes to a SQLite file that is replayed into MongoDB
+    OUTBOX_PATH: Optional[str] = None  # Unset writes straight to MongoDB
+    OUTBOX_DRAIN_INTERVAL_SECONDS: float = 0.5  # Pause once the outbox is empty or a replay failed
+    OUTBOX_DRAIN_BATCH_SIZE: int = 500  # Records per replay pass
+    OUTBOX_DRAIN_LEASE_SECONDS: float = 120.0  # One worker drains at a time; another takes over once this lapses
+    OUTBOX_MAX_ATTEMPTS: int = 5  # Replays a rejected record gets before it moves to the dead-letter table
+
+    # Database call resilience: per-request deadline, retries of transient errors and a circuit breaker
+    REQUEST_DEADLINE_SECONDS: Optional[float] = 60.0  # Budget for the database calls of a decode or generate request
+    DB_OPERATION_TIMEOUT_SECONDS: float = 30.0  # Per attempt, within the request deadline
+    DB_RETRY_ATTEMPTS: int = 3
+    DB_RETRY_BASE_DELAY_SECONDS: float = 0.05
+    DB_RETRY_MAX_DELAY_SECONDS: float = 1.0
+    DB_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive transient failures that open the breaker
+    DB_BREAKER_RESET_SECONDS: float = 30.0  # How long an open breaker fails fast before a trial call
+
+    # Idempotency-Key replay for /edi/decode and /edi/generate
+    IDEMPOTENCY_TTL_SECONDS: int = 86400  # How long a stored response is replayed to retries
+    IDEMPOTENCY_CACHE_SIZE: int = 256  # Responses kept in each process in front of MongoDB
+    IDEMPOTENCY_MAX_RESPONSE_BYTES: int = 8 * 1024 * 1024  # Larger responses are not stored
+    IDEMPOTENCY_LOCK_SECONDS: float = 300.0  # Claims of a worker that stopped are taken over after this
+    IDEMPOTENCY_POLL_INTERVAL_SECONDS: float = 0.5
+
+    # Health check settings
+    HEALTH_CHECK_INTERVAL_SECONDS: float = 15.0
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 2.0
+
     class Config:
         """Pydantic configuration class."""
 
@@ -18,4 +123,14 @@ class Settings(BaseSettings):
         env_file = ".env"
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Load application settings on first use."""
+    return Settings()
+
+
+def __getattr__(name: str) -> Any:
+    """Resolve ``settings`` lazily so importing this module does not read the environment."""
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,11 +1,20 @@
 from .cargo import ECargoType
+from .decode_job import EDecodeJobStatus
 from .edi import EEDISegmentType
 from .error_messages import EErrorMessage
+from .output_format import EOutputFormat
+from .response_view import EResponseView
+from .storage import EContentCodec, EContentStorage
 from .validation import VALID_ASCII_PATTERN
 
 __all__ = [
     "ECargoType",
+    "EContentCodec",
+    "EContentStorage",
+    "EDecodeJobStatus",
     "EEDISegmentType",
     "EErrorMessage",
+    "EOutputFormat",
+    "EResponseView",
     "VALID_ASCII_PATTERN",
 ]
@@ -0,0 +1,10 @@
+from enum import Enum
+
+
+class EDecodeJobStatus(str, Enum):
+    """Enum for asynchronous decode job statuses."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
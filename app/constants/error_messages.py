@@ -7,6 +7,7 @@ class EErrorMessage(str, Enum):
     """Error messages for EDI generation and validation."""
 
     NO_ITEMS = "No valid items found in the request"
+    TOO_MANY_DOCUMENTS = "Too many documents in batch: {} (maximum {})"
     INVALID_CARGO_TYPE = "Invalid cargo type"
     INVALID_PACKAGE_COUNT = "Number of packages must be greater than 0"
     ERR_ASCII_CHARS = "Only ASCII characters are allowed"
@@ -17,6 +18,42 @@ class EErrorMessage(str, Enum):
     UNKNOWN_ERROR = "An unknown error occurred"
     FAILED_TO_GENERATE_SEGMENT = "Failed to generate EDI segment for item {}: {}"
 
+    # Request body errors
+    UNSUPPORTED_CONTENT_ENCODING = "Unsupported content encoding: {}"
+    INVALID_COMPRESSED_BODY = "Invalid {} request body"
+    REQUEST_BODY_TOO_LARGE = "Decompressed request body exceeds {} bytes"
+    SERVER_OVERLOADED = "Server is overloaded, please retry later"
+    DATABASE_UNAVAILABLE = "Database is unavailable, please retry later"
+    DEADLINE_EXCEEDED = "Request deadline exceeded before the database responded"
+    IDEMPOTENCY_KEY_INVALID = "Idempotency-Key must be 1 to {} characters"
+    IDEMPOTENCY_KEY_REUSED = "Idempotency-Key was already used for a different request"
+
+    # Query errors
+    INVALID_CURSOR = "Invalid pagination cursor"
+    INVALID_FIELDS = "Unknown fields requested: {}"
+    CARGO_ITEM_NOT_FOUND = "Cargo item not found: {}"
+    MESSAGE_NOT_FOUND = "EDI message not found: {}"
+    INVALID_DATE_RANGE = "date_from must not be after date_to"
+    DATE_RANGE_TOO_LONG = "Date range spans more than {} days"
+    REGENERATE_SOURCE_REQUIRED = "Provide either a message_id or cargo item filters, not both"
+    AMENDMENT_VIEW_UNSUPPORTED = "Amendments return the differences only; view, fields and summary cannot be used"
+
+    # Decode job errors
+    JOB_NOT_FOUND = "Decode job not found: {}"
+    JOB_PAYLOAD_TOO_LARGE = "Decode job payload exceeds {} bytes"
+    JOB_ATTEMPTS_EXCEEDED = "Decode job exceeded the maximum number of attempts"
+
+    # Command-line errors
+    FAILED_TO_READ_FILE = "Failed to read {}: {}"
+    PARQUET_UNAVAILABLE = "Parquet output requires pyarrow to be installed"
+    PARQUET_REQUIRES_FILE = "Parquet output must be written to a file"
+    CANNOT_APPEND_PARQUET = "Cannot append to an existing Parquet file: {}"
+    UNSUPPORTED_STREAM_FORMAT = "Cannot stream {} output; use ndjson or csv"
+    UNSUPPORTED_INPUT_FORMAT = "Unsupported input format: {}"
+    INVALID_INPUT_ROW = "Invalid cargo item row: {}"
+    SPOOL_DIR_NOT_SET = "No spool directory given and SPOOL_DIR is not set"
+    STORE_REQUIRES_OUTPUT_FILE = "Storing the generated message requires an output file"
+
     # EDI Decoding specific errors
     INVALID_SEGMENT_TYPE = "Invalid segment type: {}"
     INVALID_NUMBER_FORMAT = "Invalid number format in package count: {}"
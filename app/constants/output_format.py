@@ -0,0 +1,11 @@
+"""Output format constants."""
+
+from enum import Enum
+
+
+class EOutputFormat(str, Enum):
+    """Tabular file formats for cargo items."""
+
+    NDJSON = "ndjson"
+    CSV = "csv"
+    PARQUET = "parquet"
@@ -0,0 +1,11 @@
+"""Response view constants."""
+
+from enum import Enum
+
+
+class EResponseView(str, Enum):
+    """How much of the stored cargo items decode and generate responses return."""
+
+    IDS = "ids"  # Only the IDs of the stored items
+    SUMMARY = "summary"  # Only the manifest totals
+    FULL = "full"  # Every item in full, or with the requested fields
@@ -0,0 +1,16 @@
+from enum import Enum
+
+
+class EContentStorage(str, Enum):
+    """Enum for where a stored message keeps its EDI content."""
+
+    INLINE = "inline"
+    COMPRESSED = "compressed"
+    GRIDFS = "gridfs"
+
+
+class EContentCodec(str, Enum):
+    """Enum for compression codecs of stored EDI content."""
+
+    ZSTD = "zstd"
+    ZLIB = "zlib"
@@ -1,29 +1,579 @@
 """Repository for cargo items collection operations."""
 
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime, timedelta
+from enum import Enum
+from functools import partial
+from typing import TYPE_CHECKING, Any, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.config import get_settings
 from app.constants.error_messages import EErrorMessage
+from app.db.cargo_stats_repository import (
+    CargoStatsRepository,
+    StatsDeltas,
+    add_delta,
+    count_documents,
+    new_deltas,
+)
 from app.db.database import get_database
+from app.db.partitions import (
+    as_utc,
+    collection_for_id,
+    object_id_at,
+    partitioned,
+    read_collections,
+    write_collection,
+)
+from app.db.resilience import DatabaseUnavailableError, call_database, insert_once
 from app.models.cargo_item import CargoItem
 
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorCollection
+
+COLLECTION = "cargo_items"
+
+# Stored fields that make up a cargo item, leaving out bookkeeping such as job_id
+_ITEM_FIELDS = {name: True for name in CargoItem.model_fields if name != "id"}
+
+# Identifier fields items can be looked up by; each has an index that also serves keyset pagination
+LOOKUP_FIELDS = ("container_number", "master_bill_of_lading_number", "house_bill_of_lading_number")
+
+# Fields identifying the same cargo item across amended and re-sent manifests
+NATURAL_KEY_FIELDS = (*LOOKUP_FIELDS, "cargo_type")
+
+_DUPLICATE_KEY = 11000
+
 
 class CargoRepository:
     """Repository for cargo items collection operations."""
 
     @staticmethod
-    async def create_cargo_items(cargo_items: list[CargoItem]) -> list[str]:
-        """Create multiple cargo items in database."""
-        db = get_database()
-        cargo_item_ids = []
-
-        for item in cargo_items:
-            try:
-                doc = item.model_dump(exclude_unset=True, exclude_none=True)
-                result = await db.cargo_items.insert_one(doc)
-                if not result.acknowledged:
-                    # If any insert fails, we should probably rollback previous inserts
-                    # TODO: Implement rollback mechanism
-                    raise Exception(EErrorMessage.FAILED_TO_STORE.value)
-                cargo_item_ids.append(str(result.inserted_id))
-            except Exception as e:
-                raise Exception(EErrorMessage.FAILED_TO_STORE.value) from e
-
-        return cargo_item_ids
+    def _collection(name: str = COLLECTION) -> "AsyncIOMotorCollection":
+        """Get the cargo items collection, or one of its monthly buckets."""
+        return get_database()[name]
+
+    @staticmethod
+    async def _create_indexes(name: str) -> None:
+        """Create the indexes used to look up and page through cargo items in one collection."""
+        collection = CargoRepository._collection(name)
+        await collection.create_index([("created_at", DESCENDING), ("_id", DESCENDING)])
+        for field in LOOKUP_FIELDS:
+            # Absent identifiers are not stored, so partial indexes skip items without them
+            await collection.create_index(
+                [(field, ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                partialFilterExpression={field: {"$exists": True}},
+            )
+        await collection.create_index([("job_id", ASCENDING), ("group_index", ASCENDING)], sparse=True)
+        # Only upserted items carry natural_key, so items inserted before upserts were enabled may repeat a key
+        await collection.create_index(
+            [(field, ASCENDING) for field in NATURAL_KEY_FIELDS],
+            unique=True,
+            partialFilterExpression={"natural_key": True},
+        )
+
+    @staticmethod
+    async def ensure_indexes() -> None:
+        """Create the indexes used to look up and page through cargo items, in every existing bucket."""
+        for name in await read_collections(COLLECTION):
+            await CargoRepository._create_indexes(name)
+            # Items stored before created_at was persisted take it from their ObjectId timestamp
+            await CargoRepository._collection(name).update_many(
+                {"created_at": None}, [{"$set": {"created_at": {"$toDate": "$_id"}}}]
+            )
+
+    @staticmethod
+    def _to_document(item: CargoItem) -> dict[str, Any]:
+        """Convert a cargo item to a database document, with its creation time in UTC."""
+        doc = item.model_dump(exclude={"id"}, exclude_none=True)
+        doc["created_at"] = as_utc(doc["created_at"]).astimezone(UTC)
+        return doc
+
+    @staticmethod
+    def _from_document(doc: dict[str, Any]) -> CargoItem:
+        """Convert a stored document back to a cargo item without re-validating it."""
+        fields = {name: doc[name] for name in CargoItem.model_fields if name in doc}
+        if "created_at" in fields:
+            fields["created_at"] = as_utc(fields["created_at"])  # MongoDB returns naive UTC datetimes
+        return CargoItem.model_construct(**fields, id=str(doc["_id"]))
+
+    @staticmethod
+    def _natural_key(doc: dict[str, Any]) -> tuple:
+        """Natural key values of a document, with absent identifiers as None."""
+        return tuple(value.value if isinstance(value, Enum) else value for value in map(doc.get, NATURAL_KEY_FIELDS))
+
+    @staticmethod
+    def _natural_key_filter(doc: dict[str, Any]) -> dict[str, Any]:
+        """
+        Match the stored item with the same natural key; absent identifiers must be absent there too.
+
+        Only items stored by an upsert are matched, so items inserted without one are never changed afterwards.
+        """
+        return {
+            **{field: doc[field] if field in doc else {"$exists": False} for field in NATURAL_KEY_FIELDS},
+            "natural_key": True,
+        }
+
+    @staticmethod
+    async def _buckets_by_natural_key(docs: list[dict[str, Any]]) -> dict[tuple, str]:
+        """
+        Buckets already holding an item with the natural key of one of the documents, by natural key.
+
+        Stored items keep their creation time, so a re-sent item can match one in any month's bucket.
+        """
+        buckets: dict[tuple, str] = {}
+        query = {"$or": [CargoRepository._natural_key_filter(doc) for doc in docs]}
+        for name in await read_collections(COLLECTION):
+            cursor = CargoRepository._collection(name).find(query, dict.fromkeys(NATURAL_KEY_FIELDS, True))
+            async for doc in cursor:
+                buckets.setdefault(CargoRepository._natural_key(doc), name)
+        return buckets
+
+    @staticmethod
+    async def _upsert_documents(name: str, docs: list[dict[str, Any]]) -> list[ObjectId]:
+        """
+        Upsert documents by natural key with one ordered bulk write and return their IDs in order.
+
+        Existing items keep their ID and creation time and take the new values of the other fields.
+        """
+        now = datetime.now(UTC)
+        operations = []
+        for doc in docs:
+            on_insert = {"created_at": doc["created_at"], "natural_key": True}
+            if "_id" in doc:
+                on_insert["_id"] = doc["_id"]
+            values = {field: value for field, value in doc.items() if field not in (*NATURAL_KEY_FIELDS, *on_insert)}
+            operations.append(
+                UpdateOne(
+                    CargoRepository._natural_key_filter(doc),
+                    {"$set": {**values, "updated_at": now}, "$setOnInsert": on_insert},
+                    upsert=True,
+                )
+            )
+
+        collection = CargoRepository._collection(name)
+        try:
+            result = await collection.bulk_write(operations, ordered=True)
+        except BulkWriteError as e:
+            if any(error["code"] != _DUPLICATE_KEY for error in e.details["writeErrors"]):
+                raise
+            # A concurrent writer inserted one of the keys first; every key exists now, so the retry only updates
+            result = await collection.bulk_write(operations, ordered=True)
+
+        ids: dict[int, ObjectId] = dict(result.upserted_ids)
+        matched = [index for index in range(len(docs)) if index not in ids]
+        if matched:
+            # Updated items did not report their IDs, so look them all up with one query
+            cursor = collection.find(
+                {"$or": [CargoRepository._natural_key_filter(docs[index]) for index in matched]},
+                dict.fromkeys(NATURAL_KEY_FIELDS, True),
+            )
+            existing = {CargoRepository._natural_key(doc): doc["_id"] async for doc in cursor}
+            ids.update((index, existing[CargoRepository._natural_key(docs[index])]) for index in matched)
+        return [ids[index] for index in range(len(docs))]
+
+    @staticmethod
+    async def _insert_documents(docs: list[dict[str, Any]], upsert: bool = False) -> list[str]:
+        """
+        Insert documents with one bulk write per collection and return their IDs in order.
+
+        With ``upsert``, documents with a natural key replace the stored item with the same key instead.
+        """
+        if not docs:
+            return []
+
+        if not partitioned():
+            grouped = {COLLECTION: docs}
+        else:
+            stored_buckets: dict[tuple, str] = {}
+            keyed = [doc for doc in docs if upsert and any(field in doc for field in LOOKUP_FIELDS)]
+            if keyed:
+                # Upserts go to the bucket already holding their key, whichever month that is
+                stored_buckets = await call_database(
+                    partial(CargoRepository._buckets_by_natural_key, keyed), "find_cargo_items"
+                )
+            # IDs carry the creation time, so each item can later be found in its month's bucket by ID alone
+            grouped = defaultdict(list)
+            for doc in docs:
+                name = stored_buckets.get(CargoRepository._natural_key(doc)) if stored_buckets else None
+                if name is None:
+                    doc.setdefault("_id", object_id_at(doc["created_at"]))
+                    name = await write_collection(COLLECTION, doc["created_at"], CargoRepository._create_indexes)
+                grouped[name].append(doc)
+
+        inserted_ids = {}
+        deltas = new_deltas()
+        try:
+            for name, bucket_docs in grouped.items():
+                # Items without any identifier have nothing to be matched on, so they are always inserted
+                keyed, unkeyed = [], []
+                for doc in bucket_docs:
+                    (keyed if upsert and any(field in doc for field in LOOKUP_FIELDS) else unkeyed).append(doc)
+                if keyed:
+                    # Read the matching items first, so the statistics move by the change in their package counts
+                    stored = await call_database(
+                        partial(CargoRepository._stored_by_natural_key, name, keyed), "find_cargo_items"
+                    )
+                    # Upserts by natural key converge to the same state however often they are repeated
+                    upserted_ids = await call_database(
+                        partial(CargoRepository._upsert_documents, name, keyed), "upsert_cargo_items"
+                    )
+                    inserted_ids.update((id(doc), upserted_id) for doc, upserted_id in zip(keyed, upserted_ids))
+                    CargoRepository._count_upserts(deltas, keyed, stored)
+                if unkeyed:
+                    # IDs are assigned up front, so a retried insert skips the items an earlier attempt wrote
+                    for doc in unkeyed:
+                        doc.setdefault("_id", ObjectId())
+                    existing = await CargoRepository._insert_new(name, unkeyed)
+                    inserted_ids.update((id(doc), doc["_id"]) for doc in unkeyed)
+                    for doc in unkeyed:
+                        if doc["_id"] not in existing:
+                            add_delta(deltas, doc["created_at"], doc["cargo_type"], 1, doc["number_of_packages"])
+        except DatabaseUnavailableError:
+            raise
+        except Exception as e:
+            raise Exception(EErrorMessage.FAILED_TO_STORE.value) from e
+        await CargoStatsRepository.try_apply(deltas)
+        return [str(inserted_ids[id(doc)]) for doc in docs]
+
+    @staticmethod
+    async def _insert_new(name: str, docs: list[dict[str, Any]]) -> set[ObjectId]:
+        """
+        Insert documents carrying their IDs, skipping those already stored.
+
+        Returns:
+            IDs of the documents that were stored before this call, e.g. by an earlier replay of the same write
+        """
+        existing: set[ObjectId] = set()
+        attempts = 0
+
+        async def attempt() -> bool:
+            nonlocal attempts
+            attempts += 1
+            # Duplicates seen by a retry may be what the failed attempt wrote, so only the first attempt's count
+            return await insert_once(CargoRepository._collection(name), docs, existing if attempts == 1 else None)
+
+        if not await call_database(attempt, "insert_cargo_items"):
+            raise Exception(EErrorMessage.FAILED_TO_STORE.value)
+        return existing
+
+    @staticmethod
+    async def _stored_by_natural_key(name: str, docs: list[dict[str, Any]]) -> dict[tuple, dict[str, Any]]:
+        """Stored items with the natural key of one of the documents, by natural key."""
+        cursor = CargoRepository._collection(name).find(
+            {"$or": [CargoRepository._natural_key_filter(doc) for doc in docs]},
+            {**dict.fromkeys(NATURAL_KEY_FIELDS, True), "number_of_packages": True, "created_at": True},
+        )
+        return {CargoRepository._natural_key(doc): doc async for doc in cursor}
+
+    @staticmethod
+    def _count_upserts(deltas: StatsDeltas, docs: list[dict[str, Any]], stored: dict[tuple, dict[str, Any]]) -> None:
+        """
+        Count upserted documents: new keys add an item, matched keys only change the package count.
+
+        Matched items keep their creation time, so their change is counted on the day they were first stored.
+        """
+        stored = dict(stored)
+        for doc in docs:
+            key = CargoRepository._natural_key(doc)
+            previous = stored.get(key)
+            if previous is None:
+                add_delta(deltas, doc["created_at"], doc["cargo_type"], 1, doc["number_of_packages"])
+                stored[key] = doc
+            else:
+                change = doc["number_of_packages"] - previous["number_of_packages"]
+                add_delta(deltas, previous["created_at"], doc["cargo_type"], 0, change)
+                stored[key] = {**previous, "number_of_packages": doc["number_of_packages"]}
+
+    @staticmethod
+    def upserts_natural_keys() -> bool:
+        """Whether created items are upserted by natural key rather than always inserted."""
+        return get_settings().CARGO_UPSERT_NATURAL_KEY
+
+    @staticmethod
+    async def create_cargo_items(cargo_items: list[CargoItem], upsert: Optional[bool] = None) -> list[str]:
+        """
+        Create multiple cargo items in database with a single bulk write.
+
+        With ``upsert``, an item whose container, master and house bill numbers and cargo type match a stored item
+        updates that item and returns its ID instead of creating a duplicate. It defaults to
+        ``CARGO_UPSERT_NATURAL_KEY``.
+        """
+        if upsert is None:
+            upsert = CargoRepository.upserts_natural_keys()
+        return await CargoRepository._insert_documents(
+            [CargoRepository._to_document(item) for item in cargo_items], upsert=upsert
+        )
+
+    @staticmethod
+    async def store_cargo_items(cargo_items: list[CargoItem]) -> list[str]:
+        """
+        Store cargo items under the IDs they already carry, with a single bulk write.
+
+        Items stored before are skipped, so a bulk load can be repeated after a crash without duplicating them.
+        With ``CARGO_UPSERT_NATURAL_KEY``, an item matching a stored item updates it and returns its ID instead.
+        """
+        docs = [{**CargoRepository._to_document(item), "_id": ObjectId(item.id)} for item in cargo_items]
+        return await CargoRepository._insert_documents(docs, upsert=CargoRepository.upserts_natural_keys())
+
+    @staticmethod
+    async def get_cargo_item(cargo_item_id: str) -> Optional[CargoItem]:
+        """Get a cargo item by ID, or None if it does not exist."""
+        try:
+            object_id = ObjectId(cargo_item_id)
+        except InvalidId:
+            return None
+
+        collection = CargoRepository._collection(collection_for_id(COLLECTION, object_id))
+        doc = await call_database(partial(collection.find_one, {"_id": object_id}), "get_cargo_item")
+        return CargoRepository._from_document(doc) if doc else None
+
+    @staticmethod
+    def _filter_query(
+        filters: dict[str, str], created_from: Optional[datetime], created_to: Optional[datetime]
+    ) -> dict[str, Any]:
+        """Build a query from lookup field values and a creation time range."""
+        query: dict[str, Any] = dict(filters)
+        if created_from or created_to:
+            query["created_at"] = {}
+            if created_from:
+                query["created_at"]["$gte"] = created_from
+            if created_to:
+                query["created_at"]["$lt"] = created_to
+        return query
+
+    @staticmethod
+    async def iter_cargo_item_documents(
+        filters: dict[str, str],
+        batch_size: int,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        fields: Optional[list[str]] = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """
+        Stream matching cargo item documents, oldest first, in batches of at most batch_size.
+
+        Each batch is one server round trip of the cursor, so memory use does not depend on the result size.
+
+        Args:
+            filters: Exact values for lookup fields
+            batch_size: Documents per batch and per cursor round trip
+            created_from: Only items created at or after this time
+            created_to: Only items created before this time
+            fields: Fields to return, or None for all stored cargo item fields
+        """
+        query = CargoRepository._filter_query(filters, created_from, created_to)
+        projection = dict.fromkeys(fields, True) if fields else _ITEM_FIELDS
+        batch = []
+        for name in await read_collections(COLLECTION, created_from, created_to):
+            cursor = (
+                CargoRepository._collection(name)
+                .find(query, projection)
+                .sort([("created_at", ASCENDING), ("_id", ASCENDING)])
+                .batch_size(batch_size)
+            )
+            async for doc in cursor:
+                batch.append(doc)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    async def iter_cargo_items(
+        filters: dict[str, str],
+        batch_size: int,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ) -> AsyncIterator[list[CargoItem]]:
+        """Stream matching cargo items, oldest first, in batches of at most batch_size."""
+        async for docs in CargoRepository.iter_cargo_item_documents(filters, batch_size, created_from, created_to):
+            yield [CargoRepository._from_document(doc) for doc in docs]
+
+    @staticmethod
+    async def iter_cargo_items_by_ids(cargo_item_ids: list[str], batch_size: int) -> AsyncIterator[list[CargoItem]]:
+        """Stream cargo items in the order of cargo_item_ids, fetching each batch with one ``$in`` query."""
+        for start in range(0, len(cargo_item_ids), batch_size):
+            docs = await CargoRepository.find_cargo_items_by_ids(
+                cargo_item_ids[start : start + batch_size], list(_ITEM_FIELDS)
+            )
+            if docs:
+                yield [CargoRepository._from_document(doc) for doc in docs]
+
+    @staticmethod
+    async def find_cargo_items_by_ids(
+        cargo_item_ids: list[str], fields: Optional[list[str]] = None
+    ) -> list[dict[str, Any]]:
+        """
+        Get cargo items with a single ``$in`` query.
+
+        Args:
+            cargo_item_ids: IDs of the items, e.g. a stored message's ``cargo_item_ids``
+            fields: Fields to return, or None for all fields
+
+        Returns:
+            Raw documents in the order of cargo_item_ids; missing items are skipped
+        """
+        object_ids = [ObjectId(item_id) for item_id in cargo_item_ids if ObjectId.is_valid(item_id)]
+        if not object_ids:
+            return []
+
+        grouped = defaultdict(list)
+        for object_id in object_ids:
+            grouped[collection_for_id(COLLECTION, object_id)].append(object_id)
+
+        # Whether an item can still change decides how long its representation can be cached
+        projection = {**dict.fromkeys(fields, True), "natural_key": True, "updated_at": True} if fields else None
+        docs = {}
+        for name, bucket_ids in grouped.items():
+            cursor = CargoRepository._collection(name).find({"_id": {"$in": bucket_ids}}, projection)
+            docs.update({doc["_id"]: doc async for doc in cursor})
+        return [docs[object_id] for object_id in object_ids if object_id in docs]
+
+    @staticmethod
+    async def search_cargo_items(
+        filters: dict[str, str],
+        limit: int,
+        after: Optional[tuple[datetime, ObjectId]] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        fields: Optional[list[str]] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Get a page of cargo items, newest first.
+
+        Args:
+            filters: Exact values for lookup fields
+            limit: Maximum number of items
+            after: (created_at, _id) of the last item on the previous page
+            created_from: Only items created at or after this time
+            created_to: Only items created before this time
+            fields: Fields to return; ``_id`` and ``created_at`` are always included for paging
+
+        Returns:
+            Raw documents, projected to the requested fields
+        """
+        query = CargoRepository._filter_query(filters, created_from, created_to)
+        newest = created_to
+        if after is not None:
+            created_at, last_id = after
+            query["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": last_id}},
+            ]
+            # Buckets newer than the last item on the previous page cannot hold the rest of the results
+            page_end = created_at + timedelta(milliseconds=1)
+            newest = page_end if created_to is None else min(as_utc(created_to), page_end)
+
+        projection = {field: True for field in (*fields, "created_at")} if fields else None
+
+        async def page(name: str, length: int) -> list[dict[str, Any]]:
+            # A fresh cursor for every attempt
+            cursor = (
+                CargoRepository._collection(name)
+                .find(query, projection)
+                .sort([("created_at", DESCENDING), ("_id", DESCENDING)])
+                .limit(length)
+            )
+            return await cursor.to_list(length=length)
+
+        docs = []
+        for name in await read_collections(COLLECTION, created_from, newest, newest_first=True):
+            docs.extend(await call_database(partial(page, name, limit - len(docs)), "search_cargo_items"))
+            if len(docs) >= limit:
+                break
+        return docs
+
+    @staticmethod
+    async def _delete_documents(name: str, query: dict[str, Any]) -> int:
+        """Delete the items matching a query from one collection and take them out of the statistics."""
+        collection = CargoRepository._collection(name)
+
+        async def find() -> list[dict[str, Any]]:
+            # A fresh cursor for every attempt
+            projection = {"cargo_type": True, "number_of_packages": True, "created_at": True}
+            return await collection.find(query, projection).to_list(None)
+
+        docs = await call_database(find, "find_cargo_items")
+        if not docs:
+            return 0
+        # Deleting by ID is safe to repeat, and only the items found are taken out of the statistics
+        result = await call_database(
+            partial(collection.delete_many, {"_id": {"$in": [doc["_id"] for doc in docs]}}), "delete_cargo_items"
+        )
+        await CargoStatsRepository.try_apply(count_documents(docs, sign=-1))
+        return result.deleted_count
+
+    @staticmethod
+    async def delete_cargo_items(cargo_item_ids: list[str]) -> int:
+        """Delete cargo items by ID."""
+        grouped = defaultdict(list)
+        for item_id in cargo_item_ids:
+            object_id = ObjectId(item_id)
+            grouped[collection_for_id(COLLECTION, object_id)].append(object_id)
+
+        deleted = 0
+        for name, object_ids in grouped.items():
+            deleted += await CargoRepository._delete_documents(name, {"_id": {"$in": object_ids}})
+        return deleted
+
+    @staticmethod
+    async def create_job_cargo_items(job_id: str, cargo_items: list[tuple[int, CargoItem]]) -> list[str]:
+        """
+        Create cargo items decoded by an asynchronous job.
+
+        Args:
+            job_id: The decode job the items belong to
+            cargo_items: (LIN group index, cargo item) pairs
+
+        Returns:
+            IDs of the created items
+        """
+        return await CargoRepository._insert_documents(
+            [
+                {**CargoRepository._to_document(item), "job_id": job_id, "group_index": group_index}
+                for group_index, item in cargo_items
+            ]
+        )
+
+    @staticmethod
+    async def delete_job_cargo_items(job_id: str, from_group_index: int) -> int:
+        """Delete a job's items from the given LIN group index onwards, e.g. an uncommitted chunk."""
+        deleted = 0
+        for name in await read_collections(COLLECTION):
+            deleted += await CargoRepository._delete_documents(
+                name, {"job_id": job_id, "group_index": {"$gte": from_group_index}}
+            )
+        return deleted
+
+    @staticmethod
+    async def find_job_cargo_items(job_id: str, after_group_index: int, limit: int) -> list[tuple[int, CargoItem]]:
+        """
+        Get a page of a job's items in document order.
+
+        Args:
+            job_id: The decode job
+            after_group_index: Only return items from LIN groups after this index
+            limit: Maximum number of items
+
+        Returns:
+            (LIN group index, cargo item) pairs
+        """
+        docs = []
+        # A job running across a month boundary has items in two buckets, so merge each bucket's first page
+        for name in await read_collections(COLLECTION):
+            cursor = (
+                CargoRepository._collection(name)
+                .find({"job_id": job_id, "group_index": {"$gt": after_group_index}})
+                .sort("group_index", ASCENDING)
+                .limit(limit)
+            )
+            docs.extend(await cursor.to_list(length=limit))
+        docs.sort(key=lambda doc: doc["group_index"])
+        return [(doc["group_index"], CargoRepository._from_document(doc)) for doc in docs[:limit]]
@@ -0,0 +1,123 @@
+"""Repository for daily cargo statistics rollups."""
+
+import asyncio
+from collections import defaultdict
+from datetime import UTC, date, datetime
+from enum import Enum
+from typing import Any, Optional
+
+from pymongo import ASCENDING, UpdateOne
+
+from app.config import get_settings
+from app.db.database import get_database
+from app.db.partitions import as_utc
+from app.utils.metrics import registry
+
+COLLECTION = "cargo_stats"
+
+CARGO_STATS_FAILURES = registry.counter(
+    "edi_cargo_stats_update_failures_total", "Cargo statistics updates given up on after the items were written"
+)
+
+# Item and package count changes by (day, cargo type)
+StatsDeltas = defaultdict[tuple[date, str], list[int]]
+
+
+def new_deltas() -> StatsDeltas:
+    """Empty set of count changes."""
+    return defaultdict(lambda: [0, 0])
+
+
+def add_delta(deltas: StatsDeltas, created_at: datetime, cargo_type: Any, items: int, packages: int) -> None:
+    """Count ``items`` and ``packages`` on the UTC day an item was created."""
+    key = (as_utc(created_at).date(), cargo_type.value if isinstance(cargo_type, Enum) else cargo_type)
+    deltas[key][0] += items
+    deltas[key][1] += packages
+
+
+def count_documents(docs: list[dict[str, Any]], sign: int = 1) -> StatsDeltas:
+    """Count changes from storing (``sign=1``) or deleting (``sign=-1``) cargo item documents."""
+    deltas = new_deltas()
+    for doc in docs:
+        add_delta(deltas, doc["created_at"], doc["cargo_type"], sign, sign * doc["number_of_packages"])
+    return deltas
+
+
+class CargoStatsRepository:
+    """
+    Repository for the ``cargo_stats`` collection.
+
+    It holds one document per day and cargo type with the number of stored items and their packages. The cargo
+    repository updates them with ``$inc`` whenever it writes or deletes items, so reading the statistics of a date
+    range costs one document per day and cargo type, however many items there are.
+
+    The rollups are a separate collection, so they cannot share the items' bulk write; they are updated right
+    after it, once and best effort. A ``$inc`` is not safe to repeat, so a failed update is logged and counted
+    rather than retried, and it never fails the item write. The counts are meant for reporting, not as a source
+    of truth.
+    """
+
+    @staticmethod
+    def _collection():
+        """Get the statistics collection."""
+        return get_database()[COLLECTION]
+
+    @staticmethod
+    async def ensure_indexes() -> None:
+        """Create the index used to read a date range."""
+        await CargoStatsRepository._collection().create_index([("day", ASCENDING), ("cargo_type", ASCENDING)])
+
+    @staticmethod
+    async def apply(deltas: StatsDeltas) -> None:
+        """Apply count changes with one unordered bulk write of ``$inc`` upserts."""
+        now = datetime.now(UTC)
+        operations = [
+            UpdateOne(
+                {"_id": f"{day.isoformat()}:{cargo_type}"},
+                {
+                    "$inc": {"items": items, "packages": packages},
+                    "$set": {"updated_at": now},
+                    "$setOnInsert": {
+                        "day": datetime(day.year, day.month, day.day, tzinfo=UTC),
+                        "cargo_type": cargo_type,
+                    },
+                },
+                upsert=True,
+            )
+            for (day, cargo_type), (items, packages) in deltas.items()
+            if items or packages
+        ]
+        if operations:
+            await CargoStatsRepository._collection().bulk_write(operations, ordered=False)
+
+    @staticmethod
+    async def try_apply(deltas: StatsDeltas) -> None:
+        """Apply count changes once within the database operation timeout, logging a failure instead of raising."""
+        try:
+            await asyncio.wait_for(CargoStatsRepository.apply(deltas), get_settings().DB_OPERATION_TIMEOUT_SECONDS)
+        except Exception as e:
+            CARGO_STATS_FAILURES.inc()
+            print(f"❌ Failed to update cargo statistics, the rollups are off by these changes: {dict(deltas)}: {e}")
+
+    @staticmethod
+    async def get_daily_stats(start: date, end: date, cargo_type: Optional[str] = None) -> list[dict[str, Any]]:
+        """
+        Get the rollups of the days from ``start`` to ``end`` inclusive, ordered by day and cargo type.
+
+        Returns:
+            Documents with ``day``, ``cargo_type``, ``items`` and ``packages``; days without items are left out
+        """
+        query: dict[str, Any] = {
+            "day": {
+                "$gte": datetime(start.year, start.month, start.day, tzinfo=UTC),
+                "$lte": datetime(end.year, end.month, end.day, tzinfo=UTC),
+            }
+        }
+        if cargo_type is not None:
+            query["cargo_type"] = cargo_type
+        cursor = (
+            CargoStatsRepository._collection()
+            .find(query, {"_id": False, "day": True, "cargo_type": True, "items": True, "packages": True})
+            .sort([("day", ASCENDING), ("cargo_type", ASCENDING)])
+        )
+        return [{**doc, "day": doc["day"].date()} async for doc in cursor]
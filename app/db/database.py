@@ -1,30 +1,48 @@
 import sys
-from typing import cast
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
 
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from pymongo.errors import ConnectionFailure
-from pymongo.server_api import ServerApi
+from app.config import get_settings
 
-from app.config import settings
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 
-# Create a new client and connect to the server
-client = AsyncIOMotorClient(settings.MONGODB_URI, server_api=ServerApi("1"))
-
-# Get the database
 _is_test = "pytest" in sys.modules
-db = client[settings.MONGODB_DB_NAME + "_test" if _is_test else settings.MONGODB_DB_NAME]
+
+
+@lru_cache
+def get_client() -> "AsyncIOMotorClient":
+    """Create the MongoDB client on first use."""
+    # Motor and PyMongo are imported here so that importing the app does not pay for them
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from pymongo.server_api import ServerApi
+
+    return AsyncIOMotorClient(get_settings().MONGODB_URI, server_api=ServerApi("1"))
 
 
 async def connect_to_mongo() -> None:
     """Connect to MongoDB."""
+    from pymongo.errors import ConnectionFailure
+
     try:
-        await client.admin.command("ping")
+        await get_client().admin.command("ping")
         print("✅ MongoDB connection successful!")
     except ConnectionFailure as e:
         print("❌ MongoDB connection failed!")
         raise ConnectionFailure("Failed to connect to MongoDB") from e
 
 
-def get_database() -> AsyncIOMotorDatabase:
+@lru_cache
+def get_database() -> "AsyncIOMotorDatabase":
     """Get database instance."""
-    return cast(AsyncIOMotorDatabase, db)
+    db_name = get_settings().MONGODB_DB_NAME
+    return get_client()[db_name + "_test" if _is_test else db_name]
+
+
+def __getattr__(name: str) -> Any:
+    """Keep ``client`` and ``db`` importable without creating the client at import time."""
+    if name == "client":
+        return get_client()
+    if name == "db":
+        return get_database()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,174 @@
+"""Repository for asynchronous decode jobs and their payloads."""
+
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime, timedelta
+from typing import Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from pymongo import ASCENDING, ReturnDocument
+
+from app.constants.decode_job import EDecodeJobStatus
+from app.constants.error_messages import EErrorMessage
+from app.db.database import get_database
+from app.models.decode_job import DecodeJob
+from app.models.responses import ProcessingError
+
+PAYLOAD_BUCKET = "edi_job_payloads"
+
+
+class DecodeJobRepository:
+    """Repository for decode jobs collection operations."""
+
+    @staticmethod
+    def _payloads() -> AsyncIOMotorGridFSBucket:
+        """Get the GridFS bucket holding job payloads."""
+        return AsyncIOMotorGridFSBucket(get_database(), bucket_name=PAYLOAD_BUCKET)
+
+    @staticmethod
+    async def ensure_indexes() -> None:
+        """Create the indexes used to claim jobs; the index paging through their items belongs to the cargo items."""
+        db = get_database()
+        await db.edi_decode_jobs.create_index([("status", ASCENDING), ("created_at", ASCENDING)])
+        await db.edi_decode_jobs.create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)])
+
+    @staticmethod
+    async def create_job(chunks: AsyncIterator[bytes]) -> DecodeJob:
+        """
+        Stream a payload into GridFS and create a pending job for it.
+
+        Args:
+            chunks: The EDI document as a stream of byte chunks
+
+        Returns:
+            The created job
+        """
+        job = DecodeJob()
+        grid_in = DecodeJobRepository._payloads().open_upload_stream_with_id(ObjectId(job.id), f"{job.id}.edi")
+        try:
+            async for chunk in chunks:
+                job.payload_size += len(chunk)
+                await grid_in.write(chunk)
+            if not job.payload_size:
+                raise ValueError(EErrorMessage.EMPTY_EDI_CONTENT.value)
+            await grid_in.close()
+        except BaseException:
+            await grid_in.abort()
+            raise
+
+        db = get_database()
+        await db.edi_decode_jobs.insert_one(job.model_dump(by_alias=True))
+        return job
+
+    @staticmethod
+    async def get_job(job_id: str) -> Optional[DecodeJob]:
+        """Get a job by ID."""
+        db = get_database()
+        doc = await db.edi_decode_jobs.find_one({"_id": job_id})
+        return DecodeJob.model_validate(doc) if doc else None
+
+    @staticmethod
+    async def load_payload(job_id: str) -> bytes:
+        """Read a job's payload from GridFS."""
+        grid_out = await DecodeJobRepository._payloads().open_download_stream(ObjectId(job_id))
+        return await grid_out.read()
+
+    @staticmethod
+    async def claim_job(worker_id: str, lease_seconds: float) -> Optional[DecodeJob]:
+        """
+        Claim the oldest pending job, or a running job whose worker stopped renewing its lease.
+
+        Args:
+            worker_id: Identifier of the claiming worker
+            lease_seconds: How long the claim is valid without progress
+
+        Returns:
+            The claimed job, or None if there is nothing to do
+        """
+        now = datetime.now(UTC)
+        db = get_database()
+        doc = await db.edi_decode_jobs.find_one_and_update(
+            {
+                "$or": [
+                    {"status": EDecodeJobStatus.PENDING.value},
+                    {"status": EDecodeJobStatus.RUNNING.value, "lease_expires_at": {"$lt": now}},
+                ]
+            },
+            {
+                "$set": {
+                    "status": EDecodeJobStatus.RUNNING.value,
+                    "worker_id": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+        return DecodeJob.model_validate(doc) if doc else None
+
+    @staticmethod
+    async def set_total_groups(job_id: str, worker_id: str, total_groups: int) -> None:
+        """Record the number of LIN groups in a job's document."""
+        db = get_database()
+        await db.edi_decode_jobs.update_one(
+            {"_id": job_id, "worker_id": worker_id}, {"$set": {"total_groups": total_groups}}
+        )
+
+    @staticmethod
+    async def commit_progress(
+        job_id: str,
+        worker_id: str,
+        processed_groups: int,
+        cargo_item_count: int,
+        errors: list[ProcessingError],
+        lease_seconds: float,
+        max_errors: int,
+    ) -> bool:
+        """
+        Commit a processed chunk of groups and renew the lease.
+
+        Returns:
+            False if the worker no longer holds the job
+        """
+        update: dict = {
+            "$set": {
+                "processed_groups": processed_groups,
+                "lease_expires_at": datetime.now(UTC) + timedelta(seconds=lease_seconds),
+            },
+            "$inc": {"cargo_item_count": cargo_item_count, "error_count": len(errors)},
+        }
+        if errors:
+            update["$push"] = {"errors": {"$each": [error.model_dump() for error in errors], "$slice": max_errors}}
+
+        db = get_database()
+        result = await db.edi_decode_jobs.update_one(
+            {"_id": job_id, "worker_id": worker_id, "status": EDecodeJobStatus.RUNNING.value}, update
+        )
+        return result.matched_count == 1
+
+    @staticmethod
+    async def release_job(job_id: str, worker_id: str) -> None:
+        """Give up a job's lease so another worker can resume it right away."""
+        db = get_database()
+        await db.edi_decode_jobs.update_one(
+            {"_id": job_id, "worker_id": worker_id, "status": EDecodeJobStatus.RUNNING.value},
+            {"$set": {"lease_expires_at": datetime.now(UTC)}},
+        )
+
+    @staticmethod
+    async def finish_job(job_id: str, worker_id: str, error: Optional[ProcessingError] = None) -> None:
+        """Mark a job completed, or failed if an error is given."""
+        update: dict = {
+            "$set": {
+                "status": (EDecodeJobStatus.FAILED if error else EDecodeJobStatus.COMPLETED).value,
+                "completed_at": datetime.now(UTC),
+                "lease_expires_at": None,
+            }
+        }
+        if error:
+            update["$push"] = {"errors": error.model_dump()}
+            update["$inc"] = {"error_count": 1}
+
+        db = get_database()
+        await db.edi_decode_jobs.update_one({"_id": job_id, "worker_id": worker_id}, update)
@@ -1,21 +1,213 @@
+import asyncio
+import hashlib
+from collections import defaultdict
 from datetime import UTC, datetime
+from functools import partial
+from typing import TYPE_CHECKING, Any, Optional
 
+from bson import Binary, ObjectId
+from bson.errors import InvalidId
+
+from app.config import get_settings
+from app.constants import EContentCodec, EContentStorage
 from app.constants.error_messages import EErrorMessage
 from app.db.database import get_database
+from app.db.partitions import collection_for_id, read_collections, write_collection
+from app.db.resilience import call_database, insert_once
 from app.models.edi_message import EDIMessage
+from app.utils.content_codec import compress_content, decompress_content
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorGridFSBucket
+
+COLLECTION = "edi_messages"
+
+# Fields that hold a message's content in one of its storage forms
+_CONTENT_FIELDS = {"edi_content": True, "content_codec": True, "content_data": True, "content_file_id": True}
 
 
 class EDIRepository:
     """Repository for EDI messages collection operations."""
 
     @staticmethod
-    async def store_edi_message(edi_content: str, cargo_item_ids: list[str]) -> bool:
+    def _collection(name: str = COLLECTION) -> "AsyncIOMotorCollection":
+        """Get the EDI messages collection, or one of its monthly buckets."""
+        return get_database()[name]
+
+    @staticmethod
+    def _collection_for(object_id: ObjectId) -> "AsyncIOMotorCollection":
+        """Get the collection holding the message with this ID."""
+        return EDIRepository._collection(collection_for_id(COLLECTION, object_id))
+
+    @staticmethod
+    async def _create_indexes(name: str) -> None:
+        """Create the index used to find the messages a cargo item came from in one collection."""
+        await EDIRepository._collection(name).create_index("cargo_item_ids")
+
+    @staticmethod
+    async def ensure_indexes() -> None:
+        """Create the index used to find the messages a cargo item came from, in every existing bucket."""
+        for name in await read_collections(COLLECTION):
+            await EDIRepository._create_indexes(name)
+
+    @staticmethod
+    def _content_bucket() -> "AsyncIOMotorGridFSBucket":
+        """GridFS bucket holding the content of the largest messages."""
+        from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+        return AsyncIOMotorGridFSBucket(get_database(), bucket_name="edi_content")
+
+    @staticmethod
+    async def _to_document(message: EDIMessage) -> dict[str, Any]:
+        """
+        Convert a message to a database document, keyed by its ID.
+
+        Content is kept inline while small, zstd- or zlib-compressed as BSON binary above
+        ``EDI_CONTENT_COMPRESS_THRESHOLD_BYTES``, and moved to GridFS once the compressed size reaches
+        ``EDI_CONTENT_GRIDFS_THRESHOLD_BYTES``. Size and hash always stay inline. GridFS content stays in
+        ``content_data`` until ``_insert_documents`` uploads it, so building documents never leaves files behind.
+        """
+        settings = get_settings()
+        object_id = ObjectId(message.id)
+        # Content is ASCII, so its length in characters is its size; hashing and compressing content large enough
+        # to be compressed runs in a thread, so it does not stall other requests
+        if len(message.edi_content) < settings.EDI_CONTENT_COMPRESS_THRESHOLD_BYTES:
+            size, content_hash, compressed = EDIRepository._encode_content(message.edi_content, None, 0)
+        else:
+            size, content_hash, compressed = await asyncio.to_thread(
+                EDIRepository._encode_content,
+                message.edi_content,
+                settings.EDI_CONTENT_CODEC,
+                settings.EDI_CONTENT_COMPRESSION_LEVEL,
+            )
+        doc = {
+            "_id": object_id,
+            **message.model_dump(exclude={"id", "edi_content", "content_size", "content_hash"}, exclude_none=True),
+            "cargo_item_count": len(message.cargo_item_ids),
+            "content_size": size,
+            "content_hash": content_hash,
+        }
+        if compressed is None:
+            return {**doc, "content_storage": EContentStorage.INLINE.value, "edi_content": message.edi_content}
+
+        doc["content_codec"] = settings.EDI_CONTENT_CODEC.value
+        if len(compressed) < settings.EDI_CONTENT_GRIDFS_THRESHOLD_BYTES:
+            return {**doc, "content_storage": EContentStorage.COMPRESSED.value, "content_data": Binary(compressed)}
+        return {**doc, "content_storage": EContentStorage.GRIDFS.value, "content_data": compressed}
+
+    @staticmethod
+    def _encode_content(
+        edi_content: str, codec: Optional[EContentCodec], level: int
+    ) -> tuple[int, str, Optional[bytes]]:
+        """
+        Measure, hash and optionally compress message content.
+
+        Returns:
+            Tuple of the content's size in bytes, its SHA-256 hex digest and the compressed bytes, or None
+            without a codec
+        """
+        data = edi_content.encode()
+        compressed = compress_content(data, codec, level) if codec is not None else None
+        return len(data), hashlib.sha256(data).hexdigest(), compressed
+
+    @staticmethod
+    async def load_content_file(file_id: ObjectId) -> bytes:
+        """Read compressed content kept in GridFS."""
+        stream = await EDIRepository._content_bucket().open_download_stream(file_id)
+        return await stream.read()
+
+    @staticmethod
+    async def delete_content_file(file_id: ObjectId) -> None:
+        """Remove compressed content kept in GridFS."""
+        await EDIRepository._content_bucket().delete(file_id)
+
+    @staticmethod
+    async def _upload_content(doc: dict[str, Any]) -> None:
+        """Upload the content of a document bound for GridFS and refer to the file instead."""
+        if doc["content_storage"] != EContentStorage.GRIDFS.value or "content_data" not in doc:
+            return
+        # A failed upload removes the chunks it wrote, so each attempt starts over under a new file
+        doc["content_file_id"] = await call_database(
+            partial(EDIRepository._content_bucket().upload_from_stream, str(doc["_id"]), doc["content_data"]),
+            "upload_edi_content",
+        )
+        del doc["content_data"]
+
+    @staticmethod
+    async def _delete_content_files(docs: list[dict[str, Any]]) -> None:
+        """Remove the GridFS content of documents that were not stored after all."""
+        for doc in docs:
+            if "content_file_id" in doc:
+                await EDIRepository.delete_content_file(doc["content_file_id"])
+
+    @staticmethod
+    async def _read_content(doc: dict[str, Any]) -> str:
+        """Get the EDI content of a stored document, decompressing it if needed."""
+        if "edi_content" in doc:
+            return doc["edi_content"]
+        if "content_data" in doc:
+            data = bytes(doc["content_data"])
+        else:
+            data = await EDIRepository.load_content_file(doc["content_file_id"])
+        # Only content above the compression threshold gets here, so decompressing it is worth a thread
+        return await asyncio.to_thread(EDIRepository._decode_content, data, EContentCodec(doc["content_codec"]))
+
+    @staticmethod
+    def _decode_content(data: bytes, codec: EContentCodec) -> str:
+        """Decompress stored content back to text."""
+        return decompress_content(data, codec).decode()
+
+    @staticmethod
+    async def _insert_documents(docs: list[dict[str, Any]]) -> bool:
+        """Upload the GridFS content of message documents and insert them, removing the files again on failure."""
+        grouped = defaultdict(list)
+        for doc in docs:
+            # Message IDs are generated when the message is created, so their timestamp picks the bucket
+            name = await write_collection(COLLECTION, doc["_id"].generation_time, EDIRepository._create_indexes)
+            grouped[name].append(doc)
+
+        acknowledged, inserted = True, set()
+        try:
+            for doc in docs:
+                await EDIRepository._upload_content(doc)
+            for name, bucket_docs in grouped.items():
+                # Message IDs are assigned up front, so a retried insert skips the messages an earlier attempt wrote
+                acknowledged = acknowledged and await call_database(
+                    partial(insert_once, EDIRepository._collection(name), bucket_docs), "insert_edi_messages"
+                )
+                inserted.add(name)
+        except Exception:
+            await EDIRepository._delete_content_files(
+                [doc for name, bucket_docs in grouped.items() if name not in inserted for doc in bucket_docs]
+            )
+            raise
+        return acknowledged
+
+    @staticmethod
+    def _object_id(message_id: str) -> Optional[ObjectId]:
+        """Parse a message ID, or return None if it cannot exist."""
+        try:
+            return ObjectId(message_id)
+        except (InvalidId, TypeError):
+            return None
+
+    @staticmethod
+    async def store_edi_message(
+        edi_content: str,
+        cargo_item_ids: list[str],
+        message_id: Optional[str] = None,
+        group_hashes: Optional[list[str]] = None,
+        previous_message_id: Optional[str] = None,
+    ) -> bool:
         """
         Store EDI message in database.
 
         Args:
             edi_content: The EDI message content
             cargo_item_ids: List of related cargo item IDs
+            message_id: ID to store the message under, so the caller can refer to it; generated if omitted
+            group_hashes: Hash of the LIN group each cargo item was decoded from, so amendments can be matched
+            previous_message_id: ID of the message this one amends
 
         Returns:
             True if storage was successful, False otherwise
@@ -23,8 +215,126 @@ class EDIRepository:
         if not edi_content:
             raise ValueError(EErrorMessage.EMPTY_EDI_CONTENT.value)
 
-        edi_doc = EDIMessage(edi_content=edi_content, cargo_item_ids=cargo_item_ids, created_at=datetime.now(UTC))
+        edi_doc = EDIMessage(
+            edi_content=edi_content,
+            cargo_item_ids=cargo_item_ids,
+            created_at=datetime.now(UTC),
+            group_hashes=group_hashes,
+            previous_message_id=previous_message_id,
+        )
+        if message_id is not None:
+            edi_doc.id = message_id
+
+        return await EDIRepository._insert_documents([await EDIRepository._to_document(edi_doc)])
+
+    @staticmethod
+    async def store_edi_messages(
+        messages: list[tuple[str, list[str]]], message_ids: Optional[list[str]] = None
+    ) -> bool:
+        """
+        Store several EDI messages in database with a single bulk insert.
+
+        Args:
+            messages: (EDI message content, related cargo item IDs) pairs
+            message_ids: IDs to store the messages under, in order; generated if omitted. Messages already
+                stored under their ID are skipped, so the same messages can be stored again after a crash
+
+        Returns:
+            True if storage was successful, False otherwise
+        """
+        if not messages:
+            return True
+        if any(not edi_content for edi_content, _ in messages):
+            raise ValueError(EErrorMessage.EMPTY_EDI_CONTENT.value)
+
+        created_at = datetime.now(UTC)
+        edi_docs = []
+        for index, (edi_content, cargo_item_ids) in enumerate(messages):
+            message = EDIMessage(edi_content=edi_content, cargo_item_ids=cargo_item_ids, created_at=created_at)
+            if message_ids is not None:
+                message.id = message_ids[index]
+            edi_docs.append(await EDIRepository._to_document(message))
+        return await EDIRepository._insert_documents(edi_docs)
+
+    @staticmethod
+    async def get_edi_message(message_id: str) -> Optional[EDIMessage]:
+        """Get a stored message by ID, or None if it does not exist; compressed content is decompressed here."""
+        object_id = EDIRepository._object_id(message_id)
+        if object_id is None:
+            return None
+
+        doc = await call_database(
+            partial(
+                EDIRepository._collection_for(object_id).find_one,
+                {"_id": object_id},
+                {
+                    **_CONTENT_FIELDS,
+                    "cargo_item_ids": True,
+                    "created_at": True,
+                    "content_size": True,
+                    "content_hash": True,
+                },
+            ),
+            "get_edi_message",
+        )
+        if doc is None:
+            return None
+        return EDIMessage.model_validate(
+            {
+                "_id": str(doc["_id"]),
+                "edi_content": await EDIRepository._read_content(doc),
+                "cargo_item_ids": doc["cargo_item_ids"],
+                "created_at": doc["created_at"],
+                "content_size": doc.get("content_size"),
+                "content_hash": doc.get("content_hash"),
+            }
+        )
+
+    @staticmethod
+    async def get_cargo_item_ids(message_id: str) -> Optional[list[str]]:
+        """Get the IDs of a stored message's cargo items without loading its content."""
+        object_id = EDIRepository._object_id(message_id)
+        if object_id is None:
+            return None
+
+        doc = await call_database(
+            partial(EDIRepository._collection_for(object_id).find_one, {"_id": object_id}, {"cargo_item_ids": True}),
+            "get_cargo_item_ids",
+        )
+        return doc["cargo_item_ids"] if doc else None
+
+    @staticmethod
+    async def get_group_hashes(message_id: str) -> Optional[tuple[list[str], Optional[list[str]]]]:
+        """
+        Get a stored message's cargo item IDs with the hashes of their LIN groups, without loading its content.
+
+        Returns:
+            (cargo item IDs, group hashes) with hashes None for messages stored without them,
+            or None if the message does not exist
+        """
+        object_id = EDIRepository._object_id(message_id)
+        if object_id is None:
+            return None
+
+        doc = await call_database(
+            partial(
+                EDIRepository._collection_for(object_id).find_one,
+                {"_id": object_id},
+                {"cargo_item_ids": True, "group_hashes": True},
+            ),
+            "get_group_hashes",
+        )
+        return (doc["cargo_item_ids"], doc.get("group_hashes")) if doc else None
+
+    @staticmethod
+    async def edi_message_exists(message_id: str) -> bool:
+        """Check whether a message is stored, reading only the _id index."""
+        object_id = EDIRepository._object_id(message_id)
+        if object_id is None:
+            return False
 
-        db = get_database()
-        result = await db.edi_messages.insert_one(edi_doc.model_dump())
-        return result.acknowledged
+        doc = await call_database(
+            partial(EDIRepository._collection_for(object_id).find_one, {"_id": object_id}, {"_id": True}),
+            "edi_message_exists",
+        )
+        return doc is not None
@@ -0,0 +1,72 @@
+"""Cached database health monitoring."""
+
+import asyncio
+import contextlib
+import time
+from typing import Any, Optional
+
+from app.db.database import get_database
+
+
+class DatabaseHealthMonitor:
+    """Keep a cached database status that a background task refreshes periodically."""
+
+    def __init__(self, interval: float, timeout: float):
+        """Initialize with the refresh interval and ping timeout in seconds."""
+        self.interval = interval
+        self.timeout = timeout
+        self.connected: Optional[bool] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _ping(self) -> None:
+        """Ping the database once and record the outcome."""
+        try:
+            await asyncio.wait_for(get_database().command("ping"), timeout=self.timeout)
+            self.connected, self.error = True, None
+        except Exception as e:
+            self.connected, self.error = False, str(e) or type(e).__name__
+        self.checked_at = time.monotonic()
+
+    async def refresh(self) -> None:
+        """Refresh the cached status."""
+        async with self._lock:
+            await self._ping()
+
+    async def get_status(self) -> dict[str, Any]:
+        """
+        Return the cached database status.
+
+        Only the very first call pings the database directly; concurrent callers share that ping.
+        """
+        if self.checked_at is None:
+            async with self._lock:
+                if self.checked_at is None:
+                    await self._ping()
+
+        return {
+            "database": "connected" if self.connected else "disconnected",
+            "checked_seconds_ago": round(time.monotonic() - (self.checked_at or 0.0), 3),
+            "error": self.error,
+        }
+
+    async def _run(self) -> None:
+        """Refresh the status until cancelled."""
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start the background refresh task."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background refresh task."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
@@ -0,0 +1,128 @@
+"""Repository for responses stored under client Idempotency-Keys."""
+
+from datetime import UTC, datetime, timedelta
+from functools import partial
+from typing import Optional
+from uuid import uuid4
+
+from bson import Binary
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.db.database import get_database
+from app.db.resilience import call_database
+
+COLLECTION = "idempotency_keys"
+
+# Record states: the original request is still running, or its response is stored
+PENDING = "pending"
+COMPLETED = "completed"
+
+
+class IdempotencyRepository:
+    """
+    Repository for idempotency records.
+
+    A record is claimed as pending before the original request runs, so duplicates arriving at any worker can
+    wait for it, and completed with the response once it finishes. Both states expire through a TTL index on
+    ``expires_at``: pending claims after their lease, completed records after the retention period.
+
+    Every call goes through ``call_database``, so an unreachable database fails fast once the breaker opens.
+    """
+
+    @staticmethod
+    async def ensure_indexes() -> None:
+        """Create the TTL index removing expired records."""
+        db = get_database()
+        await db[COLLECTION].create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+
+    @staticmethod
+    async def claim(key: str, request_hash: str, lease_seconds: float) -> Optional[dict]:
+        """
+        Claim a key for a request about to run.
+
+        A pending claim whose lease has expired, because its worker died, is taken over.
+
+        Args:
+            key: The scoped idempotency key
+            request_hash: Fingerprint of the request
+            lease_seconds: How long the claim holds before another request may take it over
+
+        Returns:
+            None if the key is now held by the caller, otherwise the existing record
+        """
+        # The claim carries a token, so a retried attempt recognises a claim its earlier attempt already made
+        token = uuid4().hex
+        return await call_database(
+            partial(IdempotencyRepository._claim, key, request_hash, lease_seconds, token), "claim_idempotency_key"
+        )
+
+    @staticmethod
+    async def _claim(key: str, request_hash: str, lease_seconds: float, token: str) -> Optional[dict]:
+        """One attempt at claiming a key."""
+        now = datetime.now(UTC)
+        db = get_database()
+        try:
+            await db[COLLECTION].insert_one(
+                {
+                    "_id": key,
+                    "state": PENDING,
+                    "request_hash": request_hash,
+                    "claim_token": token,
+                    "created_at": now,
+                    "expires_at": now + timedelta(seconds=lease_seconds),
+                }
+            )
+            return None
+        except DuplicateKeyError:
+            pass
+
+        taken_over = await db[COLLECTION].find_one_and_update(
+            {"_id": key, "state": PENDING, "request_hash": request_hash, "expires_at": {"$lt": now}},
+            {"$set": {"claim_token": token, "created_at": now, "expires_at": now + timedelta(seconds=lease_seconds)}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if taken_over:
+            return None
+        record = await db[COLLECTION].find_one({"_id": key})
+        if record is not None and record["state"] == PENDING and record.get("claim_token") == token:
+            return None
+        return record
+
+    @staticmethod
+    async def get(key: str) -> Optional[dict]:
+        """Get the record of a key."""
+        db = get_database()
+        return await call_database(partial(db[COLLECTION].find_one, {"_id": key}), "get_idempotency_key")
+
+    @staticmethod
+    async def complete(
+        key: str, status_code: int, headers: list[list[str]], body: bytes, ttl_seconds: float
+    ) -> datetime:
+        """
+        Store the response of a claimed key.
+
+        Returns:
+            When the stored response expires
+        """
+        expires_at = datetime.now(UTC) + timedelta(seconds=ttl_seconds)
+        db = get_database()
+        update = {
+            "$set": {
+                "state": COMPLETED,
+                "status": status_code,
+                "headers": headers,
+                "body": Binary(body),
+                "expires_at": expires_at,
+            }
+        }
+        await call_database(partial(db[COLLECTION].update_one, {"_id": key}, update), "complete_idempotency_key")
+        return expires_at
+
+    @staticmethod
+    async def release(key: str) -> None:
+        """Drop a pending claim whose response is not stored, so the next retry runs the request again."""
+        db = get_database()
+        await call_database(
+            partial(db[COLLECTION].delete_one, {"_id": key, "state": PENDING}), "release_idempotency_key"
+        )
@@ -0,0 +1,16 @@
+"""Index management for all collections."""
+
+from app.db.cargo_repository import CargoRepository
+from app.db.cargo_stats_repository import CargoStatsRepository
+from app.db.decode_job_repository import DecodeJobRepository
+from app.db.edi_repository import EDIRepository
+from app.db.idempotency_repository import IdempotencyRepository
+
+
+async def ensure_indexes() -> None:
+    """Create every collection's indexes; indexes that already exist are left as they are."""
+    await CargoRepository.ensure_indexes()
+    await CargoStatsRepository.ensure_indexes()
+    await EDIRepository.ensure_indexes()
+    await DecodeJobRepository.ensure_indexes()
+    await IdempotencyRepository.ensure_indexes()
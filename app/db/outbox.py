@@ -0,0 +1,357 @@
+"""
+Local outbox for decode and generate writes.
+
+With ``OUTBOX_PATH`` set, the cargo items and messages that decode and generate requests store are appended to
+a SQLite log on local disk instead of being written to MongoDB, and a background ``OutboxDrainer`` replays the
+log into MongoDB. Requests then only wait for a local append, and writes made while MongoDB is unavailable are
+kept until it is back.
+
+Documents get their IDs when they are appended, so the IDs returned to the client are the ones they are
+stored under, and replaying a record again after a crash skips what was already written. Replays are
+at-least-once; reads only see a write once it has been drained. Cargo items upserted by natural key are the
+exception and are written straight to MongoDB, since their IDs are only known once matched against stored items.
+
+Every worker process opens its own connection on first use, since SQLite connections must not cross a fork,
+and all of them append to the same file. Only the worker holding the drain lease replays it, so records are
+replayed in order by one drainer at a time.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from typing import Any, NamedTuple, Optional, TypeVar
+
+from bson import json_util
+from bson.json_util import JSONOptions
+
+from app.config import get_settings
+from app.constants.error_messages import EErrorMessage
+from app.db.cargo_repository import CargoRepository
+from app.db.edi_repository import EDIRepository
+from app.db.partitions import object_id_at
+from app.models.cargo_item import CargoItem
+from app.models.edi_message import EDIMessage
+
+T = TypeVar("T")
+
+# Record kinds, replayed in the order they were appended
+CARGO_ITEMS = "cargo_items"
+DELETE_CARGO_ITEMS = "delete_cargo_items"
+EDI_MESSAGES = "edi_messages"
+
+# Extended JSON keeps ObjectIds and datetimes intact through the log
+_JSON_OPTIONS = JSONOptions(tz_aware=True, tzinfo=UTC)
+
+# Upserted items keep the ID of the stored item they matched; the mapping is kept this long for later messages
+_REPLACED_ID_RETENTION_SECONDS = 7 * 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    appended_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS dead_letters (
+    seq INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    appended_at REAL NOT NULL,
+    attempts INTEGER NOT NULL,
+    error TEXT NOT NULL,
+    dead_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS drain_lease (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS replaced_ids (
+    assigned TEXT PRIMARY KEY,
+    actual TEXT NOT NULL,
+    replaced_at REAL NOT NULL
+);
+"""
+
+
+class OutboxRecord(NamedTuple):
+    """A write waiting in the outbox."""
+
+    seq: int
+    kind: str
+    payload: dict[str, Any]
+
+
+class Outbox:
+    """
+    Append-only SQLite log of pending writes.
+
+    Every append is committed in write-ahead-log mode with full sync before it returns, so an acknowledged
+    write survives a crash of the process or the machine. Drained records are deleted; records that keep being
+    rejected are moved to ``dead_letters``, so they do not hold up the records behind them.
+    """
+
+    def __init__(self, path: str):
+        """Open or create the log at ``path``."""
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=FULL")
+        self._connection.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def append(self, kind: str, payload: dict[str, Any]) -> None:
+        """Append a record, returning once it is on disk."""
+        data = json_util.dumps(payload, json_options=_JSON_OPTIONS)
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO records (kind, payload, appended_at) VALUES (?, ?, ?)", (kind, data, time.time())
+            )
+
+    async def append_async(self, kind: str, payload: dict[str, Any]) -> None:
+        """Append a record without blocking the event loop on the disk sync."""
+        await asyncio.to_thread(self.append, kind, payload)
+
+    def read(self, limit: int) -> list[OutboxRecord]:
+        """The oldest records, in append order."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT seq, kind, payload FROM records ORDER BY seq LIMIT ?", (limit,)
+            ).fetchall()
+        return [
+            OutboxRecord(seq, kind, json_util.loads(payload, json_options=_JSON_OPTIONS)) for seq, kind, payload in rows
+        ]
+
+    def ack(self, seqs: list[int], replaced_ids: dict[str, str]) -> None:
+        """Delete replayed records and remember the IDs upserted items were stored under, in one transaction."""
+        now = time.time()
+
+        def statements(connection: sqlite3.Connection) -> None:
+            connection.executemany(
+                "INSERT OR REPLACE INTO replaced_ids (assigned, actual, replaced_at) VALUES (?, ?, ?)",
+                [(assigned, actual, now) for assigned, actual in replaced_ids.items()],
+            )
+            connection.execute(
+                "DELETE FROM replaced_ids WHERE replaced_at < ?", (now - _REPLACED_ID_RETENTION_SECONDS,)
+            )
+            connection.executemany("DELETE FROM records WHERE seq = ?", [(seq,) for seq in seqs])
+
+        self._transaction(statements)
+
+    def _transaction(self, statements: Callable[[sqlite3.Connection], T]) -> T:
+        """Run ``statements(connection)`` in one write transaction."""
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(self._connection)
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+        return result
+
+    def fail(self, seq: int, error: str, max_attempts: int) -> bool:
+        """
+        Count a rejected replay of a record, moving it to the dead-letter table after ``max_attempts``.
+
+        Returns:
+            Whether the record was moved
+        """
+
+        def statements(connection: sqlite3.Connection) -> bool:
+            connection.execute("UPDATE records SET attempts = attempts + 1 WHERE seq = ?", (seq,))
+            moved = connection.execute(
+                "INSERT INTO dead_letters (seq, kind, payload, appended_at, attempts, error, dead_at) "
+                "SELECT seq, kind, payload, appended_at, attempts, ?, ? FROM records WHERE seq = ? AND attempts >= ?",
+                (error, time.time(), seq, max_attempts),
+            ).rowcount
+            connection.execute("DELETE FROM records WHERE seq = ? AND attempts >= ?", (seq, max_attempts))
+            return moved > 0
+
+        return self._transaction(statements)
+
+    def dead_letters(self) -> list[tuple[OutboxRecord, str]]:
+        """Records given up on, with the error of their last replay."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT seq, kind, payload, error FROM dead_letters ORDER BY seq"
+            ).fetchall()
+        return [
+            (OutboxRecord(seq, kind, json_util.loads(payload, json_options=_JSON_OPTIONS)), error)
+            for seq, kind, payload, error in rows
+        ]
+
+    def acquire_drain_lease(self, owner: str, lease_seconds: float) -> bool:
+        """Take or renew the lease that lets one process drain the log; False while another process holds it."""
+
+        def statements(connection: sqlite3.Connection) -> bool:
+            now = time.time()
+            row = connection.execute("SELECT owner, expires_at FROM drain_lease WHERE id = 0").fetchone()
+            if row is not None and row[0] != owner and row[1] > now:
+                return False
+            connection.execute(
+                "INSERT OR REPLACE INTO drain_lease (id, owner, expires_at) VALUES (0, ?, ?)",
+                (owner, now + lease_seconds),
+            )
+            return True
+
+        return self._transaction(statements)
+
+    def release_drain_lease(self, owner: str) -> None:
+        """Give up the drain lease so another process can take it over at once."""
+        with self._lock:
+            self._connection.execute("DELETE FROM drain_lease WHERE id = 0 AND owner = ?", (owner,))
+
+    def replaced_ids(self, assigned_ids: list[str]) -> dict[str, str]:
+        """IDs that upserted items were stored under instead of the ones assigned when they were appended."""
+        if not assigned_ids:
+            return {}
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT assigned, actual FROM replaced_ids WHERE assigned IN ({','.join('?' * len(assigned_ids))})",
+                assigned_ids,
+            ).fetchall()
+        return dict(rows)
+
+    def pending(self) -> int:
+        """Number of records waiting to be replayed."""
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the log."""
+        with self._lock:
+            self._connection.close()
+
+
+# Outbox connections by process ID; a worker forked from a process that had opened one opens its own
+_outboxes: dict[int, Outbox] = {}
+
+
+def get_outbox() -> Optional[Outbox]:
+    """The outbox of this process, opened on first use, or None when writes go straight to MongoDB."""
+    path = get_settings().OUTBOX_PATH
+    if not path:
+        return None
+    pid = os.getpid()
+    if pid not in _outboxes:
+        _outboxes[pid] = Outbox(path)
+    return _outboxes[pid]
+
+
+class OutboxCargoRepository(CargoRepository):
+    """Cargo repository that appends writes to the outbox; reads go to MongoDB."""
+
+    @staticmethod
+    async def create_cargo_items(cargo_items: list[CargoItem], upsert: Optional[bool] = None) -> list[str]:
+        """
+        Append cargo items to the outbox and return the IDs they will be stored under.
+
+        Upserted items are written to MongoDB directly instead, so the IDs returned are those of the items they matched.
+        """
+        if upsert is None:
+            upsert = CargoRepository.upserts_natural_keys()
+        if upsert:
+            return await CargoRepository.create_cargo_items(cargo_items, upsert=True)
+        docs = []
+        for item in cargo_items:
+            doc = CargoRepository._to_document(item)
+            doc["_id"] = object_id_at(doc["created_at"])
+            docs.append(doc)
+        await get_outbox().append_async(CARGO_ITEMS, {"docs": docs, "upsert": False})
+        return [str(doc["_id"]) for doc in docs]
+
+    @staticmethod
+    async def delete_cargo_items(cargo_item_ids: list[str]) -> int:
+        """Append the deletion of cargo items, which is replayed after the items themselves."""
+        await get_outbox().append_async(DELETE_CARGO_ITEMS, {"ids": cargo_item_ids})
+        return len(cargo_item_ids)
+
+    @staticmethod
+    async def replay(docs: list[dict[str, Any]], upsert: bool) -> dict[str, str]:
+        """
+        Write appended cargo items to MongoDB.
+
+        Returns:
+            The stored ID of each upserted item that matched an existing item, by the ID it was appended with
+        """
+        assigned = [str(doc["_id"]) for doc in docs]
+        stored = await CargoRepository._insert_documents(docs, upsert=upsert)
+        return {before: after for before, after in zip(assigned, stored) if before != after}
+
+
+class OutboxEDIRepository(EDIRepository):
+    """EDI message repository that appends writes to the outbox; reads go to MongoDB."""
+
+    @staticmethod
+    async def _append(messages: list[EDIMessage]) -> bool:
+        """Append messages to the outbox."""
+        await get_outbox().append_async(
+            EDI_MESSAGES, {"messages": [message.model_dump(by_alias=True, exclude_none=True) for message in messages]}
+        )
+        return True
+
+    @staticmethod
+    async def store_edi_message(
+        edi_content: str,
+        cargo_item_ids: list[str],
+        message_id: Optional[str] = None,
+        group_hashes: Optional[list[str]] = None,
+        previous_message_id: Optional[str] = None,
+    ) -> bool:
+        """Append an EDI message to the outbox."""
+        if not edi_content:
+            raise ValueError(EErrorMessage.EMPTY_EDI_CONTENT.value)
+
+        message = EDIMessage(
+            edi_content=edi_content,
+            cargo_item_ids=cargo_item_ids,
+            created_at=datetime.now(UTC),
+            group_hashes=group_hashes,
+            previous_message_id=previous_message_id,
+        )
+        if message_id is not None:
+            message.id = message_id
+        return await OutboxEDIRepository._append([message])
+
+    @staticmethod
+    async def store_edi_messages(messages: list[tuple[str, list[str]]]) -> bool:
+        """Append several EDI messages to the outbox as one record."""
+        if not messages:
+            return True
+        if any(not edi_content for edi_content, _ in messages):
+            raise ValueError(EErrorMessage.EMPTY_EDI_CONTENT.value)
+
+        created_at = datetime.now(UTC)
+        return await OutboxEDIRepository._append(
+            [
+                EDIMessage(edi_content=edi_content, cargo_item_ids=cargo_item_ids, created_at=created_at)
+                for edi_content, cargo_item_ids in messages
+            ]
+        )
+
+    @staticmethod
+    async def replay(messages: list[dict[str, Any]], replaced_ids: dict[str, str]) -> None:
+        """Write appended messages to MongoDB, skipping those already stored by an earlier replay."""
+        pending = []
+        for data in messages:
+            message = EDIMessage.model_validate(data)
+            if await EDIRepository.edi_message_exists(message.id):
+                continue
+            message.cargo_item_ids = [replaced_ids.get(item_id, item_id) for item_id in message.cargo_item_ids]
+            pending.append(await EDIRepository._to_document(message))
+        if pending and not await EDIRepository._insert_documents(pending):
+            raise Exception(EErrorMessage.FAILED_TO_STORE.value.format("EDI message", "storage operation failed"))
+
+
+def repositories() -> tuple[CargoRepository, EDIRepository]:
+    """Repositories for decode and generate writes: outbox-backed when ``OUTBOX_PATH`` is set."""
+    if get_outbox() is not None:
+        return OutboxCargoRepository(), OutboxEDIRepository()
+    return CargoRepository(), EDIRepository()
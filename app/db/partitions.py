@@ -0,0 +1,126 @@
+"""
+Monthly collection buckets.
+
+With ``PARTITION_BY_MONTH`` enabled, documents are written to one collection per calendar month of their
+creation time, e.g. ``cargo_items_2026_10``, so each month's indexes stay small and old months can be
+archived and dropped as a whole. Reads fan out only to the buckets a date range touches; lookups by ID go
+straight to one bucket, because document IDs carry their bucket's month in their timestamp.
+"""
+
+import hashlib
+import os
+import re
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+from typing import Optional
+
+from bson import ObjectId
+
+from app.config import get_settings
+from app.db.database import get_database
+
+# Buckets whose indexes this process has already created
+_ensured: set[str] = set()
+
+
+def partitioned() -> bool:
+    """Whether collections are split into monthly buckets."""
+    return get_settings().PARTITION_BY_MONTH
+
+
+def as_utc(when: datetime) -> datetime:
+    """Treat naive datetimes as UTC, as MongoDB does."""
+    return when if when.tzinfo else when.replace(tzinfo=UTC)
+
+
+def bucket_name(base: str, when: datetime) -> str:
+    """Name of the bucket of ``base`` holding documents created at ``when``, by its UTC month."""
+    when = as_utc(when).astimezone(UTC)
+    return f"{base}_{when.year:04d}_{when.month:02d}"
+
+
+def bucket_start(name: str) -> Optional[datetime]:
+    """First instant of a bucket's month, or None if the name is not a bucket."""
+    match = re.fullmatch(r".+_(\d{4})_(\d{2})", name)
+    return datetime(int(match[1]), int(match[2]), 1, tzinfo=UTC) if match else None
+
+
+def next_month(start: datetime) -> datetime:
+    """First instant of the following month."""
+    return start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+
+
+def object_id_at(when: datetime) -> ObjectId:
+    """
+    Generate a unique ObjectId whose timestamp is ``when``.
+
+    Documents keyed this way can be found in their bucket from the ID alone.
+    """
+    timestamp = int(as_utc(when).timestamp())
+    return ObjectId(timestamp.to_bytes(4, "big") + ObjectId().binary[4:])
+
+
+def derived_object_id(when: datetime, *key: str) -> ObjectId:
+    """
+    Derive an ObjectId whose timestamp is ``when`` from a key, so the same key and time always give the same ID.
+
+    A bulk load that is repeated after a crash then writes its documents under the same IDs again.
+    """
+    timestamp = int(as_utc(when).timestamp())
+    return ObjectId(timestamp.to_bytes(4, "big") + hashlib.sha256("\0".join(key).encode()).digest()[:8])
+
+
+def collection_for_id(base: str, object_id: ObjectId) -> str:
+    """Collection holding the document with this ID."""
+    return bucket_name(base, object_id.generation_time) if partitioned() else base
+
+
+async def list_buckets(base: str) -> list[str]:
+    """Existing buckets of ``base``, oldest first."""
+    names = await get_database().list_collection_names(
+        filter={"name": {"$regex": f"^{re.escape(base)}_\\d{{4}}_\\d{{2}}$"}}
+    )
+    return sorted(names)
+
+
+async def read_collections(
+    base: str, start: Optional[datetime] = None, end: Optional[datetime] = None, newest_first: bool = False
+) -> list[str]:
+    """
+    Collections a query over creation times in [start, end) has to read.
+
+    Returns:
+        ``[base]`` when not partitioned, else the existing buckets overlapping the range
+    """
+    if not partitioned():
+        return [base]
+
+    start = as_utc(start) if start else None
+    end = as_utc(end) if end else None
+    names = [
+        name
+        for name in await list_buckets(base)
+        if (end is None or bucket_start(name) < end) and (start is None or next_month(bucket_start(name)) > start)
+    ]
+    return names[::-1] if newest_first else names
+
+
+async def write_collection(base: str, when: datetime, create_indexes: Callable[[str], Awaitable[None]]) -> str:
+    """
+    Collection to write a document created at ``when`` to.
+
+    The first write to a bucket from this process creates its indexes, so new months are ready before they fill up.
+    """
+    if not partitioned():
+        return base
+
+    name = bucket_name(base, when)
+    if name not in _ensured:
+        await create_indexes(name)
+        _ensured.add(name)
+    return name
+
+
+def archive_path(name: str, archive_dir: str) -> str:
+    """Local file an archived bucket is written to."""
+    return os.path.join(archive_dir, f"{name}.ndjson.gz")
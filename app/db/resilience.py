@@ -0,0 +1,241 @@
+"""
+Timeouts, retries and a circuit breaker around database calls.
+
+Controllers set a deadline for the request with ``request_deadline``; every database call made while handling it,
+including from tasks it starts, is cut off when the deadline passes. Calls failing with a transient error are
+retried with jittered exponential backoff. Repeated failures open a circuit breaker, after which calls fail
+immediately with ``CircuitOpenError`` until a trial call succeeds, so requests stop queueing behind a database
+that is failing over.
+"""
+
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Optional, TypeVar
+
+from pymongo.errors import AutoReconnect, BulkWriteError, DuplicateKeyError, PyMongoError
+
+from app.config import get_settings
+from app.constants.error_messages import EErrorMessage
+from app.utils.metrics import registry
+
+T = TypeVar("T")
+
+_DUPLICATE_KEY = 11000
+
+# Monotonic time by which the current request's database calls must finish
+_deadline: ContextVar[Optional[float]] = ContextVar("database_deadline", default=None)
+
+BREAKER_STATE = registry.gauge(
+    "edi_circuit_breaker_state", "Circuit breaker state: 0 closed, 1 half-open, 2 open", ("breaker",)
+)
+BREAKER_REJECTED = registry.counter(
+    "edi_circuit_breaker_rejected_total", "Calls failed fast by an open circuit breaker", ("breaker",)
+)
+DATABASE_RETRIES = registry.counter(
+    "edi_database_retries_total", "Database calls retried after a transient error", ("operation",)
+)
+
+
+class DatabaseUnavailableError(Exception):
+    """A database call was not attempted, or given up on, because the database is unavailable."""
+
+
+class CircuitOpenError(DatabaseUnavailableError):
+    """The circuit breaker is open."""
+
+
+class DeadlineExceededError(DatabaseUnavailableError, TimeoutError):
+    """The request's deadline passed before a database call finished."""
+
+
+@contextmanager
+def request_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Bound the database calls made within the block to ``seconds`` in total; None leaves them unbounded."""
+    token = _deadline.set(None if seconds is None else time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left until the current deadline, or None if there is none."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether an error is a connection problem or failover that a retry may get past."""
+    if isinstance(error, (AutoReconnect, asyncio.TimeoutError)):
+        return True
+    return isinstance(error, PyMongoError) and error.has_error_label("RetryableWriteError")
+
+
+class CircuitBreaker:
+    """
+    Fail fast after repeated failures.
+
+    The breaker opens after ``failure_threshold`` consecutive failures. Once ``reset_timeout`` has passed, it lets
+    one trial call through (half-open): success closes it again, failure reopens it.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """Initialize a closed breaker."""
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        BREAKER_STATE.set(self.state, breaker=self.name)
+
+    def _set_state(self, state: int) -> None:
+        """Change state and export it."""
+        if state != self.state:
+            print(f"⚡ Circuit breaker {self.name}: {('closed', 'half-open', 'open')[state]}")
+        self.state = state
+        BREAKER_STATE.set(state, breaker=self.name)
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets a trial call through."""
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic()) if self.state == self.OPEN else 0.0
+
+    def before_call(self) -> None:
+        """Raise ``CircuitOpenError`` unless a call may go ahead."""
+        if self.state == self.OPEN and self.retry_after == 0:
+            self._set_state(self.HALF_OPEN)
+        if self.state == self.CLOSED or (self.state == self.HALF_OPEN and not self._trial_running):
+            self._trial_running = self.state == self.HALF_OPEN
+            return
+        BREAKER_REJECTED.inc(breaker=self.name)
+        raise CircuitOpenError(EErrorMessage.DATABASE_UNAVAILABLE.value)
+
+    def abandon_call(self) -> None:
+        """Record a call cancelled before its outcome was known, letting another trial call through."""
+        self._trial_running = False
+
+    def record_success(self) -> None:
+        """Record a call that reached a healthy database."""
+        self.failures = 0
+        self._trial_running = False
+        self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        """Record a call that failed with a transient error."""
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._trial_running = False
+            self.opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+
+@lru_cache
+def get_breaker() -> CircuitBreaker:
+    """Circuit breaker shared by every database call in this process."""
+    settings = get_settings()
+    return CircuitBreaker(
+        "mongodb",
+        failure_threshold=settings.DB_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=settings.DB_BREAKER_RESET_SECONDS,
+    )
+
+
+def _backoff(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Full-jitter exponential backoff before retry number ``attempt``."""
+    return random.uniform(0, min(max_delay, base_delay * 2**attempt))
+
+
+async def call_database(operation: Callable[[], Awaitable[T]], name: str) -> T:
+    """
+    Run a database call with the request deadline, retries and the circuit breaker.
+
+    The operation is called again for every attempt, so it must be safe to repeat: a write must leave the same
+    result whether or not an earlier attempt reached the database.
+
+    Args:
+        operation: Makes the database call
+        name: Operation name for metrics
+
+    Returns:
+        The result of the operation
+
+    Raises:
+        CircuitOpenError: If the breaker is open
+        DeadlineExceededError: If the request's deadline passed
+    """
+    settings = get_settings()
+    breaker = get_breaker()
+    attempts = max(1, settings.DB_RETRY_ATTEMPTS)
+    attempt = 0
+    while True:
+        remaining = remaining_time()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceededError(EErrorMessage.DEADLINE_EXCEEDED.value)
+        timeout = (
+            settings.DB_OPERATION_TIMEOUT_SECONDS
+            if remaining is None
+            else min(remaining, settings.DB_OPERATION_TIMEOUT_SECONDS)
+        )
+        breaker.before_call()
+
+        try:
+            result = await asyncio.wait_for(operation(), timeout)
+        except asyncio.CancelledError:
+            breaker.abandon_call()
+            raise
+        except Exception as e:
+            if not is_transient(e):
+                # The database answered, so it is up even though the call failed
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            remaining = remaining_time()
+            if remaining is not None and remaining <= 0:
+                raise DeadlineExceededError(EErrorMessage.DEADLINE_EXCEEDED.value) from e
+            if attempt == attempts - 1 or breaker.state == breaker.OPEN:
+                raise
+            delay = _backoff(attempt, settings.DB_RETRY_BASE_DELAY_SECONDS, settings.DB_RETRY_MAX_DELAY_SECONDS)
+            DATABASE_RETRIES.inc(operation=name)
+            await asyncio.sleep(delay if remaining is None else min(delay, remaining))
+            attempt += 1
+            continue
+
+        breaker.record_success()
+        return result
+
+
+async def insert_once(collection: Any, docs: list[dict[str, Any]], duplicates: Optional[set] = None) -> bool:
+    """
+    Insert documents that already carry their ``_id``, so that repeating the insert is harmless.
+
+    Documents an earlier attempt wrote before failing are reported as duplicate keys and skipped; their IDs are
+    added to ``duplicates`` when given.
+
+    Returns:
+        Whether the write was acknowledged
+    """
+    try:
+        if len(docs) == 1:
+            result = await collection.insert_one(docs[0])
+        else:
+            result = await collection.insert_many(docs, ordered=False)
+    except DuplicateKeyError:
+        if duplicates is not None:
+            duplicates.add(docs[0]["_id"])
+        return True
+    except BulkWriteError as e:
+        if any(error["code"] != _DUPLICATE_KEY for error in e.details["writeErrors"]):
+            raise
+        if duplicates is not None:
+            duplicates.update(docs[error["index"]]["_id"] for error in e.details["writeErrors"])
+        return True
+    return result.acknowledged
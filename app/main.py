@@ -1,50 +1,163 @@
+import math
 from contextlib import asynccontextmanager
+from typing import Any
 
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from app.api.v1 import api_router
-from app.config import settings
-from app.db.database import connect_to_mongo, get_database
+from app.config import get_settings
+from app.utils.metrics import registry
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handle application startup and shutdown events."""
+    from app.db.database import connect_to_mongo
+    from app.db.indexes import ensure_indexes
+
     try:
         await connect_to_mongo()
+        # Every worker runs this; MongoDB builds each index once and treats existing ones as no-ops
+        await ensure_indexes()
     except Exception as e:
         print(f"❌ FastAPI server failed to start: {e}")
         raise
 
+    app.state.health_monitor.start()
+    if app.state.decode_job_pool is not None:
+        await app.state.decode_job_pool.start()
+    if app.state.spool_watcher is not None:
+        await app.state.spool_watcher.start()
+    if app.state.outbox_drainer is not None:
+        await app.state.outbox_drainer.start()
     print("✅ FastAPI server started successfully!")
     yield
+    if app.state.outbox_drainer is not None:
+        await app.state.outbox_drainer.stop()
+    if app.state.spool_watcher is not None:
+        await app.state.spool_watcher.stop()
+    if app.state.decode_job_pool is not None:
+        await app.state.decode_job_pool.stop()
+    await app.state.health_monitor.stop()
 
 
-app = FastAPI(title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json", lifespan=lifespan)
+async def health_check(request: Request) -> dict[str, Any]:
+    """Report application health from the cached database status."""
+    database_status = await request.app.state.health_monitor.get_status()
+    if database_status["database"] != "connected":
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"status": "unhealthy", **database_status},
+        )
+    return {"status": "healthy", **database_status}
 
-# Set CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-# Include API router
-app.include_router(api_router, prefix=settings.API_V1_STR)
+async def metrics() -> PlainTextResponse:
+    """Export process metrics in the Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 
-@app.get("/health")
-async def health_check() -> dict[str, str]:
-    """Check application health including database connection."""
-    try:
-        db = get_database()
-        result = await db.command("ping")
-        return {"status": "healthy", "database": "connected", "ping": str(result)}
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail={"status": "unhealthy", "database": "disconnected", "error": str(e)},
-        ) from e
+async def database_unavailable(request: Request, exc: Exception) -> JSONResponse:
+    """Fail fast with 503 while the database circuit breaker is open or a request's deadline has passed."""
+    from app.db.resilience import get_breaker
+
+    return JSONResponse(
+        {"detail": str(exc)},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(math.ceil(get_breaker().retry_after) or 1)},
+    )
+
+
+def create_app() -> FastAPI:
+    """Create and configure the FastAPI application."""
+    # Routers pull in models, services and repositories, so import them only when an app is built
+    from app.api.v1 import api_router
+    from app.db.cargo_repository import CargoRepository
+    from app.db.decode_job_repository import DecodeJobRepository
+    from app.db.health import DatabaseHealthMonitor
+    from app.db.resilience import DatabaseUnavailableError
+    from app.middleware.admission import AdmissionControlMiddleware
+    from app.middleware.compression import CompressionMiddleware
+    from app.middleware.idempotency import IdempotencyMiddleware
+    from app.services.edi_decode_jobs import DecodeJobWorkerPool, EDIDecodeJobService
+    from app.services.edi_spool import SpoolWatcher
+    from app.services.outbox_drainer import OutboxDrainer
+
+    settings = get_settings()
+    app = FastAPI(title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json", lifespan=lifespan)
+    app.state.health_monitor = DatabaseHealthMonitor(
+        interval=settings.HEALTH_CHECK_INTERVAL_SECONDS, timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS
+    )
+    app.state.decode_job_pool = (
+        DecodeJobWorkerPool(
+            EDIDecodeJobService(
+                CargoRepository(),
+                DecodeJobRepository(),
+                chunk_groups=settings.DECODE_JOB_CHUNK_GROUPS,
+                lease_seconds=settings.DECODE_JOB_LEASE_SECONDS,
+                max_attempts=settings.DECODE_JOB_MAX_ATTEMPTS,
+                max_errors=settings.DECODE_JOB_MAX_ERRORS,
+            ),
+            workers=settings.DECODE_JOB_WORKERS,
+            poll_interval=settings.DECODE_JOB_POLL_INTERVAL_SECONDS,
+        )
+        if settings.DECODE_JOB_WORKERS > 0
+        else None
+    )
+    app.state.spool_watcher = SpoolWatcher.from_settings(settings) if settings.SPOOL_DIR else None
+    app.state.outbox_drainer = OutboxDrainer.from_settings(settings) if settings.OUTBOX_PATH else None
+
+    # Middleware added last runs first: CORS, then compression, then idempotency, then admission control.
+    # Idempotency sits inside compression so it stores uncompressed responses, and outside admission control
+    # so duplicates of an in-flight request wait without holding an admission slot.
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        path_prefix=f"{settings.API_V1_STR}/edi",
+        large_request_bytes=settings.ADMISSION_LARGE_REQUEST_BYTES,
+        small_concurrency=settings.ADMISSION_SMALL_CONCURRENCY,
+        large_concurrency=settings.ADMISSION_LARGE_CONCURRENCY,
+        max_queue=settings.ADMISSION_MAX_QUEUE,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    )
+    app.add_middleware(
+        IdempotencyMiddleware,
+        paths=(f"{settings.API_V1_STR}/edi/decode", f"{settings.API_V1_STR}/edi/generate"),
+        ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+        cache_size=settings.IDEMPOTENCY_CACHE_SIZE,
+        max_response_bytes=settings.IDEMPOTENCY_MAX_RESPONSE_BYTES,
+        lock_seconds=settings.IDEMPOTENCY_LOCK_SECONDS,
+        poll_interval=settings.IDEMPOTENCY_POLL_INTERVAL_SECONDS,
+    )
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+        max_request_size=settings.MAX_DECOMPRESSED_REQUEST_SIZE,
+        decompress_paths=(f"{settings.API_V1_STR}/edi/decode", f"{settings.API_V1_STR}/edi/generate"),
+    )
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Include API router
+    app.include_router(api_router, prefix=settings.API_V1_STR)
+    app.add_api_route("/health", health_check, methods=["GET"])
+    app.add_api_route("/metrics", metrics, methods=["GET"], response_class=PlainTextResponse)
+    app.add_exception_handler(DatabaseUnavailableError, database_unavailable)
+
+    return app
+
+
+def __getattr__(name: str) -> Any:
+    """Build the default ``app`` on first access, e.g. by ``uvicorn app.main:app``."""
+    if name == "app":
+        application = globals()["app"] = create_app()
+        return application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,163 @@
+"""Admission control and load shedding for expensive endpoints."""
+
+import asyncio
+from collections import deque
+from typing import Optional
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.constants.error_messages import EErrorMessage
+from app.utils.metrics import registry
+
+ADMISSION_ACTIVE = registry.gauge("edi_admission_active", "Requests currently being processed", ("pool",))
+ADMISSION_QUEUE_DEPTH = registry.gauge("edi_admission_queue_depth", "Requests waiting for a slot", ("pool",))
+ADMISSION_ADMITTED = registry.counter("edi_admission_admitted_total", "Requests admitted", ("pool",))
+ADMISSION_REJECTED = registry.counter(
+    "edi_admission_rejected_total", "Requests rejected by admission control", ("pool", "reason")
+)
+
+
+class AdmissionPool:
+    """Concurrency limit with a bounded FIFO wait queue."""
+
+    def __init__(self, name: str, limit: int, max_queue: int):
+        """Initialize the pool with its concurrency limit and queue bound."""
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for a slot."""
+        return len(self._waiters)
+
+    def _report(self) -> None:
+        """Export the pool state."""
+        ADMISSION_ACTIVE.set(self.active, pool=self.name)
+        ADMISSION_QUEUE_DEPTH.set(len(self._waiters), pool=self.name)
+
+    async def acquire(self, timeout: float) -> Optional[str]:
+        """
+        Wait for a slot.
+
+        Returns:
+            None once a slot is held, otherwise the reason the request was rejected
+        """
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self._report()
+            return None
+        if len(self._waiters) >= self.max_queue:
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._report()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+            return None
+        except asyncio.TimeoutError:
+            if waiter.done():  # The slot was handed over just as the wait timed out
+                return None
+            self._waiters.remove(waiter)
+            waiter.cancel()
+            return "queue_timeout"
+        except asyncio.CancelledError:
+            if waiter.done():
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+                waiter.cancel()
+            raise
+        finally:
+            self._report()
+
+    def release(self) -> None:
+        """Release a slot, handing it straight to the next waiter if there is one."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._report()
+                return
+        self.active -= 1
+        self._report()
+
+
+class AdmissionControlMiddleware:
+    """
+    Limit concurrent requests under a path prefix, with separate pools for small and large requests.
+
+    Request bodies whose Content-Length is missing, compressed or above ``large_request_bytes`` use
+    the large pool. When a pool's wait queue is full the request is rejected with 429; when it waits
+    longer than ``queue_timeout`` it is rejected with 503. Both carry a Retry-After header.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        path_prefix: str,
+        large_request_bytes: int = 1024 * 1024,
+        small_concurrency: int = 32,
+        large_concurrency: int = 4,
+        max_queue: int = 64,
+        queue_timeout: float = 10.0,
+        retry_after: int = 5,
+    ):
+        """Initialize the middleware."""
+        self.app = app
+        self.path_prefix = path_prefix
+        self.large_request_bytes = large_request_bytes
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.pools = {
+            "small": AdmissionPool("small", small_concurrency, max_queue),
+            "large": AdmissionPool("large", large_concurrency, max_queue),
+        }
+
+    def _pool_for(self, scope: Scope) -> AdmissionPool:
+        """Classify a request as small or large from its headers."""
+        if scope["method"] in ("GET", "HEAD"):
+            return self.pools["small"]
+
+        headers = Headers(scope=scope)
+        content_length = headers.get("content-length", "")
+        if (
+            not content_length.isdigit()
+            or int(content_length) > self.large_request_bytes
+            or headers.get("content-encoding", "identity").lower() != "identity"
+        ):
+            return self.pools["large"]
+        return self.pools["small"]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle an ASGI connection."""
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        pool = self._pool_for(scope)
+        rejection = await pool.acquire(self.queue_timeout)
+        if rejection is not None:
+            ADMISSION_REJECTED.inc(pool=pool.name, reason=rejection)
+            status_code = (
+                status.HTTP_429_TOO_MANY_REQUESTS if rejection == "queue_full" else status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+            response = JSONResponse(
+                {"detail": EErrorMessage.SERVER_OVERLOADED.value},
+                status_code=status_code,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        ADMISSION_ADMITTED.inc(pool=pool.name)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            pool.release()
@@ -0,0 +1,305 @@
+"""Negotiated response compression and decompression of compressed request bodies."""
+
+import zlib
+from typing import Optional
+
+import zstandard
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.constants.error_messages import EErrorMessage
+
+# Supported content codings in order of preference
+SUPPORTED_ENCODINGS = ("zstd", "gzip")
+
+# Worst-case zstd expansion: a 4-byte RLE block decodes to a full 128 KiB block
+_ZSTD_MAX_RATIO = 32 * 1024
+
+_COMPRESSED_BODY_HEADERS = (b"content-encoding", b"content-length")
+
+# Media types whose bodies are already compressed
+_COMPRESSED_MEDIA_TYPES = ("application/gzip", "application/zstd")
+
+
+def select_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the preferred supported content coding from an Accept-Encoding header."""
+    qualities: dict[str, float] = {}
+    for coding in accept_encoding.split(","):
+        name, *params = (part.strip() for part in coding.split(";"))
+        if not name:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[name.lower()] = q
+
+    best, best_quality = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class _Compressor:
+    """Streaming compressor for one response body."""
+
+    def __init__(self, encoding: str, gzip_level: int, zstd_level: int):
+        """Initialize the compressor for the given content coding."""
+        if encoding == "gzip":
+            self._compressobj = zlib.compressobj(gzip_level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+        else:
+            self._compressobj = zstandard.ZstdCompressor(level=zstd_level).compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """Compress a chunk, flushing so the client can decode everything sent so far."""
+        compressed = self._compressobj.compress(data)
+        return compressed + (self._compressobj.flush() if final else self._compressobj.flush(self._flush_mode))
+
+
+class _Decompressor:
+    """Streaming decompressor for one request body that enforces a decompressed-size cap."""
+
+    def __init__(self, encoding: str, limit: int):
+        """Initialize the decompressor for the given content coding."""
+        self.encoding = encoding
+        self.limit = limit
+        self.size = 0
+        if encoding == "gzip":
+            self._decompressobj = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        else:
+            self._decompressobj = zstandard.ZstdDecompressor().decompressobj()
+
+    def _account(self, data: bytes) -> bytes:
+        """Count decompressed bytes against the cap."""
+        self.size += len(data)
+        if self.size > self.limit:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=EErrorMessage.REQUEST_BODY_TOO_LARGE.value.format(self.limit),
+            )
+        return data
+
+    def feed(self, data: bytes) -> bytes:
+        """Decompress a chunk of the request body."""
+        chunks = []
+        try:
+            if self.encoding == "gzip":
+                # zlib can bound its output directly; the rest of the input waits in unconsumed_tail
+                while data:
+                    chunks.append(self._account(self._decompressobj.decompress(data, self.limit - self.size + 1)))
+                    data = self._decompressobj.unconsumed_tail
+            else:
+                # zstd cannot, so feed slices small enough that even worst-case expansion stays under the cap
+                view = memoryview(data)
+                while view:
+                    step = max(1, (self.limit - self.size) // _ZSTD_MAX_RATIO)
+                    chunks.append(self._account(self._decompressobj.decompress(view[:step].tobytes())))
+                    view = view[step:]
+        except (zlib.error, zstandard.ZstdError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=EErrorMessage.INVALID_COMPRESSED_BODY.value.format(self.encoding),
+            ) from e
+        return b"".join(chunks)
+
+    def finish(self) -> bytes:
+        """Flush the decompressor at the end of the body and reject truncated input."""
+        remaining = self._account(self._decompressobj.flush()) if self.encoding == "gzip" else b""
+        if not self._decompressobj.eof:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=EErrorMessage.INVALID_COMPRESSED_BODY.value.format(self.encoding),
+            )
+        return remaining
+
+
+def _encoded_etag(etag: str, encoding: str) -> str:
+    """Give a compressed representation its own strong ETag; weak ETags already ignore encoding."""
+    if etag.startswith('"') and etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return etag
+
+
+class _CompressingSend:
+    """Wrap ``send`` to compress the response body once it reaches the minimum size."""
+
+    def __init__(
+        self,
+        send: Send,
+        encoding: str,
+        minimum_size: int,
+        gzip_level: int,
+        zstd_level: int,
+        validated_encoded: bool = False,
+    ):
+        """
+        Initialize with the downstream ``send`` and compression settings.
+
+        ``validated_encoded`` means the request's If-None-Match named the compressed representation,
+        so a 304 response must carry that representation's ETag.
+        """
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+        self.validated_encoded = validated_encoded
+        self.start_message: Optional[Message] = None
+        self.buffer = bytearray()
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def _send_start(self) -> None:
+        """Send the held response start message."""
+        if self.start_message is not None:
+            await self.send(self.start_message)
+            self.start_message = None
+
+    async def __call__(self, message: Message) -> None:
+        """Handle one outgoing ASGI message."""
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            # Responses that already carry an encoding or are compressed files (e.g. gzipped exports) are left alone
+            self.passthrough = "content-encoding" in headers or headers.get("content-type") in _COMPRESSED_MEDIA_TYPES
+            if message["status"] == status.HTTP_304_NOT_MODIFIED and self.validated_encoded and "etag" in headers:
+                mutable = MutableHeaders(raw=list(message["headers"]))
+                mutable["ETag"] = _encoded_etag(headers["etag"], self.encoding)
+                self.start_message = {**message, "headers": mutable.raw}
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send_start()
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is not None:
+            await self.send(
+                {
+                    "type": "http.response.body",
+                    "body": self.compressor.compress(body, final=not more_body),
+                    "more_body": more_body,
+                }
+            )
+            return
+
+        self.buffer += body
+        if len(self.buffer) < self.minimum_size:
+            if not more_body:
+                await self._send_start()
+                await self.send({"type": "http.response.body", "body": bytes(self.buffer)})
+            return
+
+        self.compressor = _Compressor(self.encoding, self.gzip_level, self.zstd_level)
+        compressed = self.compressor.compress(bytes(self.buffer), final=not more_body)
+        self.buffer.clear()
+
+        headers = MutableHeaders(raw=list(self.start_message["headers"]))
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if "etag" in headers:
+            headers["ETag"] = _encoded_etag(headers["etag"], self.encoding)
+        del headers["Content-Length"]
+        if not more_body:
+            headers["Content-Length"] = str(len(compressed))
+        self.start_message["headers"] = headers.raw
+
+        await self._send_start()
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with zstd or gzip and decompress compressed request bodies.
+
+    Responses are compressed when the client accepts a supported coding and the body reaches
+    ``minimum_size``. Request bodies are only decompressed for paths starting with one of
+    ``decompress_paths``, chunk by chunk, and rejected once they exceed ``max_request_size``.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        zstd_level: int = 3,
+        max_request_size: int = 100 * 1024 * 1024,
+        decompress_paths: tuple[str, ...] = (),
+    ):
+        """Initialize the middleware."""
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+        self.max_request_size = max_request_size
+        self.decompress_paths = decompress_paths
+
+    def _decompressing(self, scope: Scope, receive: Receive, encoding: str) -> tuple[Scope, Receive]:
+        """Return a scope and ``receive`` that present the request body decompressed."""
+        decompressor = _Decompressor(encoding, self.max_request_size)
+        # The app sees the decompressed body, so drop the headers that describe the compressed one
+        headers = [(key, value) for key, value in scope["headers"] if key not in _COMPRESSED_BODY_HEADERS]
+
+        async def receive_decompressed() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                body = decompressor.feed(message.get("body", b""))
+                if not message.get("more_body", False):
+                    body += decompressor.finish()
+                message = {**message, "body": body}
+            return message
+
+        return {**scope, "headers": headers}, receive_decompressed
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle an ASGI connection."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        content_encoding = headers.get("content-encoding", "identity").strip().lower()
+        if content_encoding != "identity" and scope["path"].startswith(self.decompress_paths):
+            if content_encoding not in SUPPORTED_ENCODINGS:
+                response = JSONResponse(
+                    {"detail": EErrorMessage.UNSUPPORTED_CONTENT_ENCODING.value.format(content_encoding)},
+                    status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                )
+                await response(scope, receive, send)
+                return
+            scope, receive = self._decompressing(scope, receive, content_encoding)
+
+        encoding = select_encoding(headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Validators of the compressed representation are passed on as the ETag the app itself produced
+        validated_encoded = False
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and f'-{encoding}"' in if_none_match:
+            validated_encoded = True
+            request_headers = [(key, value) for key, value in scope["headers"] if key != b"if-none-match"]
+            request_headers.append((b"if-none-match", if_none_match.replace(f'-{encoding}"', '"').encode("latin-1")))
+            scope = {**scope, "headers": request_headers}
+
+        await self.app(
+            scope,
+            receive,
+            _CompressingSend(
+                send, encoding, self.minimum_size, self.gzip_level, self.zstd_level, validated_encoded=validated_encoded
+            ),
+        )
@@ -0,0 +1,330 @@
+"""Idempotency-Key support: run a request once and replay its response to retries."""
+
+import asyncio
+import hashlib
+import math
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.constants.error_messages import EErrorMessage
+from app.db import resilience
+from app.db.idempotency_repository import COMPLETED, PENDING, IdempotencyRepository
+from app.db.partitions import as_utc
+from app.db.resilience import DatabaseUnavailableError, is_transient
+from app.utils.metrics import registry
+
+IDEMPOTENCY_REQUESTS = registry.counter(
+    "edi_idempotency_requests_total", "Requests carrying an Idempotency-Key", ("outcome",)
+)
+
+# Request headers that change what a body means or how the response is represented, and so belong in its fingerprint
+_FINGERPRINT_HEADERS = ("content-type", "content-encoding", "accept")
+
+REPLAYED_HEADER = "idempotent-replayed"
+
+
+class StoredResponse(NamedTuple):
+    """A response stored under an idempotency key."""
+
+    request_hash: str
+    status_code: int
+    headers: list[list[str]]
+    body: bytes
+    expires_at: datetime
+
+
+class IdempotencyMiddleware:
+    """
+    Run POST requests carrying an ``Idempotency-Key`` header once per key, and replay the response to retries.
+
+    Keys are scoped to the request path and bound to a fingerprint of the request; reusing a key for a
+    different request is rejected with 422. Responses are stored in MongoDB for ``ttl_seconds`` behind an
+    in-process LRU cache. Duplicates arriving while the original is still running wait for it, through an
+    in-process future on the same worker and by polling the pending record on any other. Error responses
+    (5xx and 429) and responses over ``max_response_bytes`` are not stored, so their retries run again.
+
+    It must run inside response compression, so that it stores the uncompressed response and each replay is
+    compressed for the retry's own Accept-Encoding. While the database is unavailable, keyed requests fail fast
+    with 503 rather than run without the protection of a claim.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        paths: Iterable[str],
+        ttl_seconds: float = 86400.0,
+        cache_size: int = 256,
+        max_response_bytes: int = 8 * 1024 * 1024,
+        max_key_length: int = 255,
+        lock_seconds: float = 300.0,
+        poll_interval: float = 0.5,
+    ):
+        """Initialize the middleware."""
+        self.app = app
+        self.paths = frozenset(paths)
+        self.ttl_seconds = ttl_seconds
+        self.cache_size = cache_size
+        self.max_response_bytes = max_response_bytes
+        self.max_key_length = max_key_length
+        self.lock_seconds = lock_seconds
+        self.poll_interval = poll_interval
+        self._cache: OrderedDict[str, StoredResponse] = OrderedDict()
+        self._inflight: dict[str, tuple[str, asyncio.Future]] = {}
+
+    def _cache_get(self, key: str) -> Optional[StoredResponse]:
+        """Get an unexpired response from the LRU cache."""
+        stored = self._cache.get(key)
+        if stored is None:
+            return None
+        if stored.expires_at <= datetime.now(UTC):
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return stored
+
+    def _cache_put(self, key: str, stored: StoredResponse) -> None:
+        """Add a response to the LRU cache, evicting the least recently used beyond its size."""
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = stored
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _fingerprint(scope: Scope, body: bytes) -> str:
+        """Hash what identifies a request: method, path, query string, body, its encoding and the accepted media."""
+        headers = Headers(scope=scope)
+        digest = hashlib.sha256()
+        for part in (scope["method"], scope["path"], scope["query_string"].decode("latin-1")):
+            digest.update(part.encode() + b"\0")
+        for name in _FINGERPRINT_HEADERS:
+            digest.update(headers.get(name, "").encode("latin-1") + b"\0")
+        digest.update(body)
+        return digest.hexdigest()
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes:
+        """Read the whole request body."""
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    @staticmethod
+    def _replay_receive(body: bytes, receive: Receive) -> Receive:
+        """Hand the already read body to the application, then pass on later messages such as disconnects."""
+        pending = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def replay() -> Message:
+            return pending.pop() if pending else await receive()
+
+        return replay
+
+    @staticmethod
+    def _from_record(record: dict) -> StoredResponse:
+        """Build a stored response from a completed record."""
+        return StoredResponse(
+            record["request_hash"],
+            record["status"],
+            record["headers"],
+            bytes(record["body"]),
+            as_utc(record["expires_at"]),
+        )
+
+    def _cacheable(self, status_code: int, size: int) -> bool:
+        """Whether a response is final enough to replay to retries."""
+        return (
+            status_code < status.HTTP_500_INTERNAL_SERVER_ERROR
+            and status_code != status.HTTP_429_TOO_MANY_REQUESTS
+            and size <= self.max_response_bytes
+        )
+
+    async def _execute(
+        self, key: str, request_hash: str, scope: Scope, receive: Receive, send: Send
+    ) -> Optional[StoredResponse]:
+        """
+        Run the request, streaming its response to the client while capturing it.
+
+        Returns:
+            The stored response, or None if it was not stored
+        """
+        start: dict = {}
+        chunks: list[bytes] = []
+        size = 0
+
+        async def capture(message: Message) -> None:
+            nonlocal size
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                size += len(body)
+                if size <= self.max_response_bytes:
+                    chunks.append(body)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        except BaseException:
+            await asyncio.shield(self._release(key))
+            raise
+
+        status_code = start.get("status", status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if not self._cacheable(status_code, size):
+            await self._release(key)
+            return None
+
+        headers = [[name.decode("latin-1"), value.decode("latin-1")] for name, value in start.get("headers", [])]
+        body = b"".join(chunks)
+        try:
+            expires_at = await IdempotencyRepository.complete(key, status_code, headers, body, self.ttl_seconds)
+        except Exception as e:
+            # The response has been sent; retries run the request again once the pending claim expires
+            print(f"❌ Failed to store the response of idempotency key {key}: {e}")
+            return None
+        stored = StoredResponse(request_hash, status_code, headers, body, expires_at)
+        self._cache_put(key, stored)
+        return stored
+
+    @staticmethod
+    async def _release(key: str) -> None:
+        """Drop a claim, leaving it to expire if the database cannot be reached."""
+        try:
+            await IdempotencyRepository.release(key)
+        except Exception as e:
+            print(f"❌ Failed to release idempotency key {key}: {e}")
+
+    async def _wait_for(self, key: str, record: Optional[dict]) -> Optional[StoredResponse]:
+        """
+        Poll a record claimed by another worker until its response is stored.
+
+        Returns:
+            The stored response, or None once the claim was released or its lease expired
+        """
+        while record is not None and record["state"] == PENDING:
+            if as_utc(record["expires_at"]) <= datetime.now(UTC):
+                return None
+            await asyncio.sleep(self.poll_interval)
+            record = await IdempotencyRepository.get(key)
+        if record is None or record["state"] != COMPLETED:
+            return None
+        stored = self._from_record(record)
+        self._cache_put(key, stored)
+        return stored
+
+    async def _resolve(
+        self, key: str, request_hash: str, scope: Scope, receive: Receive, send: Send
+    ) -> tuple[Optional[StoredResponse], str]:
+        """
+        Run the request or find the response to replay.
+
+        Returns:
+            The response to replay, or None if it has already been sent or the key must be resolved again, and
+            the outcome
+        """
+        stored = self._cache_get(key)
+        if stored is not None:
+            return stored, "replayed"
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            inflight_hash, future = inflight
+            if inflight_hash != request_hash:
+                return None, "conflict"
+            return await asyncio.shield(future), "waited"
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (request_hash, future)
+        stored = None
+        try:
+            record = await IdempotencyRepository.claim(key, request_hash, self.lock_seconds)
+            if record is None:
+                stored = await self._execute(key, request_hash, scope, receive, send)
+                return None, "executed"
+            if record["request_hash"] != request_hash:
+                return None, "conflict"
+            outcome = "replayed" if record["state"] == COMPLETED else "waited"
+            stored = await self._wait_for(key, record)
+            return stored, outcome
+        finally:
+            del self._inflight[key]
+            future.set_result(stored)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle an ASGI connection."""
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        idempotency_key = Headers(scope=scope).get("idempotency-key")
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not 0 < len(idempotency_key) <= self.max_key_length:
+            response = JSONResponse(
+                {"detail": EErrorMessage.IDEMPOTENCY_KEY_INVALID.value.format(self.max_key_length)},
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            body = await self._read_body(receive)
+        except HTTPException as e:
+            # Raised by request decompression outside the app's exception handlers, so answer it here
+            response = JSONResponse({"detail": e.detail}, status_code=e.status_code, headers=e.headers)
+            await response(scope, receive, send)
+            return
+        request_hash = self._fingerprint(scope, body)
+        key = f"{scope['path']}:{idempotency_key}"
+        receive = self._replay_receive(body, receive)
+
+        while True:
+            try:
+                stored, outcome = await self._resolve(key, request_hash, scope, receive, send)
+            except Exception as e:
+                if not (isinstance(e, DatabaseUnavailableError) or is_transient(e)):
+                    raise
+                IDEMPOTENCY_REQUESTS.inc(outcome="unavailable")
+                response = JSONResponse(
+                    {"detail": EErrorMessage.DATABASE_UNAVAILABLE.value},
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={"Retry-After": str(math.ceil(resilience.get_breaker().retry_after) or 1)},
+                )
+                await response(scope, receive, send)
+                return
+            if outcome == "executed":
+                IDEMPOTENCY_REQUESTS.inc(outcome=outcome)
+                return
+            if stored is not None and stored.request_hash != request_hash:
+                outcome = "conflict"
+            if outcome == "conflict":
+                IDEMPOTENCY_REQUESTS.inc(outcome=outcome)
+                response = JSONResponse(
+                    {"detail": EErrorMessage.IDEMPOTENCY_KEY_REUSED.value},
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+                await response(scope, receive, send)
+                return
+            if stored is not None:
+                break
+            # The original was not stored, or its worker stopped; resolve again, running the request if no one is
+
+        IDEMPOTENCY_REQUESTS.inc(outcome=outcome)
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in stored.headers]
+        headers.append((REPLAYED_HEADER.encode(), b"true"))
+        await send({"type": "http.response.start", "status": stored.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": stored.body, "more_body": False})
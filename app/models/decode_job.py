@@ -0,0 +1,30 @@
+"""Asynchronous decode job model."""
+
+from datetime import UTC, datetime
+from typing import Optional
+
+from bson import ObjectId
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.constants.decode_job import EDecodeJobStatus
+from app.models.responses import ProcessingError
+
+
+class DecodeJob(BaseModel):
+    """Decode job for an EDI document whose payload is stored in GridFS under the job ID."""
+
+    id: str = Field(default_factory=lambda: str(ObjectId()), alias="_id")
+    status: EDecodeJobStatus = EDecodeJobStatus.PENDING
+    payload_size: int = 0
+    total_groups: Optional[int] = None
+    processed_groups: int = 0  # LIN groups whose items are committed; processing resumes here
+    cargo_item_count: int = 0
+    error_count: int = 0
+    errors: list[ProcessingError] = []
+    attempts: int = 0
+    worker_id: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    completed_at: Optional[datetime] = None
+
+    model_config = ConfigDict(populate_by_name=True)
@@ -14,6 +14,10 @@ class EDIMessage(BaseModel):
     edi_content: str
     cargo_item_ids: list[str]
     created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    content_size: Optional[int] = None  # UTF-8 bytes, as stored before compression
+    content_hash: Optional[str] = None  # SHA-256 hex digest of the content
+    group_hashes: Optional[list[str]] = None  # Hash of the LIN group behind each cargo item, for amendments
+    previous_message_id: Optional[str] = None  # The message this one amends
 
     class Config:
         """Pydantic model configuration."""
@@ -1,9 +1,12 @@
 """Response models for API endpoints."""
 
+from datetime import date, datetime
 from typing import Any, Optional
 
 from pydantic import BaseModel, ConfigDict
 
+from app.constants.cargo import ECargoType
+from app.constants.decode_job import EDecodeJobStatus
 from app.models.cargo_item import CargoItem
 
 
@@ -16,19 +19,207 @@ class ProcessingError(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class CargoTypeTotals(BaseModel):
+    """Number of cargo items and packages of one cargo type."""
+
+    cargo_type: ECargoType
+    items: int
+    packages: int
+
+
+class ContainerSummary(BaseModel):
+    """Number of cargo items and packages in one container."""
+
+    container_number: str
+    items: int
+    packages: int
+
+
+class MasterBillSummary(BaseModel):
+    """Number of house bills, cargo items and packages under one master bill of lading."""
+
+    master_bill_of_lading_number: str
+    house_bills: int  # Distinct house bill numbers
+    items: int
+    packages: int
+
+
+class ManifestSummary(BaseModel):
+    """Totals over the cargo items of one decoded manifest."""
+
+    items: int
+    packages: int
+    cargo_types: list[CargoTypeTotals]
+    containers: int  # Distinct container numbers
+    packages_per_container: list[ContainerSummary]
+    house_bills: int  # Distinct house bill numbers
+    master_bills: list[MasterBillSummary]
+
+
 class EDIDecodeResponse(BaseModel):
     """Response model for EDI decode endpoint."""
 
     cargo_items: list[CargoItem]
     errors: Optional[list[dict[str, Any]]] = None
+    message_id: Optional[str] = None  # Set when the message was stored; see GET /edi/messages/{id}
+    summary: Optional[ManifestSummary] = None  # Set when requested with summary=true
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class EDIDecodeFieldsResponse(BaseModel):
+    """Response model for EDI decode endpoint with selected cargo item fields."""
+
+    cargo_items: list[dict[str, Any]]  # Only the requested fields, plus ``id``
+    errors: Optional[list[dict[str, Any]]] = None
+    message_id: Optional[str] = None
+    summary: Optional[ManifestSummary] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class EDIIdsResponse(BaseModel):
+    """Response model for decode and generate with ``view=ids``."""
+
+    cargo_item_ids: list[str]  # In message order
+    errors: Optional[list[dict[str, Any]]] = None
+    message_id: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class EDISummaryResponse(BaseModel):
+    """Response model for decode and generate with ``view=summary``."""
+
+    summary: ManifestSummary
+    errors: Optional[list[dict[str, Any]]] = None
+    message_id: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CargoItemChange(BaseModel):
+    """A cargo item that replaces an item of the previous message version."""
+
+    previous_id: str
+    cargo_item: CargoItem
+
+
+class EDIDecodeDiffResponse(BaseModel):
+    """Response model for decoding an amended message against its previous version."""
+
+    message_id: Optional[str] = None
+    previous_message_id: str
+    added: list[CargoItem]
+    changed: list[CargoItemChange]
+    removed: list[str]  # IDs of previous items missing from the amendment
+    unchanged: int  # Number of LIN groups reused without being parsed
+    errors: Optional[list[dict[str, Any]]] = None
+
+
 class EDIGenerateResponse(BaseModel):
     """Response model for EDI generate endpoint."""
 
     edi_content: str
     errors: Optional[list[dict[str, Any]]] = None
+    message_id: Optional[str] = None  # Set when the message was stored; see GET /edi/messages/{id}
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class EDIBatchDecodeResult(BaseModel):
+    """Decode result for one document of a batch."""
+
+    index: int
+    cargo_items: list[CargoItem]
+    errors: Optional[list[dict[str, Any]]] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class EDIBatchDecodeResponse(BaseModel):
+    """Response model for EDI batch decode endpoint."""
+
+    results: list[EDIBatchDecodeResult]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class DecodeJobCreatedResponse(BaseModel):
+    """Response model for decode job creation."""
+
+    job_id: str
+    status: EDecodeJobStatus
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class DecodeJobProgress(BaseModel):
+    """Progress of a decode job in LIN groups."""
+
+    processed_groups: int
+    total_groups: Optional[int] = None
+
+
+class DecodeJobResponse(BaseModel):
+    """Response model for decode job status and a page of its results."""
+
+    job_id: str
+    status: EDecodeJobStatus
+    progress: DecodeJobProgress
+    cargo_item_count: int
+    error_count: int
+    errors: Optional[list[dict[str, Any]]] = None
+    cargo_items: list[CargoItem]
+    next_cursor: Optional[int] = None  # Pass as ``cursor`` to get the next page
+    created_at: datetime
+    completed_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class CargoItemPageResponse(BaseModel):
+    """Response model for a page of cargo item search results."""
+
+    cargo_items: list[dict[str, Any]]  # Only the requested fields, plus ``id``
+    next_cursor: Optional[str] = None  # Pass as ``cursor`` to get the next page
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class EDIMessageResponse(BaseModel):
+    """Response model for a stored EDI message."""
+
+    id: str
+    edi_content: str
+    cargo_item_ids: list[str]
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class EDIMessageCargoItemsResponse(BaseModel):
+    """Response model for the cargo items of a stored EDI message."""
+
+    message_id: str
+    cargo_items: list[dict[str, Any]]  # Only the requested fields, plus ``id``
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CargoDailyStats(BaseModel):
+    """Number of cargo items and packages stored on one day for one cargo type."""
+
+    day: date
+    cargo_type: ECargoType
+    items: int
+    packages: int
+
+
+class CargoStatsResponse(BaseModel):
+    """Response model for cargo statistics over a date range."""
+
+    date_from: date
+    date_to: date  # Inclusive
+    days: list[CargoDailyStats]  # Days without items are left out
+    totals: list[CargoTypeTotals]
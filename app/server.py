@@ -0,0 +1,109 @@
+"""Production server runtime."""
+
+import importlib.util
+import os
+import sys
+from typing import Any, Optional
+
+from app.config import Settings, get_settings
+
+
+def _has_module(name: str) -> bool:
+    """Check whether an optional module is installed without importing it."""
+    return importlib.util.find_spec(name) is not None
+
+
+def resolve_worker_count(configured: Optional[int] = None) -> int:
+    """Use the configured worker count, or one worker per CPU available to this process."""
+    if configured:
+        return max(1, configured)
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:  # Not available on macOS and Windows
+        return os.cpu_count() or 1
+
+
+def uvicorn_options(settings: Settings) -> dict[str, Any]:
+    """Build the uvicorn runtime options, preferring uvloop and httptools when installed."""
+    return {
+        "loop": "uvloop" if _has_module("uvloop") else "asyncio",
+        "http": "httptools" if _has_module("httptools") else "h11",
+        "timeout_keep_alive": settings.KEEP_ALIVE_SECONDS,
+        "backlog": settings.BACKLOG,
+        "timeout_graceful_shutdown": settings.GRACEFUL_SHUTDOWN_SECONDS,
+    }
+
+
+def _run_gunicorn(settings: Settings, workers: int, options: dict[str, Any]) -> None:
+    """Pre-fork uvicorn workers from an app that is built once in the master process."""
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+
+    from app.main import create_app
+
+    class Worker(UvicornWorker):
+        """Uvicorn worker using the selected event loop, HTTP parser and shutdown grace period."""
+
+        CONFIG_KWARGS = {
+            "loop": options["loop"],
+            "http": options["http"],
+            "timeout_graceful_shutdown": options["timeout_graceful_shutdown"],
+        }
+
+    class Application(BaseApplication):
+        """Gunicorn application serving the preloaded FastAPI app."""
+
+        def __init__(self, app: Any):
+            """Initialize with the app shared by all forked workers."""
+            self.application = app
+            super().__init__()
+
+        def load_config(self) -> None:
+            """Apply the runtime settings to gunicorn."""
+            self.cfg.set("bind", f"{settings.HOST}:{settings.PORT}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", Worker)
+            self.cfg.set("preload_app", True)
+            self.cfg.set("keepalive", options["timeout_keep_alive"])
+            self.cfg.set("backlog", options["backlog"])
+            # Give workers time to drain in-flight requests before they are killed
+            self.cfg.set("graceful_timeout", options["timeout_graceful_shutdown"])
+            self.cfg.set("accesslog", "-")
+
+        def load(self) -> Any:
+            """Return the preloaded app."""
+            return self.application
+
+    # Built before forking; the database client is only created per worker on startup
+    Application(create_app()).run()
+
+
+def _run_uvicorn(settings: Settings, workers: int, options: dict[str, Any]) -> None:
+    """Run uvicorn directly, spawning workers that each build their own app."""
+    import uvicorn
+
+    uvicorn.run(
+        "app.main:create_app",
+        factory=True,
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=workers,
+        **options,
+    )
+
+
+def main() -> None:
+    """Start the production server."""
+    settings = get_settings()
+    workers = resolve_worker_count(settings.WEB_CONCURRENCY)
+    options = uvicorn_options(settings)
+    use_gunicorn = sys.platform != "win32" and _has_module("gunicorn")
+
+    print(
+        f"🚀 Starting {workers} worker(s) on {settings.HOST}:{settings.PORT} "
+        f"(loop={options['loop']}, http={options['http']}, preload={use_gunicorn})"
+    )
+    if use_gunicorn:
+        _run_gunicorn(settings, workers, options)
+    else:
+        _run_uvicorn(settings, workers, options)
@@ -0,0 +1,77 @@
+"""Streaming export of stored cargo items to tabular files."""
+
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Any, Optional
+
+from app.config import get_settings
+from app.constants import EOutputFormat
+from app.db.cargo_repository import CargoRepository
+from app.utils.projection import project_document
+from app.utils.tabular import EXPORT_COLUMNS, encode_rows
+
+# Media types of exported formats
+EXPORT_MEDIA_TYPES = {EOutputFormat.NDJSON: "application/x-ndjson", EOutputFormat.CSV: "text/csv"}
+
+
+def export_columns(fields: Optional[list[str]]) -> dict[str, type]:
+    """Output columns for the selected fields; ``id`` always comes first."""
+    if not fields:
+        return EXPORT_COLUMNS
+    return {"id": str, **{field: EXPORT_COLUMNS[field] for field in fields}}
+
+
+def export_row(doc: dict[str, Any], fields: Optional[list[str]]) -> dict[str, Any]:
+    """Convert a stored document to an export row with an ISO 8601 creation time."""
+    row = project_document(doc, fields)
+    if isinstance(row.get("created_at"), datetime):
+        row["created_at"] = row["created_at"].isoformat()
+    return row
+
+
+async def _export_batches(
+    filters: dict[str, str],
+    batch_size: int,
+    created_from: Optional[datetime],
+    created_to: Optional[datetime],
+    fields: Optional[list[str]],
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """Read matching items through the cursor and convert each batch to rows."""
+    async for docs in CargoRepository.iter_cargo_item_documents(filters, batch_size, created_from, created_to, fields):
+        yield [export_row(doc, fields) for doc in docs]
+
+
+def export_cargo_items(
+    output_format: EOutputFormat,
+    filters: dict[str, str],
+    batch_size: int,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    fields: Optional[list[str]] = None,
+    compress: bool = False,
+) -> AsyncIterator[bytes]:
+    """
+    Export matching cargo items, oldest first, without holding the result set in memory.
+
+    Args:
+        output_format: NDJSON or CSV
+        filters: Exact values for lookup fields
+        batch_size: Items read per cursor round trip and encoded per chunk
+        created_from: Only items created at or after this time
+        created_to: Only items created before this time
+        fields: Fields to export, or None for all; ``id`` is always included
+        compress: Gzip the output on the fly, at ``EXPORT_GZIP_LEVEL``
+
+    Returns:
+        The encoded export, chunk by chunk
+
+    Raises:
+        ValueError: If the format cannot be streamed
+    """
+    return encode_rows(
+        _export_batches(filters, batch_size, created_from, created_to, fields),
+        output_format,
+        export_columns(fields),
+        compress,
+        get_settings().EXPORT_GZIP_LEVEL,
+    )
@@ -1,26 +1,127 @@
 """Service for decoding EDI messages."""
 
+import asyncio
+from collections import defaultdict, deque
+from typing import NamedTuple, Optional
+
+from bson import ObjectId
+
 from app.constants.error_messages import EErrorMessage
-from app.db.cargo_repository import CargoRepository
+from app.db.cargo_repository import LOOKUP_FIELDS, CargoRepository
 from app.db.edi_repository import EDIRepository
 from app.models.cargo_item import CargoItem
 from app.models.responses import ProcessingError
-from app.utils.cargo_edi.message_processor import parse_edi_message
+from app.utils.cargo_edi.edi_parser import iter_hashed_groups, iter_message_groups
+from app.utils.cargo_edi.message_processor import (
+    hash_decoded_groups,
+    match_message_groups,
+    parse_edi_message,
+    parse_message_groups,
+)
 from app.utils.validation import validate_ascii_characters
 
 
+class EDIMessageDiff(NamedTuple):
+    """Differences between a decoded amendment and the previous version of the message."""
+
+    added: list[CargoItem]
+    changed: list[tuple[str, CargoItem]]  # (previous item ID, new item)
+    removed: list[str]  # IDs of previous items missing from the amendment
+    unchanged: int
+
+
 class EDIDecodingService:
     """Service for decoding EDI messages."""
 
-    def __init__(self, cargo_repository: CargoRepository, edi_repository: EDIRepository):
-        """Initialize with required repositories."""
+    def __init__(
+        self,
+        cargo_repository: CargoRepository,
+        edi_repository: EDIRepository,
+        pipeline_batch_groups: int = 500,
+        pipeline_queue_size: int = 4,
+    ):
+        """Initialize with required repositories and decode pipeline limits."""
         self.cargo_repository = cargo_repository
         self.edi_repository = edi_repository
+        self.pipeline_batch_groups = pipeline_batch_groups
+        self.pipeline_queue_size = pipeline_queue_size
+        self.message_id: Optional[str] = None  # ID of the message stored by the last decode_edi_message call
+
+    def _parse_edi_message(self, edi_content: str) -> tuple[list[CargoItem], list[ProcessingError]]:
+        """Validate and parse an EDI message without storing anything."""
+        if not edi_content:
+            return [], [ProcessingError(message=EErrorMessage.NO_ITEMS.value)]
+
+        # Validate ASCII characters first
+        validation_errors = validate_ascii_characters(edi_content)
+        if validation_errors:
+            return [], validation_errors
+
+        try:
+            cargo_items, errors = parse_edi_message(edi_content)
+        except Exception as e:
+            return [], [ProcessingError(message=f"{EErrorMessage.PROCESSING_ERROR}: {str(e)}")]
+
+        # Convert any errors to ProcessingError format if they're not already
+        formatted_errors = []
+        for error in errors:
+            if isinstance(error, ProcessingError):
+                formatted_errors.append(error)
+            else:
+                formatted_errors.append(ProcessingError(message=error["error"], index=error.get("index")))
+
+        return cargo_items, formatted_errors
+
+    async def _write_cargo_batches(
+        self, queue: "asyncio.Queue[list[CargoItem] | None]", errors: list[ProcessingError]
+    ) -> list[str]:
+        """
+        Drain parsed cargo item batches from the queue into the database.
+
+        After a failed write the remaining batches are still drained, so the parser never blocks on a full queue,
+        and the batches written before it are deleted again.
+
+        Returns:
+            IDs of the stored cargo items, in parse order, or an empty list if a write failed
+        """
+        cargo_ids: list[str] = []
+        failed = False
+        while (batch := await queue.get()) is not None:
+            if failed:
+                continue
+            try:
+                batch_ids = await self.cargo_repository.create_cargo_items(batch)
+            except Exception as e:
+                errors.append(
+                    ProcessingError(message=EErrorMessage.FAILED_TO_STORE.value.format("cargo items", str(e)))
+                )
+                failed = True
+                continue
+            for item, item_id in zip(batch, batch_ids):
+                item.id = item_id
+            cargo_ids.extend(batch_ids)
+        if failed:
+            await self._delete_written(cargo_ids)
+            return []
+        return cargo_ids
+
+    async def _delete_written(self, cargo_ids: list[str]) -> None:
+        """Delete the items of a message that could not be stored completely."""
+        # Upserted items may belong to earlier messages as well, so they are left in place
+        if not cargo_ids or self.cargo_repository.upserts_natural_keys():
+            return
+        try:
+            await self.cargo_repository.delete_cargo_items(cargo_ids)
+        except Exception as e:
+            print(f"❌ Failed to delete {len(cargo_ids)} cargo items of a message that was not stored: {e}")
 
     async def decode_edi_message(self, edi_content: str) -> tuple[list[CargoItem], list[ProcessingError]]:
         """
         Decode an EDI message into a list of cargo items.
 
+        Parsing and storage overlap: batches of parsed items go through a bounded queue to a writer task,
+        which stores each batch while the next one is parsed off the event loop.
+
         Args:
             edi_content: The EDI message string to decode
 
@@ -29,49 +130,235 @@ class EDIDecodingService:
             - List of decoded cargo items
             - List of any errors encountered during decoding
         """
+        self.message_id = None
         if not edi_content:
             return [], [ProcessingError(message=EErrorMessage.NO_ITEMS.value)]
 
         # Validate ASCII characters first
         validation_errors = validate_ascii_characters(edi_content)
         if validation_errors:
-            return [], [
-                ProcessingError(message=error["error"], index=error.get("index")) for error in validation_errors
-            ]
+            return [], validation_errors
+
+        cargo_items: list[CargoItem] = []
+        errors: list[ProcessingError] = []
+        storage_errors: list[ProcessingError] = []
+        queue: asyncio.Queue[list[CargoItem] | None] = asyncio.Queue(maxsize=self.pipeline_queue_size)
+        writer = asyncio.create_task(self._write_cargo_batches(queue, storage_errors))
 
+        # Hash every group on the way through, so the stored message can be the base of a later amendment
+        group_hashes: list[str] = []
+        item_hashes: list[str] = []
+        groups = iter_hashed_groups(iter_message_groups(edi_content), group_hashes)
+        processed = 0
         try:
-            cargo_items, errors = parse_edi_message(edi_content)
+            while True:
+                batch, batch_errors, consumed = await asyncio.to_thread(
+                    parse_message_groups, groups, processed, self.pipeline_batch_groups
+                )
+                if not consumed:
+                    break
+                processed += consumed
+                errors.extend(batch_errors)
+                if batch:
+                    items = [item for _, item in batch]
+                    cargo_items.extend(items)
+                    item_hashes.extend(group_hashes[group_index] for group_index, _ in batch)
+                    await queue.put(items)
+        except Exception as e:
+            # Let the writer finish the batch it is storing and skip the rest, so every written item is known
+            while not queue.empty():
+                queue.get_nowait()
+            await queue.put(None)
+            await self._delete_written(await writer)
+            return [], [ProcessingError(message=f"{EErrorMessage.PROCESSING_ERROR.value}: {str(e)}")]
+
+        await queue.put(None)
+        cargo_ids = await writer
+
+        if not cargo_items and not errors:
+            return [], [ProcessingError(message=EErrorMessage.NO_ITEMS.value)]
+        errors.extend(storage_errors)
+
+        # Store EDI content with references to cargo items once every batch is written
+        if cargo_ids:
+            message_id = str(ObjectId())
+            try:
+                await self.edi_repository.store_edi_message(
+                    edi_content, cargo_ids, message_id=message_id, group_hashes=item_hashes
+                )
+                self.message_id = message_id
+            except Exception as e:
+                errors.append(
+                    ProcessingError(message=EErrorMessage.FAILED_TO_STORE.value.format("EDI message", str(e)))
+                )
+
+        return cargo_items, errors
+
+    async def _previous_item_ids(self, previous_message_id: str) -> Optional[dict[str, deque[str]]]:
+        """Cargo item IDs of a stored message by the hash of their LIN group, or None if it does not exist."""
+        stored = await self.edi_repository.get_group_hashes(previous_message_id)
+        if stored is None:
+            return None
+        cargo_item_ids, group_hashes = stored
+        if group_hashes is None:
+            # Messages stored before groups were hashed are hashed once from their content
+            message = await self.edi_repository.get_edi_message(previous_message_id)
+            group_hashes = await asyncio.to_thread(hash_decoded_groups, message.edi_content)
+
+        previous_ids: dict[str, deque[str]] = defaultdict(deque)
+        for hash_, cargo_item_id in zip(group_hashes, cargo_item_ids):
+            previous_ids[hash_].append(cargo_item_id)
+        return previous_ids
+
+    async def _pair_changed_items(
+        self, parsed: list[CargoItem], removed_ids: list[str]
+    ) -> tuple[list[tuple[str, CargoItem]], list[CargoItem]]:
+        """Pair parsed items with previous items that have the same identifiers, which makes them changes."""
+        previous_by_key: dict[tuple, deque[str]] = defaultdict(deque)
+        if parsed and removed_ids:
+            for doc in await self.cargo_repository.find_cargo_items_by_ids(removed_ids, list(LOOKUP_FIELDS)):
+                key = tuple(map(doc.get, LOOKUP_FIELDS))
+                if any(key):
+                    previous_by_key[key].append(str(doc["_id"]))
 
-            # Store valid cargo items in database if any were parsed
-            if cargo_items:
-                try:
-                    # Store all cargo items at once
-                    cargo_ids = await self.cargo_repository.create_cargo_items(cargo_items)
-                    # Update items with their IDs
-                    for item, item_id in zip(cargo_items, cargo_ids):
+        changed, added = [], []
+        for item in parsed:
+            key = tuple(getattr(item, field) for field in LOOKUP_FIELDS)
+            if any(key) and previous_by_key.get(key):
+                changed.append((previous_by_key[key].popleft(), item))
+            else:
+                added.append(item)
+        return changed, added
+
+    async def decode_amendment(
+        self, edi_content: str, previous_message_id: str
+    ) -> tuple[Optional[EDIMessageDiff], list[ProcessingError]]:
+        """
+        Decode a new version of a stored message, parsing and storing only the LIN groups that changed.
+
+        Groups are matched to the previous version by content hash, so unchanged groups keep their cargo items
+        without being parsed or written. Parsed items with the same identifiers as a previous item that is no
+        longer present count as changed, the others as added. Stored items are never modified, since the
+        previous message still refers to them.
+
+        Args:
+            edi_content: The new version of the message
+            previous_message_id: ID of the stored previous version
+
+        Returns:
+            Tuple containing:
+            - The differences to the previous version, or None if nothing could be decoded
+            - List of any errors encountered during decoding
+        """
+        self.message_id = None
+        if not edi_content:
+            return None, [ProcessingError(message=EErrorMessage.NO_ITEMS.value)]
+        validation_errors = validate_ascii_characters(edi_content)
+        if validation_errors:
+            return None, validation_errors
+
+        previous_ids = await self._previous_item_ids(previous_message_id)
+        if previous_ids is None:
+            return None, [ProcessingError(message=EErrorMessage.MESSAGE_NOT_FOUND.value.format(previous_message_id))]
+
+        try:
+            groups, errors = await asyncio.to_thread(match_message_groups, edi_content, previous_ids)
+        except Exception as e:
+            return None, [ProcessingError(message=f"{EErrorMessage.PROCESSING_ERROR.value}: {str(e)}")]
+        if not groups:
+            return None, errors or [ProcessingError(message=EErrorMessage.NO_ITEMS.value)]
+
+        parsed = [item for _, _, item in groups if item is not None]
+        removed_ids = [cargo_item_id for ids in previous_ids.values() for cargo_item_id in ids]
+        changed, added = await self._pair_changed_items(parsed, removed_ids)
+        changed_ids = {previous_id for previous_id, _ in changed}
+
+        # Changed items are new versions of items the previous message still refers to, so they are never upserted
+        changed_items = [item for _, item in changed]
+        try:
+            for items, upsert in ((changed_items, False), (added, None)):
+                if items:
+                    for item, item_id in zip(items, await self.cargo_repository.create_cargo_items(items, upsert)):
                         item.id = item_id
+        except Exception as e:
+            # Changed items were inserted rather than upserted, so nothing else refers to them yet
+            inserted_ids = [item.id for item in changed_items if item.id]
+            if inserted_ids:
+                await self.cargo_repository.delete_cargo_items(inserted_ids)
+            errors.append(ProcessingError(message=EErrorMessage.FAILED_TO_STORE.value.format("cargo items", str(e))))
+            return None, errors
+
+        message_id = str(ObjectId())
+        try:
+            await self.edi_repository.store_edi_message(
+                edi_content,
+                [previous_id or item.id for _, previous_id, item in groups],
+                message_id=message_id,
+                group_hashes=[hash_ for hash_, _, _ in groups],
+                previous_message_id=previous_message_id,
+            )
+            self.message_id = message_id
+        except Exception as e:
+            errors.append(ProcessingError(message=EErrorMessage.FAILED_TO_STORE.value.format("EDI message", str(e))))
+
+        diff = EDIMessageDiff(
+            added=added,
+            changed=changed,
+            removed=[cargo_item_id for cargo_item_id in removed_ids if cargo_item_id not in changed_ids],
+            unchanged=len(groups) - len(parsed),
+        )
+        return diff, errors
+
+    async def decode_edi_messages(
+        self, documents: list[str], concurrency: int
+    ) -> list[tuple[list[CargoItem], list[ProcessingError]]]:
+        """
+        Decode several EDI messages and store them with one bulk write per collection.
+
+        Args:
+            documents: The EDI message strings to decode
+            concurrency: Maximum number of documents parsed at the same time
+
+        Returns:
+            One (cargo items, errors) tuple per document, in input order
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def parse(edi_content: str) -> tuple[list[CargoItem], list[ProcessingError]]:
+            async with semaphore:
+                # Parse off the event loop so a large document does not stall other requests
+                return await asyncio.to_thread(self._parse_edi_message, edi_content)
 
-                    # Store EDI content with references to cargo items
-                    try:
-                        await self.edi_repository.store_edi_message(edi_content, cargo_ids)
-                    except Exception as e:
-                        errors.append(
-                            ProcessingError(message=EErrorMessage.FAILED_TO_STORE.value.format("EDI message", str(e)))
-                        )
-                except Exception as e:
-                    errors.append(
-                        ProcessingError(message=EErrorMessage.FAILED_TO_STORE.value.format("cargo items", str(e)))
-                    )
-
-            # Convert any errors to ProcessingError format if they're not already
-            formatted_errors = []
-            for error in errors:
-                if isinstance(error, ProcessingError):
-                    formatted_errors.append(error)
-                else:
-                    formatted_errors.append(ProcessingError(message=error["error"], index=error.get("index")))
-
-            return cargo_items, formatted_errors
+        results = await asyncio.gather(*(parse(edi_content) for edi_content in documents))
+        decoded = [(edi_content, items, errors) for edi_content, (items, errors) in zip(documents, results) if items]
+        if not decoded:
+            return list(results)
 
+        try:
+            cargo_ids = await self.cargo_repository.create_cargo_items(
+                [item for _, items, _ in decoded for item in items]
+            )
         except Exception as e:
-            return [], [ProcessingError(message=f"{EErrorMessage.PROCESSING_ERROR}: {str(e)}")]
+            for _, _, errors in decoded:
+                errors.append(
+                    ProcessingError(message=EErrorMessage.FAILED_TO_STORE.value.format("cargo items", str(e)))
+                )
+            return list(results)
+
+        # Update items with their IDs, then store one EDI message per document
+        id_iter = iter(cargo_ids)
+        messages = []
+        for edi_content, items, _ in decoded:
+            for item in items:
+                item.id = next(id_iter)
+            messages.append((edi_content, [item.id for item in items]))
+
+        try:
+            await self.edi_repository.store_edi_messages(messages)
+        except Exception as e:
+            for _, _, errors in decoded:
+                errors.append(
+                    ProcessingError(message=EErrorMessage.FAILED_TO_STORE.value.format("EDI message", str(e)))
+                )
+
+        return list(results)
@@ -0,0 +1,153 @@
+"""Service for processing asynchronous decode jobs."""
+
+import asyncio
+import contextlib
+import os
+import socket
+from itertools import islice
+
+from app.constants.error_messages import EErrorMessage
+from app.db.cargo_repository import CargoRepository
+from app.db.decode_job_repository import DecodeJobRepository
+from app.models.decode_job import DecodeJob
+from app.models.responses import ProcessingError
+from app.utils.cargo_edi.edi_parser import count_message_groups, iter_message_groups
+from app.utils.cargo_edi.message_processor import parse_message_groups
+from app.utils.validation import validate_ascii_characters
+
+
+def _error_message(error: Exception) -> str:
+    """Get the message of an exception raised with an error message constant."""
+    message = error.args[0] if error.args else error
+    return str(getattr(message, "value", message))
+
+
+def _read_payload(payload: bytes) -> tuple[str, list[ProcessingError]]:
+    """Decode and validate a job's payload; job payloads can be large, so this runs in a thread."""
+    # Payloads are ASCII; latin-1 keeps any stray bytes so validation can report them
+    edi_content = payload.decode("latin-1")
+    return edi_content, validate_ascii_characters(edi_content, "edi_content")
+
+
+class EDIDecodeJobService:
+    """Service for decoding a job's document chunk by chunk, committing progress as it goes."""
+
+    def __init__(
+        self,
+        cargo_repository: CargoRepository,
+        job_repository: DecodeJobRepository,
+        chunk_groups: int,
+        lease_seconds: float,
+        max_attempts: int,
+        max_errors: int,
+    ):
+        """Initialize with required repositories and processing limits."""
+        self.cargo_repository = cargo_repository
+        self.job_repository = job_repository
+        self.chunk_groups = chunk_groups
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.max_errors = max_errors
+
+    async def process_job(self, job: DecodeJob, worker_id: str) -> None:
+        """
+        Decode a claimed job, resuming after its last committed group.
+
+        Args:
+            job: The claimed job
+            worker_id: Identifier of the worker holding the job's lease
+        """
+        if job.attempts > self.max_attempts:
+            await self.job_repository.finish_job(
+                job.id, worker_id, ProcessingError(message=EErrorMessage.JOB_ATTEMPTS_EXCEEDED.value)
+            )
+            return
+
+        payload = await self.job_repository.load_payload(job.id)
+        edi_content, validation_errors = await asyncio.to_thread(_read_payload, payload)
+        if validation_errors:
+            await self.job_repository.finish_job(job.id, worker_id, validation_errors[0])
+            return
+
+        if job.total_groups is None:
+            job.total_groups = await asyncio.to_thread(count_message_groups, edi_content)
+            await self.job_repository.set_total_groups(job.id, worker_id, job.total_groups)
+
+        # Drop items of a chunk that was written but not committed before the previous worker stopped
+        await self.cargo_repository.delete_job_cargo_items(job.id, job.processed_groups)
+
+        groups = iter_message_groups(edi_content)
+        processed = job.processed_groups
+        try:
+            await asyncio.to_thread(lambda: next(islice(groups, processed, processed), None))
+            while True:
+                cargo_items, errors, consumed = await asyncio.to_thread(
+                    parse_message_groups, groups, processed, self.chunk_groups
+                )
+                if not consumed:
+                    break
+                await self.cargo_repository.create_job_cargo_items(job.id, cargo_items)
+                processed += consumed
+                committed = await self.job_repository.commit_progress(
+                    job.id, worker_id, processed, len(cargo_items), errors, self.lease_seconds, self.max_errors
+                )
+                if not committed:  # Lease lost to another worker
+                    return
+        except ValueError as e:
+            await self.job_repository.finish_job(job.id, worker_id, ProcessingError(message=_error_message(e)))
+            return
+
+        await self.job_repository.finish_job(job.id, worker_id)
+
+
+class DecodeJobWorkerPool:
+    """Pool of background workers that claim and process decode jobs."""
+
+    def __init__(self, service: EDIDecodeJobService, workers: int, poll_interval: float):
+        """Initialize with the job service, number of workers and idle poll interval."""
+        self.service = service
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    def notify(self) -> None:
+        """Wake idle workers, e.g. after a job was created in this process."""
+        self._wakeup.set()
+
+    async def _idle(self) -> None:
+        """Wait until notified or the poll interval elapses."""
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+        self._wakeup.clear()
+
+    async def _run(self, worker_id: str) -> None:
+        """Claim and process jobs until cancelled."""
+        while True:
+            job = None
+            try:
+                job = await self.service.job_repository.claim_job(worker_id, self.service.lease_seconds)
+                if job is None:
+                    await self._idle()
+                    continue
+                await self.service.process_job(job, worker_id)
+            except asyncio.CancelledError:
+                if job is not None:
+                    await self.service.job_repository.release_job(job.id, worker_id)
+                raise
+            except Exception as e:
+                # The lease expires and the job is resumed from its last committed group
+                print(f"❌ Decode job worker {worker_id} failed: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def start(self) -> None:
+        """Start the workers."""
+        self._tasks = [asyncio.create_task(self._run(f"{self.worker_prefix}:{index}")) for index in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Stop the workers, releasing the jobs they hold."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -1,40 +1,48 @@
 from typing import Any, Optional, Union
 
+from bson import ObjectId
 from pydantic import ValidationError
 
 from app.constants.error_messages import EErrorMessage
-from app.db.cargo_repository import CargoRepository
-from app.db.edi_repository import EDIRepository
+from app.db.outbox import repositories
 from app.models.cargo_item import CargoItem
 from app.models.responses import ProcessingError
 from app.utils.cargo_edi import generate_edi_segment
 from app.utils.validation import validate_ascii_characters
 
 
+def validate_cargo_item(
+    cargo_item: Union[dict[str, Any], CargoItem], index: int
+) -> tuple[Optional[CargoItem], list[ProcessingError]]:
+    """Validate a cargo item and convert it to CargoItem if needed."""
+    try:
+        # First validate cargo type through Pydantic model
+        if isinstance(cargo_item, dict):
+            cargo_item = CargoItem(**cargo_item)
+
+        # Then validate ASCII characters
+        ascii_errors = validate_ascii_characters(cargo_item.dict())
+        if ascii_errors:
+            return None, [ProcessingError(index=index, message=error.message) for error in ascii_errors]
+
+        return cargo_item, []
+    except ValidationError as e:
+        return None, [ProcessingError(index=index, message=str(e))]
+
+
 class EDIGenerationService:
     """Service for generating EDI messages."""
 
     def __init__(self):
-        self.cargo_repository = CargoRepository()
-        self.edi_repository = EDIRepository()
+        self.cargo_repository, self.edi_repository = repositories()
+        self.message_id: Optional[str] = None  # ID of the message stored by the last generate_edi_message call
+        self.cargo_items: list[CargoItem] = []  # Valid items of the last generate_edi_message call, with their IDs
 
     def _validate_cargo_item(
         self, cargo_item: Union[dict[str, Any], CargoItem], index: int
     ) -> tuple[Optional[CargoItem], list[ProcessingError]]:
         """Validate a cargo item and convert it to CargoItem if needed."""
-        try:
-            # First validate cargo type through Pydantic model
-            if isinstance(cargo_item, dict):
-                cargo_item = CargoItem(**cargo_item)
-
-            # Then validate ASCII characters
-            ascii_errors = validate_ascii_characters(cargo_item.dict())
-            if ascii_errors:
-                return None, [ProcessingError(index=index, message=error.message) for error in ascii_errors]
-
-            return cargo_item, []
-        except ValidationError as e:
-            return None, [ProcessingError(index=index, message=str(e))]
+        return validate_cargo_item(cargo_item, index)
 
     async def _store_cargo_items(self, valid_items: list[CargoItem]) -> tuple[list[str], list[ProcessingError]]:
         """Store cargo items in database and return their IDs."""
@@ -68,13 +76,18 @@ class EDIGenerationService:
     async def _store_edi_message(self, edi_content: str, cargo_ids: list[str]) -> list[ProcessingError]:
         """Store EDI message in database."""
         errors = []
+        message_id = str(ObjectId())
         try:
-            if cargo_ids and not await self.edi_repository.store_edi_message(edi_content, cargo_ids):
+            if cargo_ids and not await self.edi_repository.store_edi_message(
+                edi_content, cargo_ids, message_id=message_id
+            ):
                 errors.append(
                     ProcessingError(
                         message=EErrorMessage.FAILED_TO_STORE.value.format("EDI message", "storage operation failed")
                     )
                 )
+            elif cargo_ids:
+                self.message_id = message_id
         except Exception as e:
             errors.append(ProcessingError(message=EErrorMessage.FAILED_TO_STORE.value.format("EDI message", str(e))))
         return errors
@@ -83,6 +96,8 @@ class EDIGenerationService:
         self, items: list[Union[dict[str, Any], CargoItem]]
     ) -> tuple[Optional[str], list[ProcessingError]]:
         """Generate EDI message from cargo items and store in database."""
+        self.message_id = None
+        self.cargo_items = []
         errors = []
         if not items:
             return None, [ProcessingError(message=EErrorMessage.NO_ITEMS.value)]
@@ -99,6 +114,7 @@ class EDIGenerationService:
         # If no valid items were found
         if not valid_items:
             return None, errors
+        self.cargo_items = valid_items
 
         # Store cargo items and generate EDI segments
         cargo_item_ids, storage_errors = await self._store_cargo_items(valid_items)
@@ -0,0 +1,266 @@
+"""Service for ingesting EDI files dropped into a spool directory."""
+
+import asyncio
+import contextlib
+import fnmatch
+import os
+import time
+from typing import Optional
+
+import orjson
+
+from app.config import Settings
+from app.constants.error_messages import EErrorMessage
+from app.db.cargo_repository import CargoRepository
+from app.db.edi_repository import EDIRepository
+from app.models.responses import ProcessingError
+from app.services.edi_decode import EDIDecodingService
+from app.utils.metrics import registry
+
+SPOOL_FILES = registry.counter("edi_spool_files_total", "Spool files processed", ("outcome",))
+SPOOL_BYTES = registry.counter("edi_spool_bytes_total", "Bytes of spool files processed")
+SPOOL_CARGO_ITEMS = registry.counter("edi_spool_cargo_items_total", "Cargo items decoded from spool files")
+SPOOL_BACKLOG = registry.gauge("edi_spool_backlog_files", "Files waiting in the spool directory")
+SPOOL_LAG = registry.gauge("edi_spool_lag_seconds", "Age of the oldest file waiting in the spool directory")
+SPOOL_IN_PROGRESS = registry.gauge("edi_spool_in_progress", "Spool files currently being decoded")
+SPOOL_INGEST_DELAY = registry.gauge(
+    "edi_spool_ingest_delay_seconds", "Time from the last processed file being written to it being decoded"
+)
+
+PROCESSING_DIR = "processing"
+DONE_DIR = "done"
+FAILED_DIR = "failed"
+
+
+class SpoolWatcher:
+    """
+    Watches a spool directory and decodes the EDI files dropped into it.
+
+    Files are claimed by renaming them into ``processing/``, which is atomic, so several processes can
+    share one spool directory. A file is only claimed when a worker is free to decode it, and is then
+    moved to ``done/`` or ``failed/`` with a ``.errors.json`` file next to it if decoding reported errors.
+    A file whose items could not be stored is left in ``processing/`` without renewing its claim, so it is
+    requeued once the claim times out.
+    """
+
+    def __init__(
+        self,
+        service: EDIDecodingService,
+        spool_dir: str,
+        workers: int,
+        pattern: str,
+        poll_interval: float,
+        settle_seconds: float,
+        claim_timeout: float,
+    ):
+        """Initialize with the decoding service, spool directory and watcher limits."""
+        self.service = service
+        self.spool_dir = spool_dir
+        self.workers = workers
+        self.pattern = pattern
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.claim_timeout = claim_timeout
+        self._slots = asyncio.Semaphore(workers)
+        self._in_flight: set[asyncio.Task] = set()
+        self._claimed: set[str] = set()
+        self._scanner: Optional[asyncio.Task] = None
+        self._renewer: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(
+        cls, settings: Settings, spool_dir: Optional[str] = None, workers: Optional[int] = None
+    ) -> "SpoolWatcher":
+        """Build a watcher from the application settings."""
+        service = EDIDecodingService(
+            CargoRepository(),
+            EDIRepository(),
+            pipeline_batch_groups=settings.DECODE_PIPELINE_BATCH_GROUPS,
+            pipeline_queue_size=settings.DECODE_PIPELINE_QUEUE_SIZE,
+        )
+        return cls(
+            service,
+            spool_dir or settings.SPOOL_DIR,
+            workers or settings.SPOOL_WORKERS,
+            pattern=settings.SPOOL_PATTERN,
+            poll_interval=settings.SPOOL_POLL_INTERVAL_SECONDS,
+            settle_seconds=settings.SPOOL_SETTLE_SECONDS,
+            claim_timeout=settings.SPOOL_CLAIM_TIMEOUT_SECONDS,
+        )
+
+    def _path(self, *parts: str) -> str:
+        """Get a path inside the spool directory."""
+        return os.path.join(self.spool_dir, *parts)
+
+    def _prepare(self) -> None:
+        """Create the processing, done and failed directories."""
+        for directory in (PROCESSING_DIR, DONE_DIR, FAILED_DIR):
+            os.makedirs(self._path(directory), exist_ok=True)
+
+    def _renew_claims(self) -> None:
+        """Touch the files this watcher is decoding; touching updates ctime, which tells others the claim is alive."""
+        for claimed in list(self._claimed):
+            with contextlib.suppress(FileNotFoundError):
+                os.utime(claimed)
+
+    async def _keep_claims(self) -> None:
+        """Renew this watcher's claims until cancelled, however long the files take to decode."""
+        while True:
+            await asyncio.sleep(self.claim_timeout / 3)
+            try:
+                await asyncio.to_thread(self._renew_claims)
+            except OSError as e:
+                print(f"❌ Renewing spool claims in {self.spool_dir} failed: {e}")
+
+    def _requeue_stale_claims(self) -> None:
+        """Return files whose claimant stopped without finishing them to the spool directory."""
+        now = time.time()
+        with os.scandir(self._path(PROCESSING_DIR)) as entries:
+            for entry in entries:
+                if entry.path in self._claimed:
+                    continue
+                # Renaming and touching update ctime, so it records when the claim was last renewed
+                if entry.is_file() and now - entry.stat().st_ctime > self.claim_timeout:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.rename(entry.path, self._path(entry.name.split("-", 1)[-1]))
+
+    def _scan(self) -> list[str]:
+        """List settled files waiting in the spool directory, oldest first, and export the backlog."""
+        self._requeue_stale_claims()
+        now = time.time()
+        waiting = []
+        with os.scandir(self.spool_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.startswith(".") and fnmatch.fnmatch(entry.name, self.pattern):
+                    waiting.append((entry.stat().st_mtime, entry.name))
+        waiting.sort()
+
+        SPOOL_BACKLOG.set(len(waiting))
+        SPOOL_LAG.set(round(now - waiting[0][0], 3) if waiting else 0)
+        return [name for mtime, name in waiting if now - mtime >= self.settle_seconds]
+
+    def _claim(self, name: str) -> Optional[str]:
+        """Atomically claim a file, returning its new path, or None if another worker got it first."""
+        claimed = self._path(PROCESSING_DIR, f"{time.time_ns()}-{name}")
+        try:
+            os.rename(self._path(name), claimed)
+        except FileNotFoundError:
+            return None
+        self._claimed.add(claimed)
+        return claimed
+
+    def _finish(self, claimed: str, directory: str, errors: list[ProcessingError]) -> None:
+        """Move a claimed file to done or failed, writing its errors next to it."""
+        name = os.path.basename(claimed).split("-", 1)[-1]
+        target = self._path(directory, f"{time.strftime('%Y%m%dT%H%M%S')}-{name}")
+        os.replace(claimed, target)
+        if errors:
+            with open(f"{target}.errors.json", "wb") as f:
+                f.write(orjson.dumps([error.model_dump() for error in errors]))
+
+    async def _process(self, claimed: str) -> None:
+        """Decode a claimed file and file it under done or failed."""
+        SPOOL_IN_PROGRESS.inc()
+        try:
+            try:
+                stat = os.stat(claimed)
+                with open(claimed, "rb") as f:
+                    data = await asyncio.to_thread(f.read)
+            except OSError as e:
+                errors = [ProcessingError(message=EErrorMessage.FAILED_TO_READ_FILE.value.format(claimed, e))]
+                await asyncio.to_thread(self._finish, claimed, FAILED_DIR, errors)
+                SPOOL_FILES.inc(outcome="failed")
+                return
+
+            # Spool files should be ASCII; latin-1 keeps any stray bytes so validation can report them
+            cargo_items, errors = await self.service.decode_edi_message(data.decode("latin-1"))
+            # No other worker runs between the decode returning and this check, so message_id is this file's
+            if cargo_items and self.service.message_id is None:
+                # The items parsed but were not stored, which retrying later can fix; the claim simply lapses
+                print(f"❌ Failed to store {claimed}, it is requeued after the claim times out: {errors}")
+                SPOOL_FILES.inc(outcome="requeued")
+                return
+            outcome = DONE_DIR if cargo_items else FAILED_DIR
+            await asyncio.to_thread(self._finish, claimed, outcome, errors)
+
+            SPOOL_FILES.inc(outcome=outcome)
+            SPOOL_BYTES.inc(len(data))
+            SPOOL_CARGO_ITEMS.inc(len(cargo_items))
+            SPOOL_INGEST_DELAY.set(round(time.time() - stat.st_mtime, 3))
+        finally:
+            self._claimed.discard(claimed)
+            SPOOL_IN_PROGRESS.dec()
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        """Free the worker slot of a finished file."""
+        self._in_flight.discard(task)
+        self._slots.release()
+        if not task.cancelled() and task.exception() is not None:
+            print(f"❌ Spool file processing failed: {task.exception()}")
+
+    async def scan_once(self) -> int:
+        """
+        Claim and start decoding every settled file, waiting for free workers as needed.
+
+        Returns:
+            Number of files claimed
+        """
+        claimed_count = 0
+        for name in await asyncio.to_thread(self._scan):
+            await self._slots.acquire()
+            claimed = await asyncio.to_thread(self._claim, name)
+            if claimed is None:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._process(claimed))
+            self._in_flight.add(task)
+            task.add_done_callback(self._on_done)
+            claimed_count += 1
+        return claimed_count
+
+    async def drain(self) -> None:
+        """Wait for the files being decoded to finish."""
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    async def run_once(self) -> None:
+        """Decode everything currently in the spool directory, then return."""
+        await asyncio.to_thread(self._prepare)
+        renewer = asyncio.create_task(self._keep_claims())
+        try:
+            while await self.scan_once():
+                pass
+            await self.drain()
+        finally:
+            renewer.cancel()
+            await asyncio.gather(renewer, return_exceptions=True)
+
+    async def _watch(self) -> None:
+        """Scan the spool directory until cancelled."""
+        while True:
+            try:
+                await self.scan_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Spool scan of {self.spool_dir} failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def start(self) -> None:
+        """Create the spool subdirectories and start watching."""
+        await asyncio.to_thread(self._prepare)
+        self._scanner = asyncio.create_task(self._watch())
+        self._renewer = asyncio.create_task(self._keep_claims())
+        print(f"📂 Watching spool directory {self.spool_dir} with {self.workers} workers")
+
+    async def stop(self) -> None:
+        """Stop claiming files and let the ones being decoded finish."""
+        if self._scanner is not None:
+            self._scanner.cancel()
+            await asyncio.gather(self._scanner, return_exceptions=True)
+            self._scanner = None
+        await self.drain()
+        if self._renewer is not None:
+            self._renewer.cancel()
+            await asyncio.gather(self._renewer, return_exceptions=True)
+            self._renewer = None
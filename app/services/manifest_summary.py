@@ -0,0 +1,81 @@
+"""Columnar summaries of decoded manifests."""
+
+from typing import Optional
+
+import numpy as np
+
+from app.constants import ECargoType
+from app.models.cargo_item import CargoItem
+from app.models.responses import CargoTypeTotals, ContainerSummary, ManifestSummary, MasterBillSummary
+
+
+def _column(values: list[Optional[str]]) -> np.ndarray:
+    """String column; missing values become empty strings, which no identifier can be."""
+    return np.array([value or "" for value in values], dtype=np.str_)
+
+
+def _group(keys: np.ndarray, packages: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Group rows by key.
+
+    Returns:
+        Tuple of the distinct keys in sorted order and the items and packages per key
+    """
+    values, groups, items = np.unique(keys, return_inverse=True, return_counts=True)
+    totals = np.zeros(len(values), dtype=np.int64)
+    np.add.at(totals, groups, packages)
+    return values, items, totals
+
+
+def summarize_cargo_items(cargo_items: list[CargoItem]) -> ManifestSummary:
+    """
+    Compute the totals of a manifest from its cargo items.
+
+    The items are turned into one NumPy column per field and grouped with ``np.unique``, so the cost per item is
+    building the columns rather than a Python-level aggregation for each total. Items without a container or bill
+    number are counted in the overall totals only.
+    """
+    packages = np.fromiter((item.number_of_packages for item in cargo_items), dtype=np.int64, count=len(cargo_items))
+    cargo_types = _column([item.cargo_type.value for item in cargo_items])
+    containers = _column([item.container_number for item in cargo_items])
+    master_bills = _column([item.master_bill_of_lading_number for item in cargo_items])
+    house_bills = _column([item.house_bill_of_lading_number for item in cargo_items])
+
+    type_values, type_items, type_packages = _group(cargo_types, packages)
+
+    has_container = containers != ""
+    container_values, container_items, container_packages = _group(containers[has_container], packages[has_container])
+
+    has_master = master_bills != ""
+    has_house = house_bills != ""
+    master_values, master_items, master_packages = _group(master_bills[has_master], packages[has_master])
+
+    # House bills are counted per master bill through the distinct (master bill, house bill) pairs
+    linked = has_master & has_house
+    pairs = np.unique(np.stack([master_bills[linked], house_bills[linked]], axis=1), axis=0)
+    master_house_bills = np.bincount(np.searchsorted(master_values, pairs[:, 0]), minlength=len(master_values))
+
+    return ManifestSummary.model_construct(
+        items=len(cargo_items),
+        packages=int(packages.sum()),
+        cargo_types=[
+            CargoTypeTotals.model_construct(cargo_type=ECargoType(cargo_type), items=items, packages=total)
+            for cargo_type, items, total in zip(type_values.tolist(), type_items.tolist(), type_packages.tolist())
+        ],
+        containers=len(container_values),
+        packages_per_container=[
+            ContainerSummary.model_construct(container_number=number, items=items, packages=total)
+            for number, items, total in zip(
+                container_values.tolist(), container_items.tolist(), container_packages.tolist()
+            )
+        ],
+        house_bills=len(np.unique(house_bills[has_house])),
+        master_bills=[
+            MasterBillSummary.model_construct(
+                master_bill_of_lading_number=number, house_bills=houses, items=items, packages=total
+            )
+            for number, houses, items, total in zip(
+                master_values.tolist(), master_house_bills.tolist(), master_items.tolist(), master_packages.tolist()
+            )
+        ],
+    )
@@ -0,0 +1,198 @@
+"""Background replay of the local outbox into MongoDB."""
+
+import asyncio
+from itertools import groupby
+from typing import Optional
+from uuid import uuid4
+
+from app.config import Settings
+from app.db.cargo_repository import CargoRepository
+from app.db.outbox import (
+    CARGO_ITEMS,
+    DELETE_CARGO_ITEMS,
+    EDI_MESSAGES,
+    Outbox,
+    OutboxCargoRepository,
+    OutboxEDIRepository,
+    OutboxRecord,
+    get_outbox,
+)
+from app.db.resilience import DatabaseUnavailableError, is_transient
+from app.utils.metrics import registry
+
+OUTBOX_PENDING = registry.gauge("edi_outbox_pending", "Outbox records waiting to be replayed into MongoDB")
+OUTBOX_REPLAYED = registry.counter("edi_outbox_replayed_total", "Outbox records replayed into MongoDB", ("kind",))
+OUTBOX_REPLAY_FAILURES = registry.counter("edi_outbox_replay_failures_total", "Failed outbox replay passes")
+OUTBOX_DEAD_LETTERED = registry.counter(
+    "edi_outbox_dead_lettered_total", "Outbox records moved to the dead-letter table", ("kind",)
+)
+
+
+def _unavailable(error: BaseException) -> bool:
+    """Whether a replay failed because MongoDB could not be reached, rather than because it rejected the write."""
+    return isinstance(error, DatabaseUnavailableError) or is_transient(error)
+
+
+class OutboxDrainer:
+    """
+    Replays outbox records into MongoDB in append order.
+
+    Consecutive records of the same kind are replayed with one bulk write. Records are deleted from the outbox
+    only once written, so a pass that fails, or a process that stops mid-pass, leaves them to be replayed again;
+    IDs assigned on append make the repeat skip what was already written.
+
+    Every worker runs a drainer, but only the one holding the outbox's drain lease replays; the others wait to
+    take over. A batch MongoDB rejects is replayed record by record, and a record rejected ``max_attempts``
+    times is moved to the dead-letter table. While MongoDB is unreachable, records are kept without counting
+    attempts.
+    """
+
+    def __init__(
+        self,
+        outbox: Optional[Outbox],
+        interval: float,
+        batch_size: int,
+        lease_seconds: float = 120.0,
+        max_attempts: int = 5,
+    ):
+        """
+        Initialize the drainer.
+
+        Args:
+            outbox: The outbox to drain; None opens this process's outbox when the drainer starts
+            interval: Pause between passes that find nothing to do
+            batch_size: Records per pass
+            lease_seconds: How long the drain lease holds without being renewed
+            max_attempts: Rejected replays of a record before it is dead-lettered
+        """
+        self.outbox = outbox
+        self.interval = interval
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.owner = uuid4().hex
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "OutboxDrainer":
+        """Build a drainer from the application settings; the outbox is opened by the worker that starts it."""
+        return cls(
+            None,
+            settings.OUTBOX_DRAIN_INTERVAL_SECONDS,
+            settings.OUTBOX_DRAIN_BATCH_SIZE,
+            lease_seconds=settings.OUTBOX_DRAIN_LEASE_SECONDS,
+            max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+        )
+
+    async def _hold_lease(self) -> bool:
+        """Take or renew the drain lease."""
+        return await asyncio.to_thread(self.outbox.acquire_drain_lease, self.owner, self.lease_seconds)
+
+    async def _replay(self, kind: str, records: list[OutboxRecord], replaced_ids: dict[str, str]) -> None:
+        """Replay consecutive records of one kind, collecting the IDs upserted items were stored under."""
+        if kind == CARGO_ITEMS:
+            for upsert, same_mode in groupby(records, key=lambda record: record.payload["upsert"]):
+                docs = [doc for record in same_mode for doc in record.payload["docs"]]
+                replaced_ids.update(await OutboxCargoRepository.replay(docs, upsert))
+        elif kind == DELETE_CARGO_ITEMS:
+            ids = [item_id for record in records for item_id in record.payload["ids"]]
+            await CargoRepository.delete_cargo_items([replaced_ids.get(item_id, item_id) for item_id in ids])
+        elif kind == EDI_MESSAGES:
+            messages = [message for record in records for message in record.payload["messages"]]
+            cargo_item_ids = list({item_id for message in messages for item_id in message["cargo_item_ids"]})
+            earlier = await asyncio.to_thread(self.outbox.replaced_ids, cargo_item_ids)
+            await OutboxEDIRepository.replay(messages, {**earlier, **replaced_ids})
+        else:
+            raise ValueError(f"Unknown outbox record kind: {kind}")
+
+    async def _replay_singly(
+        self, kind: str, records: list[OutboxRecord], replaced_ids: dict[str, str], replayed: list[int]
+    ) -> None:
+        """
+        Replay records of a rejected batch one at a time, adding the replayed ones to ``replayed``.
+
+        A record rejected again is dead-lettered once it has used up its attempts; otherwise the error is raised,
+        ending the pass so that the record is retried before the ones behind it.
+        """
+        for record in records:
+            try:
+                await self._replay(kind, [record], replaced_ids)
+            except Exception as e:
+                if _unavailable(e):
+                    raise
+                if not await asyncio.to_thread(self.outbox.fail, record.seq, repr(e), self.max_attempts):
+                    raise
+                OUTBOX_DEAD_LETTERED.inc(kind=kind)
+                print(f"☠️ Outbox record {record.seq} ({kind}) moved to dead letters after {self.max_attempts} attempts")
+                continue
+            replayed.append(record.seq)
+            OUTBOX_REPLAYED.inc(kind=kind)
+
+    async def drain_once(self) -> int:
+        """
+        Replay the oldest records, if this drainer holds the drain lease.
+
+        Returns:
+            The number of records replayed
+        """
+        if not await self._hold_lease():
+            return 0
+        records = await asyncio.to_thread(self.outbox.read, self.batch_size)
+        replayed: list[int] = []
+        replaced_ids: dict[str, str] = {}
+        try:
+            for kind, same_kind in groupby(records, key=lambda record: record.kind):
+                same_kind = list(same_kind)
+                # Renewed before each write, so the lease cannot lapse to another drainer mid-pass unnoticed
+                if not await self._hold_lease():
+                    break
+                try:
+                    await self._replay(kind, same_kind, replaced_ids)
+                except Exception as e:
+                    if _unavailable(e):
+                        raise
+                    # MongoDB rejected something in the batch; find which record it was
+                    await self._replay_singly(kind, same_kind, replaced_ids, replayed)
+                    continue
+                replayed.extend(record.seq for record in same_kind)
+                OUTBOX_REPLAYED.inc(len(same_kind), kind=kind)
+        except Exception as e:
+            OUTBOX_REPLAY_FAILURES.inc()
+            print(f"❌ Outbox replay failed, {len(records) - len(replayed)} records kept for the next pass: {e}")
+        finally:
+            if replayed:
+                await asyncio.to_thread(self.outbox.ack, replayed, replaced_ids)
+            OUTBOX_PENDING.set(await asyncio.to_thread(self.outbox.pending))
+        return len(replayed)
+
+    async def drain(self) -> None:
+        """Replay every record, stopping early if a pass fails."""
+        while await self.drain_once() == self.batch_size:
+            pass
+
+    async def _run(self) -> None:
+        """Replay records until cancelled, pausing when the outbox is empty or a pass fails."""
+        while True:
+            try:
+                if await self.drain_once() == self.batch_size:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Outbox {self.outbox.path} could not be read: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        """Open this process's outbox and start replaying it in the background."""
+        if self.outbox is None:
+            self.outbox = get_outbox()
+        self._task = asyncio.create_task(self._run())
+        print(f"📤 Replaying outbox {self.outbox.path} into MongoDB while holding its drain lease")
+
+    async def stop(self) -> None:
+        """Stop replaying; records not yet replayed stay in the outbox for the next start."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            await asyncio.to_thread(self.outbox.release_drain_lease, self.owner)
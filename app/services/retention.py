@@ -0,0 +1,102 @@
+"""Retention of monthly collection buckets: archive expired months to local files, then drop them."""
+
+import gzip
+import os
+from datetime import UTC, datetime
+from typing import Optional
+
+from bson import Binary, json_util
+from pymongo import ASCENDING
+
+from app.config import Settings
+from app.constants import EContentStorage
+from app.db import cargo_repository, edi_repository
+from app.db.database import get_database
+from app.db.edi_repository import EDIRepository
+from app.db.partitions import archive_path, bucket_start, list_buckets
+from app.utils.metrics import registry
+
+# Collections split into monthly buckets
+PARTITIONED_COLLECTIONS = (cargo_repository.COLLECTION, edi_repository.COLLECTION)
+
+ARCHIVED_BUCKETS = registry.counter(
+    "edi_archived_buckets_total", "Monthly collection buckets archived and dropped", ("collection",)
+)
+ARCHIVED_DOCUMENTS = registry.counter(
+    "edi_archived_documents_total", "Documents written to bucket archives", ("collection",)
+)
+
+
+def retention_cutoff(now: datetime, months: int) -> datetime:
+    """First instant of the oldest month that is kept."""
+    month_index = now.year * 12 + now.month - 1 - months
+    return datetime(month_index // 12, month_index % 12 + 1, 1, tzinfo=UTC)
+
+
+class RetentionService:
+    """Archives and drops monthly buckets older than the retention period."""
+
+    def __init__(self, retention_months: int, archive_dir: str, batch_size: int = 1000):
+        """Initialize with the number of whole months to keep and where archives are written."""
+        self.retention_months = retention_months
+        self.archive_dir = archive_dir
+        self.batch_size = batch_size
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "RetentionService":
+        """Build the service from the application settings."""
+        return cls(settings.PARTITION_RETENTION_MONTHS, settings.PARTITION_ARCHIVE_DIR)
+
+    async def expired_buckets(self, now: Optional[datetime] = None) -> list[str]:
+        """Buckets of every partitioned collection whose whole month is older than the retention period."""
+        cutoff = retention_cutoff(now or datetime.now(UTC), self.retention_months)
+        return [
+            name
+            for collection in PARTITIONED_COLLECTIONS
+            for name in await list_buckets(collection)
+            if bucket_start(name) < cutoff
+        ]
+
+    async def archive_bucket(self, name: str) -> int:
+        """
+        Write a bucket to a gzipped Extended JSON file, then drop it.
+
+        The archive is written under a temporary name and renamed once complete and synced, so a bucket is never
+        dropped before its archive is safely on disk. Message content kept in GridFS is inlined into the archive
+        as its compressed bytes and removed with the bucket.
+
+        Returns:
+            The number of archived documents
+        """
+        path = archive_path(name, self.archive_dir)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        collection = get_database()[name]
+        file_ids = []
+        count = 0
+
+        with open(f"{path}.tmp", "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as archive:
+            async for doc in collection.find({}).sort("_id", ASCENDING).batch_size(self.batch_size):
+                if "content_file_id" in doc:
+                    file_ids.append(doc.pop("content_file_id"))
+                    doc["content_data"] = Binary(await EDIRepository.load_content_file(file_ids[-1]))
+                    doc["content_storage"] = EContentStorage.COMPRESSED.value
+                archive.write(json_util.dumps(doc, json_options=json_util.CANONICAL_JSON_OPTIONS).encode() + b"\n")
+                count += 1
+            archive.close()
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(f"{path}.tmp", path)
+
+        await collection.drop()
+        for file_id in file_ids:
+            await EDIRepository.delete_content_file(file_id)
+
+        base = name.rsplit("_", 2)[0]
+        ARCHIVED_BUCKETS.inc(collection=base)
+        ARCHIVED_DOCUMENTS.inc(count, collection=base)
+        print(f"🗄️ Archived {count} documents from {name} to {path}")
+        return count
+
+    async def run_once(self, now: Optional[datetime] = None) -> dict[str, int]:
+        """Archive and drop every expired bucket; returns the number of documents archived per bucket."""
+        return {name: await self.archive_bucket(name) for name in await self.expired_buckets(now)}
@@ -2,12 +2,13 @@ import asyncio
 from collections.abc import AsyncGenerator
 
 import pytest
-from httpx import AsyncClient
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 
 from app.config import settings
-from app.db.database import client as app_client  # Import the client from app
-from app.main import app
+from app.db.database import get_client
+from app.main import create_app
 
 
 @pytest.fixture(scope="session")
@@ -19,16 +20,22 @@ def event_loop():
 
 
 @pytest.fixture(scope="session")
-async def client() -> AsyncGenerator[AsyncClient, None]:
+def app() -> FastAPI:
+    """Create the application under test."""
+    return create_app()
+
+
+@pytest.fixture(scope="session")
+async def client(app: FastAPI) -> AsyncGenerator[AsyncClient, None]:
     """Get test client."""
-    async with AsyncClient(app=app, base_url="http://test") as client:
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
         yield client
 
 
 @pytest.fixture(scope="session")
 async def mongodb() -> AsyncGenerator[AsyncIOMotorClient, None]:
     """Get MongoDB client."""
-    yield app_client  # Use the same client instance as the app
+    yield get_client()  # Use the same client instance as the app
 
 
 @pytest.fixture(scope="session")
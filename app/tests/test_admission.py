@@ -0,0 +1,103 @@
+"""Tests for admission control and load shedding."""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI, status
+from httpx import ASGITransport, AsyncClient
+
+from app.middleware.admission import ADMISSION_REJECTED, AdmissionControlMiddleware, AdmissionPool
+
+
+@pytest.mark.asyncio
+async def test_pool_hands_slots_to_waiters_in_order():
+    """Test that released slots go to queued requests first."""
+    pool = AdmissionPool("test", limit=1, max_queue=2)
+    assert await pool.acquire(timeout=1) is None
+
+    waiter = asyncio.create_task(pool.acquire(timeout=1))
+    await asyncio.sleep(0)
+    assert pool.queue_depth == 1
+
+    pool.release()
+    assert await waiter is None
+    assert pool.active == 1
+    assert pool.queue_depth == 0
+
+    pool.release()
+    assert pool.active == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_rejects_when_queue_full():
+    """Test that requests are rejected once the wait queue is full."""
+    pool = AdmissionPool("test", limit=1, max_queue=1)
+    assert await pool.acquire(timeout=1) is None
+    waiter = asyncio.create_task(pool.acquire(timeout=1))
+    await asyncio.sleep(0)
+
+    assert await pool.acquire(timeout=1) == "queue_full"
+
+    pool.release()
+    assert await waiter is None
+
+
+@pytest.mark.asyncio
+async def test_pool_rejects_after_queue_timeout():
+    """Test that queued requests give up after the timeout."""
+    pool = AdmissionPool("test", limit=1, max_queue=1)
+    assert await pool.acquire(timeout=1) is None
+
+    assert await pool.acquire(timeout=0.01) == "queue_timeout"
+    assert pool.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_middleware_sheds_load():
+    """Test that overflowing requests get 429 with Retry-After while admitted ones complete."""
+    release = asyncio.Event()
+    slow_app = FastAPI()
+
+    @slow_app.post("/edi/decode")
+    async def decode() -> dict[str, str]:
+        await release.wait()
+        return {"status": "done"}
+
+    @slow_app.post("/other")
+    async def other() -> dict[str, str]:
+        return {"status": "done"}
+
+    slow_app.add_middleware(
+        AdmissionControlMiddleware, path_prefix="/edi", small_concurrency=1, max_queue=1, retry_after=7
+    )
+    rejected_before = ADMISSION_REJECTED.value(pool="small", reason="queue_full")
+
+    async with AsyncClient(transport=ASGITransport(app=slow_app), base_url="http://test") as client:
+        admitted = asyncio.create_task(client.post("/edi/decode", json={}))
+        queued = asyncio.create_task(client.post("/edi/decode", json={}))
+        await asyncio.sleep(0.05)
+
+        response = await client.post("/edi/decode", json={})
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response.headers["retry-after"] == "7"
+
+        # Paths outside the prefix are not limited
+        response = await client.post("/other", json={})
+        assert response.status_code == status.HTTP_200_OK
+
+        release.set()
+        assert (await admitted).status_code == status.HTTP_200_OK
+        assert (await queued).status_code == status.HTTP_200_OK
+
+    assert ADMISSION_REJECTED.value(pool="small", reason="queue_full") == rejected_before + 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client: AsyncClient):
+    """Test that admission metrics are exported."""
+    await client.post("/api/v1/edi/generate", json={"items": []})
+    response = await client.get("/metrics")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert 'edi_admission_admitted_total{pool="small"}' in response.text
+    assert "edi_admission_queue_depth" in response.text
@@ -0,0 +1,139 @@
+"""Tests for streaming cargo item exports."""
+
+import csv
+import gzip
+import io
+import json
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from fastapi import status
+
+from app.cli import main
+from app.cli.export import write_chunks
+from app.config import get_settings
+from app.constants import EOutputFormat
+from app.db.cargo_repository import CargoRepository
+from app.models.cargo_item import CargoItem
+from app.services.cargo_export import export_cargo_items
+from app.utils.tabular import RowWriter, encode_rows, infer_format
+
+BASE_TIME = datetime(2026, 9, 1, tzinfo=UTC)
+
+
+async def create_items(count: int) -> list[str]:
+    """Store cargo items created one day apart."""
+    return await CargoRepository.create_cargo_items(
+        [
+            CargoItem(
+                cargo_type="LCL",
+                number_of_packages=index + 1,
+                container_number=f"EXPORT{index:04d}",
+                created_at=BASE_TIME + timedelta(days=index),
+            )
+            for index in range(count)
+        ]
+    )
+
+
+async def batches(*sizes: int):
+    """Yield batches of numbered rows."""
+    start = 0
+    for size in sizes:
+        yield [{"id": str(index), "number_of_packages": index} for index in range(start, start + size)]
+        start += size
+
+
+@pytest.mark.asyncio
+async def test_encode_rows():
+    """Test that rows are encoded one chunk per batch, with the CSV header once."""
+    columns = {"id": str, "number_of_packages": int}
+
+    chunks = [chunk async for chunk in encode_rows(batches(2, 1), EOutputFormat.CSV, columns)]
+    assert chunks == [b"id,number_of_packages\r\n0,0\r\n1,1\r\n", b"2,2\r\n"]
+
+    chunks = [chunk async for chunk in encode_rows(batches(2, 1), EOutputFormat.NDJSON, columns, compress=True)]
+    rows = [json.loads(line) for line in gzip.decompress(b"".join(chunks)).splitlines()]
+    assert [row["number_of_packages"] for row in rows] == [0, 1, 2]
+
+    with pytest.raises(ValueError):
+        encode_rows(batches(1), EOutputFormat.PARQUET, columns)
+
+
+def test_row_writer_is_abstract():
+    """Test that a writer must implement write_rows."""
+    with pytest.raises(TypeError):
+        RowWriter(io.BytesIO(), {"id": str})
+
+
+def test_infer_format_ignores_gzip_suffix():
+    """Test that a .gz suffix does not hide the format."""
+    assert infer_format("september.csv.gz") == EOutputFormat.CSV
+    assert infer_format("september.ndjson") == EOutputFormat.NDJSON
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson(client, monkeypatch):
+    """Test exporting a date range across several cursor batches."""
+    monkeypatch.setattr(get_settings(), "EXPORT_BATCH_SIZE", 2)
+    ids = await create_items(5)
+
+    response = await client.get(
+        "/api/v1/edi/cargo-items/export",
+        params={"created_from": "2026-09-02T00:00:00Z", "created_to": "2026-09-05T00:00:00Z"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert 'filename="cargo-items.ndjson"' in response.headers["content-disposition"]
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == ids[1:4]
+    assert rows[0]["container_number"] == "EXPORT0001"
+    assert rows[0]["created_at"].startswith("2026-09-02T00:00:00")
+
+
+@pytest.mark.asyncio
+async def test_export_gzipped_csv(client):
+    """Test a gzipped CSV download with selected fields, which is not compressed a second time."""
+    ids = await create_items(3)
+
+    response = await client.get(
+        "/api/v1/edi/cargo-items/export",
+        params={"format": "csv", "gzip": "true", "fields": "container_number,number_of_packages"},
+        headers={"Accept-Encoding": "gzip"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/gzip"
+    assert "content-encoding" not in response.headers
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(response.content).decode())))
+    assert [row["id"] for row in rows] == ids
+    assert list(rows[0]) == ["id", "container_number", "number_of_packages"]
+
+
+@pytest.mark.asyncio
+async def test_export_rejects_parquet_and_unknown_fields(client):
+    """Test that formats which cannot be streamed and unknown fields are rejected."""
+    response = await client.get("/api/v1/edi/cargo-items/export", params={"format": "parquet"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = await client.get("/api/v1/edi/cargo-items/export", params={"fields": "weight"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_write_chunks(db, tmp_path):
+    """Test writing an export to a file as the command does."""
+    ids = await create_items(3)
+    path = tmp_path / "items.csv"
+
+    with open(path, "wb") as output:
+        size = await write_chunks(export_cargo_items(EOutputFormat.CSV, {}, 2), output)
+
+    assert size == path.stat().st_size
+    assert [row["id"] for row in csv.DictReader(path.open())] == ids
+
+
+def test_export_command_rejects_parquet(tmp_path):
+    """Test that the export command refuses output it cannot stream."""
+    assert main(["export", "-o", str(tmp_path / "items.parquet")]) == 2
@@ -0,0 +1,213 @@
+"""Tests for cargo item indexes and query endpoints."""
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from fastapi import status
+
+from app.db.cargo_repository import CargoRepository
+from app.db.indexes import ensure_indexes
+from app.models.cargo_item import CargoItem
+from app.utils.pagination import decode_cursor, encode_cursor
+
+BASE_TIME = datetime(2025, 1, 1, tzinfo=UTC)
+
+
+async def create_items(count: int, container_number: str = "MSKU1234567", same_time: bool = False) -> list[str]:
+    """Store cargo items created one minute apart, or all at the same time."""
+    return await CargoRepository.create_cargo_items(
+        [
+            CargoItem(
+                cargo_type="FCL",
+                number_of_packages=index + 1,
+                container_number=container_number,
+                created_at=BASE_TIME + timedelta(minutes=0 if same_time else index),
+            )
+            for index in range(count)
+        ]
+    )
+
+
+async def fetch_all(client, **params) -> list[dict]:
+    """Follow next_cursor through every page of a search."""
+    items, cursor = [], None
+    while True:
+        response = await client.get(
+            "/api/v1/edi/cargo-items", params={**params, **({"cursor": cursor} if cursor else {})}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        items.extend(data["cargo_items"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            return items
+
+
+def test_cursor_round_trip():
+    """Test that cursors decode to the key they were built from."""
+    document_id = ObjectId()
+    assert decode_cursor(encode_cursor(BASE_TIME, document_id)) == (BASE_TIME, document_id)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes(db):
+    """Test that startup index creation covers the lookup fields and backfills created_at."""
+    legacy_id = (await db.cargo_items.insert_one({"cargo_type": "LCL", "number_of_packages": 1})).inserted_id
+
+    await ensure_indexes()
+    await ensure_indexes()  # Safe to run on every start
+
+    keys = [list(index["key"]) for index in (await db.cargo_items.index_information()).values()]
+    assert ["container_number", "created_at", "_id"] in keys
+    assert ["created_at", "_id"] in keys
+    message_keys = [list(index["key"]) for index in (await db.edi_messages.index_information()).values()]
+    assert ["cargo_item_ids"] in message_keys
+    assert (await db.cargo_items.find_one({"_id": legacy_id}))["created_at"] is not None
+
+
+@pytest.mark.asyncio
+async def test_created_at_is_stored(db):
+    """Test that items keep their creation time in the database."""
+    [item_id] = await create_items(1)
+    doc = await db.cargo_items.find_one({"_id": ObjectId(item_id)})
+    assert doc["created_at"].replace(tzinfo=UTC) == BASE_TIME
+
+
+@pytest.mark.asyncio
+async def test_search_pages_newest_first(client):
+    """Test keyset pagination by container number."""
+    await create_items(5)
+    await create_items(2, container_number="OTHER0000001")
+
+    items = await fetch_all(client, container_number="MSKU1234567", limit=2)
+
+    assert [item["number_of_packages"] for item in items] == [5, 4, 3, 2, 1]
+    assert items[0]["created_at"].startswith("2025-01-01T00:04:00")
+
+
+@pytest.mark.asyncio
+async def test_search_pages_through_identical_timestamps(client):
+    """Test that items created at the same time are neither skipped nor repeated."""
+    ids = await create_items(5, same_time=True)
+
+    items = await fetch_all(client, limit=2)
+
+    assert sorted(item["id"] for item in items) == sorted(ids)
+
+
+@pytest.mark.asyncio
+async def test_search_created_range(client):
+    """Test filtering by creation time."""
+    await create_items(5)
+    items = await fetch_all(
+        client,
+        created_from=(BASE_TIME + timedelta(minutes=1)).isoformat(),
+        created_to=(BASE_TIME + timedelta(minutes=3)).isoformat(),
+    )
+    assert [item["number_of_packages"] for item in items] == [3, 2]
+
+
+@pytest.mark.asyncio
+async def test_search_field_projection(client):
+    """Test returning only the requested fields."""
+    await create_items(1)
+    response = await client.get("/api/v1/edi/cargo-items", params={"fields": "container_number"})
+    [item] = response.json()["cargo_items"]
+    assert set(item) == {"id", "container_number"}
+
+
+@pytest.mark.asyncio
+async def test_search_rejects_bad_parameters(client):
+    """Test unknown fields and malformed cursors."""
+    response = await client.get("/api/v1/edi/cargo-items", params={"fields": "container_number,secret"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = await client.get("/api/v1/edi/cargo-items", params={"cursor": "garbage"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_get_cargo_item(client):
+    """Test getting a cargo item by ID."""
+    [item_id] = await create_items(1)
+    response = await client.get(f"/api/v1/edi/cargo-items/{item_id}")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["container_number"] == "MSKU1234567"
+    assert datetime.fromisoformat(response.json()["created_at"]) == BASE_TIME
+
+    response = await client.get(f"/api/v1/edi/cargo-items/{ObjectId()}")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    response = await client.get("/api/v1/edi/cargo-items/not-an-id")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.fixture
+def upsert_mode(monkeypatch):
+    """Upsert cargo items by natural key."""
+    from app.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "CARGO_UPSERT_NATURAL_KEY", True)
+
+
+@pytest.mark.asyncio
+async def test_upsert_by_natural_key(db, upsert_mode):
+    """Test that re-sent items update the stored item and keep its ID and creation time."""
+    first = CargoItem(cargo_type="FCL", number_of_packages=1, container_number="UPSERT1", created_at=BASE_TIME)
+    other = CargoItem(cargo_type="LCL", number_of_packages=2, container_number="UPSERT1")
+    ids = await CargoRepository.create_cargo_items([first, other])
+
+    amended = CargoItem(cargo_type="FCL", number_of_packages=5, container_number="UPSERT1")
+    again = await CargoRepository.create_cargo_items([amended, amended.model_copy()])
+
+    assert again == [ids[0], ids[0]]
+    assert await db.cargo_items.count_documents({}) == 2
+    doc = await db.cargo_items.find_one({"_id": ObjectId(ids[0])})
+    assert doc["number_of_packages"] == 5
+    assert doc["created_at"].replace(tzinfo=UTC) == BASE_TIME
+    assert "master_bill_of_lading_number" not in doc
+
+
+@pytest.mark.asyncio
+async def test_upsert_keeps_absent_identifiers_distinct(db, upsert_mode):
+    """Test that keys differing only in an absent identifier, and items without identifiers, stay separate."""
+    items = [
+        CargoItem(cargo_type="FCL", number_of_packages=1, container_number="UPSERT2"),
+        CargoItem(cargo_type="FCL", number_of_packages=1, container_number="UPSERT2", house_bill_of_lading_number="H"),
+        CargoItem(cargo_type="FCL", number_of_packages=1),
+    ]
+
+    ids = await CargoRepository.create_cargo_items(items)
+    again = await CargoRepository.create_cargo_items(items)
+
+    assert again[:2] == ids[:2]
+    assert again[2] != ids[2]
+    assert await db.cargo_items.count_documents({}) == 4
+
+
+@pytest.mark.asyncio
+async def test_upsert_leaves_inserted_items_alone(db, monkeypatch):
+    """Test that an upsert never changes an item that was inserted without one."""
+    item = CargoItem(cargo_type="FCL", number_of_packages=1, container_number="UPSERT4")
+    [inserted] = await CargoRepository.create_cargo_items([item])
+
+    from app.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "CARGO_UPSERT_NATURAL_KEY", True)
+    [upserted] = await CargoRepository.create_cargo_items([item.model_copy(update={"number_of_packages": 7})])
+
+    assert upserted != inserted
+    assert (await db.cargo_items.find_one({"_id": ObjectId(inserted)}))["number_of_packages"] == 1
+
+
+@pytest.mark.asyncio
+async def test_decode_resend_does_not_duplicate(client, db, upsert_mode):
+    """Test that decoding the same manifest twice stores its items once."""
+    edi_content = "LIN+1+I'\nPAC+++LCL:67:95'\nPAC+9+1'\nPCI+1'\nRFF+AAQ:UPSERT3'"
+
+    first = await client.post("/api/v1/edi/decode", json={"edi_content": edi_content})
+    second = await client.post("/api/v1/edi/decode", json={"edi_content": edi_content})
+
+    assert first.json()["cargo_items"][0]["id"] == second.json()["cargo_items"][0]["id"]
+    assert await db.cargo_items.count_documents({}) == 1
@@ -0,0 +1,148 @@
+"""Tests for the daily cargo statistics rollups."""
+
+from datetime import UTC, date, datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import status
+from pymongo.errors import ServerSelectionTimeoutError
+
+from app.config import get_settings
+from app.constants import ECargoType
+from app.constants.error_messages import EErrorMessage
+from app.db.cargo_repository import CargoRepository
+from app.db.cargo_stats_repository import CARGO_STATS_FAILURES, CargoStatsRepository
+from app.models.cargo_item import CargoItem
+
+DAY_ONE = datetime(2026, 10, 18, 9, 0, tzinfo=UTC)
+DAY_TWO = datetime(2026, 10, 19, 23, 59, tzinfo=UTC)
+
+
+def cargo_item(cargo_type: ECargoType, packages: int, created_at: datetime, **identifiers: str) -> CargoItem:
+    """Build a cargo item created at a given time."""
+    return CargoItem(cargo_type=cargo_type, number_of_packages=packages, created_at=created_at, **identifiers)
+
+
+async def stats() -> list[tuple[date, str, int, int]]:
+    """All rollups as (day, cargo type, items, packages)."""
+    docs = await CargoStatsRepository.get_daily_stats(date(2026, 1, 1), date(2026, 12, 31))
+    return [(doc["day"], doc["cargo_type"], doc["items"], doc["packages"]) for doc in docs]
+
+
+@pytest.mark.asyncio
+async def test_writes_and_deletes_update_rollups(db):
+    """Test that storing and deleting items moves the counts of their day and cargo type."""
+    ids = await CargoRepository.create_cargo_items(
+        [
+            cargo_item(ECargoType.FCL, 3, DAY_ONE),
+            cargo_item(ECargoType.FCL, 4, DAY_ONE),
+            cargo_item(ECargoType.LCL, 5, DAY_ONE),
+            cargo_item(ECargoType.FCL, 6, DAY_TWO),
+        ]
+    )
+    assert await stats() == [
+        (DAY_ONE.date(), "FCL", 2, 7),
+        (DAY_ONE.date(), "LCL", 1, 5),
+        (DAY_TWO.date(), "FCL", 1, 6),
+    ]
+
+    await CargoRepository.delete_cargo_items(ids[:1])
+    assert (await stats())[0] == (DAY_ONE.date(), "FCL", 1, 4)
+
+
+@pytest.mark.asyncio
+async def test_upserts_count_package_changes(db, monkeypatch):
+    """Test that an upsert matching a stored item changes only its package count, on its original day."""
+    monkeypatch.setattr(get_settings(), "CARGO_UPSERT_NATURAL_KEY", True)
+    await CargoRepository.create_cargo_items([cargo_item(ECargoType.FCL, 3, DAY_ONE, container_number="C1")])
+
+    await CargoRepository.create_cargo_items(
+        [
+            cargo_item(ECargoType.FCL, 8, DAY_TWO, container_number="C1"),
+            cargo_item(ECargoType.FCL, 2, DAY_TWO, container_number="C2"),
+            cargo_item(ECargoType.FCL, 1, DAY_TWO, container_number="C2"),
+        ]
+    )
+
+    assert await stats() == [(DAY_ONE.date(), "FCL", 1, 8), (DAY_TWO.date(), "FCL", 1, 1)]
+
+
+@pytest.mark.asyncio
+async def test_stats_endpoint(client, db):
+    """Test that the endpoint returns daily rollups and totals for a date range."""
+    await CargoRepository.create_cargo_items(
+        [
+            cargo_item(ECargoType.FCL, 3, DAY_ONE),
+            cargo_item(ECargoType.LCL, 5, DAY_ONE),
+            cargo_item(ECargoType.FCL, 6, DAY_TWO),
+        ]
+    )
+
+    response = await client.get("/api/v1/edi/stats", params={"date_from": "2026-10-18", "date_to": "2026-10-19"})
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["days"] == [
+        {"day": "2026-10-18", "cargo_type": "FCL", "items": 1, "packages": 3},
+        {"day": "2026-10-18", "cargo_type": "LCL", "items": 1, "packages": 5},
+        {"day": "2026-10-19", "cargo_type": "FCL", "items": 1, "packages": 6},
+    ]
+    assert data["totals"] == [
+        {"cargo_type": "FCL", "items": 2, "packages": 9},
+        {"cargo_type": "LCL", "items": 1, "packages": 5},
+    ]
+
+    response = await client.get(
+        "/api/v1/edi/stats", params={"date_from": "2026-10-19", "date_to": "2026-10-19", "cargo_type": "FCL"}
+    )
+    assert response.json()["totals"] == [{"cargo_type": "FCL", "items": 1, "packages": 6}]
+
+
+@pytest.mark.asyncio
+async def test_stats_endpoint_rejects_bad_ranges(client):
+    """Test that reversed and overlong date ranges are rejected."""
+    response = await client.get("/api/v1/edi/stats", params={"date_from": "2026-10-19", "date_to": "2026-10-18"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == EErrorMessage.INVALID_DATE_RANGE
+
+    response = await client.get("/api/v1/edi/stats", params={"date_from": "2024-01-01", "date_to": "2026-10-18"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_decode_updates_todays_stats(client, db):
+    """Test that decoded items are counted on the day they are stored."""
+    await client.post("/api/v1/edi/generate", json={"items": [{"cargo_type": "LCL", "number_of_packages": 4}]})
+
+    response = await client.get("/api/v1/edi/stats", params={"cargo_type": "LCL"})
+    assert response.json()["totals"] == [{"cargo_type": "LCL", "items": 1, "packages": 4}]
+
+
+@pytest.mark.asyncio
+async def test_replayed_insert_is_counted_once(db):
+    """Test that writing items that are already stored, as a replayed write does, leaves the counts alone."""
+    docs = [
+        {**CargoRepository._to_document(cargo_item(ECargoType.FCL, 3, DAY_ONE)), "_id": ObjectId()} for _ in range(2)
+    ]
+
+    first = await CargoRepository._insert_documents([dict(doc) for doc in docs])
+    second = await CargoRepository._insert_documents([dict(doc) for doc in docs])
+
+    assert first == second
+    assert await stats() == [(DAY_ONE.date(), "FCL", 2, 6)]
+
+
+@pytest.mark.asyncio
+async def test_stats_failure_does_not_fail_the_write(db, monkeypatch):
+    """Test that items are stored and deleted even when their statistics cannot be updated."""
+
+    async def unavailable(deltas):
+        raise ServerSelectionTimeoutError("stats unavailable")
+
+    monkeypatch.setattr(CargoStatsRepository, "apply", unavailable)
+    failures = CARGO_STATS_FAILURES.value()
+
+    ids = await CargoRepository.create_cargo_items([cargo_item(ECargoType.LCL, 5, DAY_ONE)])
+    assert await db.cargo_items.count_documents({}) == 1
+    assert await CargoRepository.delete_cargo_items(ids) == 1
+    assert await db.cargo_items.count_documents({}) == 0
+    assert CARGO_STATS_FAILURES.value() == failures + 2
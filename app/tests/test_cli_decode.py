@@ -0,0 +1,133 @@
+"""Tests for the bulk decode command."""
+
+import csv
+import json
+
+import pytest
+
+from app.cli import main
+from app.cli.decode import Checkpoint, collect_files, decode_file, store_decoded
+
+EDI_FILE = """LIN+1+I'
+PAC+++LCL:67:95'
+PAC+{}+1'
+RFF+AAQ:ABC{}'"""
+
+
+@pytest.fixture
+def edi_dir(tmp_path):
+    """Create a directory of EDI files, one of them invalid."""
+    directory = tmp_path / "edi"
+    (directory / "nested").mkdir(parents=True)
+    for i in range(1, 6):
+        (directory / f"{i}.edi").write_text(EDI_FILE.format(i, i))
+    (directory / "nested" / "6.edi").write_text(EDI_FILE.format(6, 6))
+    (directory / "bad.edi").write_bytes("LIN+1+I'\nRFF+AAQ:ÄBC'".encode("latin-1"))
+    (directory / "notes.txt").write_text("not an EDI file")
+    return directory
+
+
+def read_ndjson(path):
+    """Read NDJSON rows from a file."""
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_collect_files(edi_dir):
+    """Test expanding directories by pattern."""
+    assert len(collect_files([str(edi_dir)], "*.edi", recursive=False)) == 6
+    assert len(collect_files([str(edi_dir)], "*.edi", recursive=True)) == 7
+
+
+def test_decode_file(edi_dir):
+    """Test decoding a single memory-mapped file."""
+    decoded = decode_file(str(edi_dir / "1.edi"), keep_content=True)
+    assert decoded.rows[0]["cargo_type"] == "LCL"
+    assert decoded.rows[0]["container_number"] == "ABC1"
+    assert decoded.edi_content == EDI_FILE.format(1, 1)
+
+    decoded = decode_file(str(edi_dir / "bad.edi"))
+    assert not decoded.rows
+    assert decoded.errors
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_decode_directory_to_ndjson(edi_dir, tmp_path, workers):
+    """Test decoding a directory across worker processes."""
+    output = tmp_path / "items.ndjson"
+    errors = tmp_path / "errors.ndjson"
+    exit_code = main(
+        ["decode", str(edi_dir), "-r", "-o", str(output), "--errors", str(errors), "-w", workers, "--batch-files", "2"]
+    )
+
+    assert exit_code == 0
+    rows = read_ndjson(output)
+    assert sorted(row["number_of_packages"] for row in rows) == [1, 2, 3, 4, 5, 6]
+    assert all(row["id"] is None for row in rows)
+    assert [row["source_file"].endswith("bad.edi") for row in read_ndjson(errors)] == [True]
+
+
+def test_decode_to_csv(edi_dir, tmp_path):
+    """Test CSV output with a header row."""
+    output = tmp_path / "items.csv"
+    assert main(["decode", str(edi_dir), "-o", str(output), "-w", "1", "-q"]) == 0
+
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 5
+    assert rows[0]["cargo_type"] == "LCL"
+
+
+def test_decode_resumes_from_checkpoint(edi_dir, tmp_path):
+    """Test that a re-run skips checkpointed files and appends to the output."""
+    output = tmp_path / "items.csv"
+    checkpoint = tmp_path / "checkpoint.txt"
+    first = edi_dir / "1.edi"
+
+    assert main(["decode", str(first), "-o", str(output), "--checkpoint", str(checkpoint), "-q"]) == 0
+    assert main(["decode", str(edi_dir), "-o", str(output), "--checkpoint", str(checkpoint), "-w", "1", "-q"]) == 0
+
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert sorted(int(row["number_of_packages"]) for row in rows) == [1, 2, 3, 4, 5]
+    assert len(checkpoint.read_text().splitlines()) == 6
+
+
+def test_decode_missing_file(tmp_path):
+    """Test that unreadable files fail the run."""
+    assert main(["decode", str(tmp_path / "missing.edi"), "-o", str(tmp_path / "out.ndjson"), "-q"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_store_decoded(edi_dir, db):
+    """Test bulk-loading decoded files through the repositories."""
+    decoded = [decode_file(str(edi_dir / f"{i}.edi"), keep_content=True) for i in range(1, 4)]
+    await store_decoded(decoded)
+
+    assert all(row["id"] for result in decoded for row in result.rows)
+    assert await db.cargo_items.count_documents({}) == 3
+    assert await db.edi_messages.count_documents({}) == 3
+
+
+@pytest.mark.asyncio
+async def test_store_decoded_again_after_crash(edi_dir, tmp_path, db):
+    """Test that files stored but not checkpointed are stored again under the same IDs, without duplicates."""
+    paths = [str(edi_dir / f"{i}.edi") for i in range(1, 3)]
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.txt"))
+    stored_at = checkpoint.begin(paths)
+    first = [decode_file(path, keep_content=True) for path in paths]
+    await store_decoded(first, stored_at)
+    checkpoint.close()
+
+    # The run stopped before recording the files as done, so the next run finds them pending
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.txt"))
+    assert not any(path in checkpoint for path in paths)
+    assert checkpoint.begin(paths) == stored_at
+    again = [decode_file(path, keep_content=True) for path in paths]
+    await store_decoded(again, checkpoint.begin(paths))
+    checkpoint.close()
+
+    assert [row["id"] for result in again for row in result.rows] == [
+        row["id"] for result in first for row in result.rows
+    ]
+    assert await db.cargo_items.count_documents({}) == 2
+    assert await db.edi_messages.count_documents({}) == 2
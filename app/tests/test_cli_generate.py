@@ -0,0 +1,102 @@
+"""Tests for the bulk generate command."""
+
+import json
+
+from app.cli import main
+from app.models.cargo_item import CargoItem
+from app.utils.cargo_edi import generate_edi_segment, parse_edi_message
+
+CSV_ROWS = """cargo_type,number_of_packages,container_number,master_bill_of_lading_number,house_bill_of_lading_number
+FCL,1,MSKU1234567,,
+LCL,2,,MB123,HB456
+FCX,3,,,
+"""
+
+
+def test_generate_from_csv(tmp_path):
+    """Test generating EDI from CSV in several chunks."""
+    source = tmp_path / "items.csv"
+    source.write_text(CSV_ROWS)
+    output = tmp_path / "message.edi"
+
+    assert main(["generate", str(source), "-o", str(output), "--chunk-size", "1", "-q"]) == 0
+
+    expected = [
+        CargoItem(cargo_type="FCL", number_of_packages=1, container_number="MSKU1234567"),
+        CargoItem(
+            cargo_type="LCL",
+            number_of_packages=2,
+            master_bill_of_lading_number="MB123",
+            house_bill_of_lading_number="HB456",
+        ),
+        CargoItem(cargo_type="FCX", number_of_packages=3),
+    ]
+    edi_content = output.read_text()
+    assert edi_content == "".join(generate_edi_segment(item, index) for index, item in enumerate(expected, start=1))
+    cargo_items, errors = parse_edi_message(edi_content)
+    assert not errors
+    assert [item.number_of_packages for item in cargo_items] == [1, 2, 3]
+
+
+def test_generate_from_ndjson_with_invalid_rows(tmp_path):
+    """Test that invalid rows are reported by input index and skipped."""
+    source = tmp_path / "items.ndjson"
+    rows = [
+        {"cargo_type": "LCL", "number_of_packages": 1},
+        {"cargo_type": "BAD", "number_of_packages": 1},
+        {"cargo_type": "FCL", "number_of_packages": 0},
+        {"cargo_type": "FCL", "number_of_packages": 4, "container_number": "ÄBC"},
+        {"cargo_type": "FCX", "number_of_packages": 5, "id": "ignored"},
+    ]
+    source.write_text("\n".join(json.dumps(row) for row in rows) + "\nnot json\n")
+    output = tmp_path / "message.edi"
+    errors = tmp_path / "errors.ndjson"
+
+    exit_code = main(["generate", str(source), "-o", str(output), "--errors", str(errors), "--chunk-size", "2", "-q"])
+
+    assert exit_code == 1
+    assert [json.loads(line)["index"] for line in errors.read_text().splitlines()] == [1, 2, 3, 5]
+    cargo_items, _ = parse_edi_message(output.read_text())
+    assert [item.number_of_packages for item in cargo_items] == [1, 5]
+    assert output.read_text().startswith("LIN+1+I'") and "LIN+2+I'" in output.read_text()
+
+
+def test_generate_store_requires_output_file(tmp_path):
+    """Test that --store refuses to write to standard output."""
+    source = tmp_path / "items.csv"
+    source.write_text(CSV_ROWS)
+    assert main(["generate", str(source), "--store"]) == 2
+
+
+def test_generate_to_stdout(tmp_path, capsys):
+    """Test writing EDI to standard output."""
+    source = tmp_path / "items.csv"
+    source.write_text(CSV_ROWS)
+
+    assert main(["generate", str(source), "-q"]) == 0
+    assert capsys.readouterr().out.count("LIN+") == 3
+
+
+def test_generate_errors_report_input_rows(tmp_path, monkeypatch):
+    """Test that an item failing to generate is reported by its input row and leaves no gap in line numbers."""
+    source = tmp_path / "items.ndjson"
+    rows = [
+        {"cargo_type": "LCL", "number_of_packages": 1},
+        {"cargo_type": "BAD", "number_of_packages": 1},
+        {"cargo_type": "LCL", "number_of_packages": 2},
+        {"cargo_type": "LCL", "number_of_packages": 3},
+    ]
+    source.write_text("\n".join(json.dumps(row) for row in rows))
+    output = tmp_path / "message.edi"
+    errors = tmp_path / "errors.ndjson"
+
+    def fail_two_packages(cargo_item: CargoItem, line_index: int) -> str:
+        if cargo_item.number_of_packages == 2:
+            raise ValueError("cannot generate")
+        return generate_edi_segment(cargo_item, line_index)
+
+    monkeypatch.setattr("app.cli.generate.generate_edi_segment", fail_two_packages)
+    main(["generate", str(source), "-o", str(output), "--errors", str(errors), "-q"])
+
+    assert [json.loads(line)["index"] for line in errors.read_text().splitlines()] == [1, 2]
+    assert "LIN+2+I'" in output.read_text() and "LIN+3+I'" not in output.read_text()
@@ -0,0 +1,122 @@
+"""Tests for response compression and compressed request bodies."""
+
+import gzip
+import json
+
+import pytest
+import zstandard
+from fastapi import FastAPI, Request, status
+from httpx import ASGITransport, AsyncClient
+
+from app.middleware.compression import CompressionMiddleware, select_encoding
+from app.tests.test_data import SAMPLE_CARGO_ITEMS
+
+LARGE_EDI_MESSAGE = "".join(
+    f"LIN+{i}+I'\nPAC+++FCL:67:95'\nPAC+{i}+1'\nPCI+1'\nRFF+AAQ:CONT{i:06d}'\n" for i in range(1, 51)
+)
+
+
+@pytest.fixture
+def echo_client() -> AsyncClient:
+    """Client for a minimal app that echoes the size of the request body it receives."""
+    echo_app = FastAPI()
+
+    @echo_app.post("/upload")
+    async def upload(request: Request) -> dict[str, int]:
+        return {"size": len(await request.body())}
+
+    echo_app.add_middleware(
+        CompressionMiddleware, minimum_size=16, max_request_size=1000, decompress_paths=("/upload",)
+    )
+    return AsyncClient(transport=ASGITransport(app=echo_app), base_url="http://test")
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip, zstd", "zstd"),
+        ("zstd;q=0.5, gzip", "gzip"),
+        ("*", "zstd"),
+        ("gzip;q=0, br", None),
+    ],
+)
+def test_select_encoding(accept_encoding: str, expected: str):
+    """Test Accept-Encoding negotiation."""
+    assert select_encoding(accept_encoding) == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding", ["gzip", "zstd"])
+async def test_decode_response_compressed(client: AsyncClient, encoding: str):
+    """Test that large decode responses are compressed with the negotiated coding."""
+    response = await client.post(
+        "/api/v1/edi/decode", json={"edi_content": LARGE_EDI_MESSAGE}, headers={"Accept-Encoding": encoding}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-encoding"] == encoding
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert len(response.json()["cargo_items"]) == 50
+
+
+@pytest.mark.asyncio
+async def test_small_response_not_compressed(client: AsyncClient):
+    """Test that responses below the minimum size are sent as-is."""
+    response = await client.post("/api/v1/edi/generate", json={"items": []}, headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "content-encoding" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_decode_gzip_request(client: AsyncClient):
+    """Test decoding a gzip-compressed request body."""
+    body = gzip.compress(json.dumps({"edi_content": LARGE_EDI_MESSAGE}).encode())
+    response = await client.post(
+        "/api/v1/edi/decode",
+        content=body,
+        headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["cargo_items"]) == 50
+
+
+@pytest.mark.asyncio
+async def test_generate_zstd_request(client: AsyncClient):
+    """Test generating EDI from a zstd-compressed request body."""
+    body = zstandard.ZstdCompressor().compress(json.dumps({"items": SAMPLE_CARGO_ITEMS}).encode())
+    response = await client.post(
+        "/api/v1/edi/generate",
+        content=body,
+        headers={"Content-Type": "application/json", "Content-Encoding": "zstd"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "CONT123456" in response.json()["edi_content"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding, compress", [("gzip", gzip.compress), ("zstd", zstandard.ZstdCompressor().compress)])
+async def test_compressed_request_size_cap(echo_client: AsyncClient, encoding: str, compress):
+    """Test that decompressed request bodies are capped."""
+    headers = {"Content-Encoding": encoding}
+    response = await echo_client.post("/upload", content=compress(b"x" * 1000), headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["size"] == 1000
+
+    response = await echo_client.post("/upload", content=compress(b"x" * 1001), headers=headers)
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+
+@pytest.mark.asyncio
+async def test_invalid_compressed_request(echo_client: AsyncClient):
+    """Test that corrupt and unsupported request encodings are rejected."""
+    response = await echo_client.post("/upload", content=b"not gzip", headers={"Content-Encoding": "gzip"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = await echo_client.post("/upload", content=b"data", headers={"Content-Encoding": "br"})
+    assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
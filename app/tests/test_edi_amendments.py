@@ -0,0 +1,117 @@
+"""Tests for decoding amended messages against their previous version."""
+
+import pytest
+from bson import ObjectId
+from fastapi import status
+
+from app.config import get_settings
+from app.constants.error_messages import EErrorMessage
+from app.utils.cargo_edi.edi_parser import group_hash
+
+IDENTITY = {"Accept-Encoding": "identity"}
+
+
+def group(index: int, packages: int, container_number: str) -> str:
+    """Build one LIN group."""
+    return f"LIN+{index}+I'\nPAC+++LCL:67:95'\nPAC+{packages}+1'\nPCI+1'\nRFF+AAQ:{container_number}'\n"
+
+
+VERSION_1 = group(1, 1, "AMEND01") + group(2, 2, "AMEND02") + group(3, 3, "AMEND03")
+# AMEND02 changes its package count, AMEND03 is dropped and AMEND04 is new; AMEND01 only moves
+VERSION_2 = group(1, 4, "AMEND04") + group(2, 1, "AMEND01") + group(3, 5, "AMEND02")
+
+
+async def decode(client, edi_content: str, previous_message_id: str = None) -> dict:
+    """Decode a message through the API."""
+    body = {"edi_content": edi_content}
+    if previous_message_id:
+        body["previous_message_id"] = previous_message_id
+    response = await client.post("/api/v1/edi/decode", json=body, headers=IDENTITY)
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+def test_group_hash_ignores_line_number():
+    """Test that renumbering a group keeps its hash and changing its content does not."""
+    assert group_hash(["LIN+1+I'", "PAC+1+1'"]) == group_hash(["LIN+7+I'", "PAC+1+1'"])
+    assert group_hash(["LIN+1+I'", "PAC+1+1'"]) != group_hash(["LIN+1+I'", "PAC+2+1'"])
+
+
+@pytest.mark.asyncio
+async def test_decode_amendment(client, db):
+    """Test that only changed groups are stored and the diff classifies every item."""
+    first = await decode(client, VERSION_1)
+    previous_ids = [item["id"] for item in first["cargo_items"]]
+
+    diff = await decode(client, VERSION_2, first["message_id"])
+
+    assert diff["previous_message_id"] == first["message_id"]
+    assert [item["container_number"] for item in diff["added"]] == ["AMEND04"]
+    assert [change["previous_id"] for change in diff["changed"]] == [previous_ids[1]]
+    assert diff["changed"][0]["cargo_item"]["number_of_packages"] == 5
+    assert diff["removed"] == [previous_ids[2]]
+    assert diff["unchanged"] == 1
+    assert await db.cargo_items.count_documents({}) == 5
+
+    message = await db.edi_messages.find_one({"_id": ObjectId(diff["message_id"])})
+    assert message["previous_message_id"] == first["message_id"]
+    assert message["cargo_item_ids"] == [
+        diff["added"][0]["id"],
+        previous_ids[0],
+        diff["changed"][0]["cargo_item"]["id"],
+    ]
+
+    # The amendment can itself be amended; resending it unchanged stores nothing new
+    again = await decode(client, VERSION_2, diff["message_id"])
+    assert again["unchanged"] == 3
+    assert not again["added"] and not again["changed"] and not again["removed"]
+    assert await db.cargo_items.count_documents({}) == 5
+
+
+@pytest.mark.asyncio
+async def test_decode_amendment_of_message_without_hashes(client, db):
+    """Test amending a message stored before group hashes were recorded."""
+    first = await decode(client, VERSION_1)
+    await db.edi_messages.update_one({"_id": ObjectId(first["message_id"])}, {"$unset": {"group_hashes": ""}})
+
+    diff = await decode(client, VERSION_1, first["message_id"])
+
+    assert diff["unchanged"] == 3
+
+
+@pytest.mark.asyncio
+async def test_decode_amendment_unknown_previous(client):
+    """Test that an unknown previous message is a 404."""
+    response = await client.post(
+        "/api/v1/edi/decode", json={"edi_content": VERSION_1, "previous_message_id": str(ObjectId())}
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_decode_amendment_keeps_previous_items_in_upsert_mode(client, db, monkeypatch):
+    """Test that a changed item is stored as a new item even when items are upserted by natural key."""
+    monkeypatch.setattr(get_settings(), "CARGO_UPSERT_NATURAL_KEY", True)
+    first = await decode(client, VERSION_1)
+    previous_ids = [item["id"] for item in first["cargo_items"]]
+
+    diff = await decode(client, VERSION_2, first["message_id"])
+
+    changed_id = diff["changed"][0]["cargo_item"]["id"]
+    assert changed_id not in previous_ids
+    previous = await db.cargo_items.find_one({"_id": ObjectId(previous_ids[1])})
+    assert previous["number_of_packages"] == 2
+    assert (await db.cargo_items.find_one({"_id": ObjectId(changed_id)}))["number_of_packages"] == 5
+
+
+@pytest.mark.asyncio
+async def test_decode_amendment_rejects_response_options(client, db):
+    """Test that view, fields and summary are rejected rather than ignored for an amendment."""
+    first = await decode(client, VERSION_1)
+    body = {"edi_content": VERSION_2, "previous_message_id": first["message_id"]}
+
+    for params in ({"view": "ids"}, {"fields": "number_of_packages"}, {"summary": "true"}):
+        response = await client.post("/api/v1/edi/decode", params=params, json=body)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["detail"] == EErrorMessage.AMENDMENT_VIEW_UNSUPPORTED
+    assert await db.cargo_items.count_documents({}) == 3
@@ -7,7 +7,9 @@ from fastapi.testclient import TestClient
 from app.constants.error_messages import EErrorMessage
 from app.db.cargo_repository import CargoRepository
 from app.db.edi_repository import EDIRepository
+from app.services import edi_decode
 from app.services.edi_decode import EDIDecodingService
+from app.utils.cargo_edi.message_processor import parse_message_groups
 
 # Test data
 VALID_EDI_MESSAGE = """LIN+1+I'
@@ -274,3 +276,170 @@ async def test_decode_endpoint_invalid_request(client):
     error_messages = [error["message"] for error in data["detail"]]
     assert any(EErrorMessage.INVALID_SEGMENT_TYPE.format("INVALID_SEGMENT") in msg for msg in error_messages)
     assert any(EErrorMessage.INVALID_NUMBER_FORMAT.format("INVALID") in msg for msg in error_messages)
+
+
+# Batch decode tests
+@pytest.mark.asyncio
+async def test_decode_batch_messages(edi_service: EDIDecodingService) -> None:
+    """Test decoding several messages with per-document results."""
+    results = await edi_service.decode_edi_messages(
+        [VALID_EDI_MESSAGE, INVALID_EDI_MESSAGE, VALID_EDI_MESSAGE_MULTIPLE], concurrency=2
+    )
+
+    assert len(results) == 3
+    (items1, errors1), (items2, errors2), (items3, errors3) = results
+    assert len(items1) == 1 and not errors1
+    assert not items2 and errors2
+    assert len(items3) == 2 and not errors3
+
+    # All stored items received distinct IDs
+    ids = [item.id for item in items1 + items3]
+    assert all(ids)
+    assert len(set(ids)) == 3
+
+
+@pytest.mark.asyncio
+async def test_decode_batch_endpoint(client):
+    """Test the batch decode endpoint."""
+    response = await client.post(
+        "/api/v1/edi/decode/batch", json={"documents": [VALID_EDI_MESSAGE, INVALID_EDI_MESSAGE, EMPTY_EDI_MESSAGE]}
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert len(results[0]["cargo_items"]) == 1
+    assert results[0]["errors"] is None
+    assert results[1]["cargo_items"] == []
+    assert any(
+        EErrorMessage.INVALID_SEGMENT_TYPE.format("INVALID_SEGMENT") in error["message"]
+        for error in results[1]["errors"]
+    )
+    assert results[2]["errors"][0]["message"] == EErrorMessage.NO_ITEMS
+
+
+@pytest.mark.asyncio
+async def test_decode_batch_endpoint_empty_request(client):
+    """Test the batch decode endpoint with no documents."""
+    response = await client.post("/api/v1/edi/decode/batch", json={"documents": []})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == EErrorMessage.NO_ITEMS
+
+
+# Pipelined decode tests
+@pytest.mark.asyncio
+async def test_decode_pipeline_stores_every_batch(db) -> None:
+    """Test that a message spanning many pipeline batches is stored completely and in order."""
+    edi_service = EDIDecodingService(CargoRepository(), EDIRepository(), pipeline_batch_groups=3, pipeline_queue_size=1)
+    edi_content = "\n".join(f"LIN+{i}+I'\nPAC+++LCL:67:95'\nPAC+{i}+1'" for i in range(1, 21))
+
+    cargo_items, errors = await edi_service.decode_edi_message(edi_content)
+
+    assert not errors
+    assert [item.number_of_packages for item in cargo_items] == list(range(1, 21))
+    assert await db.cargo_items.count_documents({}) == 20
+    edi_doc = await db.edi_messages.find_one({})
+    assert edi_doc["cargo_item_ids"] == [item.id for item in cargo_items]
+
+
+@pytest.mark.asyncio
+async def test_decode_pipeline_storage_failure(db, monkeypatch) -> None:
+    """Test that a failed batch write is reported and no EDI message is stored."""
+    edi_service = EDIDecodingService(CargoRepository(), EDIRepository(), pipeline_batch_groups=1, pipeline_queue_size=1)
+
+    async def fail(cargo_items):
+        raise Exception(EErrorMessage.FAILED_TO_STORE.value)
+
+    monkeypatch.setattr(edi_service.cargo_repository, "create_cargo_items", fail)
+    cargo_items, errors = await edi_service.decode_edi_message(VALID_EDI_MESSAGE_MULTIPLE)
+
+    assert len(cargo_items) == 2
+    assert len(errors) == 1
+    assert await db.edi_messages.count_documents({}) == 0
+
+
+@pytest.mark.asyncio
+async def test_decode_pipeline_storage_failure_deletes_written_batches(db, monkeypatch) -> None:
+    """Test that batches stored before a failed write are deleted rather than left without a message."""
+    edi_service = EDIDecodingService(CargoRepository(), EDIRepository(), pipeline_batch_groups=1, pipeline_queue_size=1)
+    create_cargo_items = edi_service.cargo_repository.create_cargo_items
+    calls = 0
+
+    async def fail_second(cargo_items):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise Exception(EErrorMessage.FAILED_TO_STORE.value)
+        return await create_cargo_items(cargo_items)
+
+    monkeypatch.setattr(edi_service.cargo_repository, "create_cargo_items", fail_second)
+    cargo_items, errors = await edi_service.decode_edi_message(VALID_EDI_MESSAGE_MULTIPLE)
+
+    assert len(errors) == 1
+    assert await db.cargo_items.count_documents({}) == 0
+    assert await db.edi_messages.count_documents({}) == 0
+
+
+@pytest.mark.asyncio
+async def test_decode_pipeline_parse_failure_deletes_written_batches(db, monkeypatch) -> None:
+    """Test that a parser crash waits for the writer and deletes every batch it stored."""
+    edi_service = EDIDecodingService(CargoRepository(), EDIRepository(), pipeline_batch_groups=1, pipeline_queue_size=1)
+    calls = 0
+
+    def fail_second(*args):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise ValueError("parser crashed")
+        return parse_message_groups(*args)
+
+    monkeypatch.setattr(edi_decode, "parse_message_groups", fail_second)
+    cargo_items, errors = await edi_service.decode_edi_message(VALID_EDI_MESSAGE_MULTIPLE)
+
+    assert cargo_items == []
+    assert "parser crashed" in errors[0].message
+    assert await db.cargo_items.count_documents({}) == 0
+
+
+@pytest.mark.asyncio
+async def test_decode_endpoint_views(client, db) -> None:
+    """Test that the ids and summary views leave the items out of the response."""
+    response = await client.post(
+        "/api/v1/edi/decode", params={"view": "ids"}, json={"edi_content": VALID_EDI_MESSAGE_MULTIPLE}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert "cargo_items" not in data
+    edi_doc = await db.edi_messages.find_one({})
+    assert data["cargo_item_ids"] == edi_doc["cargo_item_ids"]
+    assert data["message_id"] == str(edi_doc["_id"])
+
+    response = await client.post(
+        "/api/v1/edi/decode", params={"view": "summary"}, json={"edi_content": VALID_EDI_MESSAGE_MULTIPLE}
+    )
+    data = response.json()
+    assert "cargo_items" not in data
+    assert data["summary"]["items"] == 2
+    assert data["summary"]["packages"] == 12
+
+
+@pytest.mark.asyncio
+async def test_decode_endpoint_fields(client, db) -> None:
+    """Test that decoded items can be limited to selected fields."""
+    response = await client.post(
+        "/api/v1/edi/decode",
+        params={"fields": "cargo_type,number_of_packages"},
+        json={"edi_content": VALID_EDI_MESSAGE_MULTIPLE},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    cargo_items = response.json()["cargo_items"]
+    assert [set(item) for item in cargo_items] == [{"id", "cargo_type", "number_of_packages"}] * 2
+    assert [(item["cargo_type"], item["number_of_packages"]) for item in cargo_items] == [("LCL", 9), ("FCL", 3)]
+
+    response = await client.post(
+        "/api/v1/edi/decode", params={"fields": "weight"}, json={"edi_content": VALID_EDI_MESSAGE_MULTIPLE}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == EErrorMessage.INVALID_FIELDS.value.format("weight")
+    assert await db.cargo_items.count_documents({}) == 2
@@ -0,0 +1,118 @@
+"""Tests for asynchronous EDI decode jobs."""
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from fastapi import status
+
+from app.constants.decode_job import EDecodeJobStatus
+from app.db.cargo_repository import CargoRepository
+from app.db.decode_job_repository import DecodeJobRepository
+from app.models.cargo_item import CargoItem
+from app.services.edi_decode_jobs import EDIDecodeJobService
+
+EDI_GROUP = """LIN+{}+I'
+PAC+++LCL:67:95'
+PAC+9+1'
+PCI+1'
+RFF+AAQ:ABC{}'"""
+
+LARGE_EDI_MESSAGE = "\n".join(EDI_GROUP.format(i, i) for i in range(1, 26))
+
+
+@pytest.fixture
+def job_service() -> EDIDecodeJobService:
+    """Get a job service that commits every few groups."""
+    return EDIDecodeJobService(
+        CargoRepository(), DecodeJobRepository(), chunk_groups=4, lease_seconds=60, max_attempts=5, max_errors=100
+    )
+
+
+@pytest.mark.asyncio
+async def test_decode_job_lifecycle(client, job_service: EDIDecodeJobService) -> None:
+    """Test submitting a job, processing it and paging through its items."""
+    response = await client.post(
+        "/api/v1/edi/decode/jobs", content=LARGE_EDI_MESSAGE, headers={"Content-Type": "text/plain"}
+    )
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    job_id = response.json()["job_id"]
+    assert response.headers["Location"].endswith(f"/api/v1/edi/decode/jobs/{job_id}")
+
+    response = await client.get(f"/api/v1/edi/decode/jobs/{job_id}")
+    assert response.json()["status"] == EDecodeJobStatus.PENDING.value
+
+    job = await DecodeJobRepository.claim_job("worker-1", lease_seconds=60)
+    assert job is not None and job.id == job_id
+    await job_service.process_job(job, "worker-1")
+
+    response = await client.get(f"/api/v1/edi/decode/jobs/{job_id}", params={"limit": 10})
+    data = response.json()
+    assert data["status"] == EDecodeJobStatus.COMPLETED.value
+    assert data["progress"] == {"processed_groups": 25, "total_groups": 25}
+    assert data["cargo_item_count"] == 25
+    assert [item["container_number"] for item in data["cargo_items"]] == [f"ABC{i}" for i in range(1, 11)]
+
+    cargo_items = data["cargo_items"]
+    while data["next_cursor"] is not None:
+        response = await client.get(
+            f"/api/v1/edi/decode/jobs/{job_id}", params={"limit": 10, "cursor": data["next_cursor"]}
+        )
+        data = response.json()
+        cargo_items.extend(data["cargo_items"])
+    assert len(cargo_items) == 25
+
+
+@pytest.mark.asyncio
+async def test_decode_job_json_body(client) -> None:
+    """Test submitting a job as a JSON request."""
+    response = await client.post("/api/v1/edi/decode/jobs", json={"edi_content": LARGE_EDI_MESSAGE})
+    assert response.status_code == status.HTTP_202_ACCEPTED
+
+
+@pytest.mark.asyncio
+async def test_decode_job_empty_body(client) -> None:
+    """Test that an empty job is rejected."""
+    response = await client.post("/api/v1/edi/decode/jobs", content=b"", headers={"Content-Type": "text/plain"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_decode_job_not_found(client) -> None:
+    """Test getting an unknown job."""
+    response = await client.get("/api/v1/edi/decode/jobs/000000000000000000000000")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_decode_job_resumes_after_worker_loss(db, job_service: EDIDecodeJobService) -> None:
+    """Test that a stalled job is resumed by another worker without duplicating items."""
+
+    async def chunks():
+        yield LARGE_EDI_MESSAGE.encode()
+
+    job = await DecodeJobRepository.create_job(chunks())
+    claimed = await DecodeJobRepository.claim_job("worker-1", lease_seconds=60)
+    assert claimed is not None
+
+    # Simulate worker-1 committing 8 groups, writing part of the next chunk, then dying
+    await db.edi_decode_jobs.update_one(
+        {"_id": job.id},
+        {"$set": {"processed_groups": 8, "lease_expires_at": datetime.now(UTC) - timedelta(seconds=1)}},
+    )
+    committed = [
+        (i - 1, CargoItem(cargo_type="LCL", number_of_packages=1, container_number=f"ABC{i}")) for i in range(1, 9)
+    ]
+    stale = [(8, CargoItem(cargo_type="LCL", number_of_packages=1, container_number="ABC9"))]
+    await CargoRepository.create_job_cargo_items(job.id, committed + stale)
+
+    resumed = await DecodeJobRepository.claim_job("worker-2", lease_seconds=60)
+    assert resumed is not None and resumed.attempts == 2
+    await job_service.process_job(resumed, "worker-2")
+
+    # The old worker can no longer commit once the job has moved on
+    assert not await DecodeJobRepository.commit_progress(job.id, "worker-1", 12, 4, [], 60, 100)
+
+    items = await CargoRepository.find_job_cargo_items(job.id, -1, 100)
+    assert [item.container_number for _, item in items] == [f"ABC{i}" for i in range(1, 26)]
+    finished = await DecodeJobRepository.get_job(job.id)
+    assert finished.status == EDecodeJobStatus.COMPLETED
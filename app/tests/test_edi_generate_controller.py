@@ -48,3 +48,20 @@ async def test_generate_edi_all_invalid(client: AsyncClient):
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
     assert isinstance(response.json()["detail"], list)
     assert len(response.json()["detail"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_generate_edi_views(client: AsyncClient, db):
+    """Test that the ids and summary views return the stored items' IDs or totals instead of the EDI content."""
+    response = await client.post("/api/v1/edi/generate", params={"view": "ids"}, json={"items": SAMPLE_CARGO_ITEMS})
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert "edi_content" not in data
+    stored = await db.cargo_items.find({}, {"_id": True}).to_list(None)
+    assert sorted(data["cargo_item_ids"]) == sorted(str(doc["_id"]) for doc in stored)
+
+    response = await client.post("/api/v1/edi/generate", params={"view": "summary"}, json={"items": SAMPLE_CARGO_ITEMS})
+    data = response.json()
+    assert "edi_content" not in data
+    assert data["summary"]["packages"] == 15
+    assert data["summary"]["containers"] == 2
@@ -0,0 +1,163 @@
+"""Tests for stored EDI message retrieval."""
+
+import pytest
+from bson import ObjectId
+from fastapi import status
+
+from app.config import get_settings
+from app.utils.http_cache import etag_matches
+
+EDI_MESSAGE = """LIN+1+I'
+PAC+++LCL:67:95'
+PAC+9+1'
+PCI+1'
+RFF+AAQ:ABC123'
+LIN+2+I'
+PAC+++FCL:67:95'
+PAC+3+1'"""
+
+IDENTITY = {"Accept-Encoding": "identity"}
+
+
+async def decode_message(client, edi_content: str = EDI_MESSAGE) -> dict:
+    """Decode and store a message through the API."""
+    response = await client.post("/api/v1/edi/decode", json={"edi_content": edi_content})
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+def test_etag_matches():
+    """Test If-None-Match comparison."""
+    assert etag_matches('"a-json"', '"a-json"')
+    assert etag_matches('"b-json", W/"a-json"', '"a-json"')
+    assert etag_matches("*", '"a-json"')
+    assert not etag_matches('"a-msgpack"', '"a-json"')
+    assert not etag_matches(None, '"a-json"')
+    assert etag_matches('"a-json"', 'W/"a-json"')
+
+
+@pytest.mark.asyncio
+async def test_get_message(client):
+    """Test fetching a decoded message by the ID returned from decode."""
+    decoded = await decode_message(client)
+    message_id = decoded["message_id"]
+
+    response = await client.get(f"/api/v1/edi/messages/{message_id}", headers=IDENTITY)
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["id"] == message_id
+    assert data["edi_content"] == EDI_MESSAGE
+    assert data["cargo_item_ids"] == [item["id"] for item in decoded["cargo_items"]]
+    assert response.headers["ETag"] == f'"{message_id}-json"'
+    assert "immutable" in response.headers["Cache-Control"]
+
+
+@pytest.mark.asyncio
+async def test_get_message_not_modified(client):
+    """Test that a matching If-None-Match gets an empty 304."""
+    message_id = (await decode_message(client))["message_id"]
+    etag = (await client.get(f"/api/v1/edi/messages/{message_id}", headers=IDENTITY)).headers["ETag"]
+
+    response = await client.get(f"/api/v1/edi/messages/{message_id}", headers={**IDENTITY, "If-None-Match": etag})
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    # A different representation does not match
+    response = await client.get(
+        f"/api/v1/edi/messages/{message_id}",
+        headers={**IDENTITY, "If-None-Match": etag, "Accept": "application/msgpack"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_compressed_message_etag(client):
+    """Test that a compressed representation has its own ETag and can be revalidated."""
+    edi_content = "\n".join(f"LIN+{i}+I'\nPAC+++LCL:67:95'\nPAC+{i}+1'" for i in range(1, 60))
+    message_id = (await decode_message(client, edi_content))["message_id"]
+
+    response = await client.get(f"/api/v1/edi/messages/{message_id}", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    etag = response.headers["ETag"]
+    assert etag == f'"{message_id}-json-gzip"'
+
+    response = await client.get(
+        f"/api/v1/edi/messages/{message_id}", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_get_message_cargo_items(client):
+    """Test fetching a message's items in message order with projection."""
+    decoded = await decode_message(client)
+    message_id = decoded["message_id"]
+
+    response = await client.get(
+        f"/api/v1/edi/messages/{message_id}/cargo-items", params={"fields": "number_of_packages"}, headers=IDENTITY
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    items = response.json()["cargo_items"]
+    assert items == [
+        {"id": item["id"], "number_of_packages": item["number_of_packages"]} for item in decoded["cargo_items"]
+    ]
+    etag = response.headers["ETag"]
+    assert etag != f'"{message_id}-items-all-json"'
+
+    response = await client.get(
+        f"/api/v1/edi/messages/{message_id}/cargo-items",
+        params={"fields": "number_of_packages"},
+        headers={**IDENTITY, "If-None-Match": etag},
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.asyncio
+async def test_generate_returns_message_id(client):
+    """Test that generated messages can be fetched by the returned ID."""
+    response = await client.post(
+        "/api/v1/edi/generate", json={"items": [{"cargo_type": "FCL", "number_of_packages": 1}]}
+    )
+    message_id = response.json()["message_id"]
+
+    response = await client.get(f"/api/v1/edi/messages/{message_id}")
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_message_not_found(client):
+    """Test unknown and malformed message IDs."""
+    unknown = str(ObjectId())
+    assert (await client.get(f"/api/v1/edi/messages/{unknown}")).status_code == status.HTTP_404_NOT_FOUND
+    assert (await client.get("/api/v1/edi/messages/not-an-id")).status_code == status.HTTP_404_NOT_FOUND
+    assert (await client.get(f"/api/v1/edi/messages/{unknown}/cargo-items")).status_code == status.HTTP_404_NOT_FOUND
+
+    # A cached ETag for a message that no longer exists does not get a 304
+    response = await client.get(f"/api/v1/edi/messages/{unknown}", headers={"If-None-Match": f'"{unknown}-json"'})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_upserted_message_items_are_revalidated(client, monkeypatch):
+    """Test that items an upsert can change are not cached as immutable and get a new ETag when they change."""
+    monkeypatch.setattr(get_settings(), "CARGO_UPSERT_NATURAL_KEY", True)
+    message_id = (await decode_message(client))["message_id"]
+    url = f"/api/v1/edi/messages/{message_id}/cargo-items"
+
+    response = await client.get(url, headers=IDENTITY)
+    etag = response.headers["ETag"]
+    assert etag.startswith("W/")
+    assert response.headers["Cache-Control"] == "no-cache"
+    response = await client.get(url, headers={**IDENTITY, "If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    await decode_message(client, EDI_MESSAGE.replace("PAC+9+1'", "PAC+10+1'"))
+    response = await client.get(url, headers={**IDENTITY, "If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["cargo_items"][0]["number_of_packages"] == 10
+    assert response.headers["ETag"] != etag
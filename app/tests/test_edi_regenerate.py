@@ -0,0 +1,81 @@
+"""Tests for regenerating EDI from stored cargo items."""
+
+import pytest
+from bson import ObjectId
+from fastapi import status
+
+from app.config import get_settings
+
+ITEMS = [
+    {"cargo_type": "FCL", "number_of_packages": 1, "container_number": "REGEN001"},
+    {
+        "cargo_type": "LCL",
+        "number_of_packages": 2,
+        "container_number": "REGEN002",
+        "master_bill_of_lading_number": "MB1",
+    },
+    {
+        "cargo_type": "FCX",
+        "number_of_packages": 3,
+        "container_number": "REGEN003",
+        "house_bill_of_lading_number": "HB'1",
+    },
+]
+
+
+async def generate_message(client) -> dict:
+    """Generate and store a message through the API."""
+    response = await client.post("/api/v1/edi/generate", json={"items": ITEMS})
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_regenerate_by_message(client, db, monkeypatch):
+    """Test that regenerating a stored message reproduces it across cursor batches without storing anything."""
+    monkeypatch.setattr(get_settings(), "REGENERATE_BATCH_SIZE", 2)
+    generated = await generate_message(client)
+    item_count = await db.cargo_items.count_documents({})
+    message_count = await db.edi_messages.count_documents({})
+
+    response = await client.get("/api/v1/edi/regenerate", params={"message_id": generated["message_id"]})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.text == generated["edi_content"]
+    assert await db.cargo_items.count_documents({}) == item_count
+    assert await db.edi_messages.count_documents({}) == message_count
+
+
+@pytest.mark.asyncio
+async def test_regenerate_by_filter(client, monkeypatch):
+    """Test regenerating the items matching a lookup filter."""
+    monkeypatch.setattr(get_settings(), "REGENERATE_BATCH_SIZE", 1)
+    await generate_message(client)
+
+    response = await client.get("/api/v1/edi/regenerate", params={"master_bill_of_lading_number": "MB1"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.text == "LIN+1+I'\nPAC+++LCL:67:95'\nPAC+2+1'\nPCI+1'\nRFF+AAQ:REGEN002'\nPCI+1'\nRFF+MB:MB1'\n"
+
+
+@pytest.mark.asyncio
+async def test_regenerate_requires_one_source(client):
+    """Test that exactly one of message_id and filters must be given."""
+    response = await client.get("/api/v1/edi/regenerate")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = await client.get(
+        "/api/v1/edi/regenerate", params={"message_id": str(ObjectId()), "container_number": "REGEN001"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_regenerate_not_found(client):
+    """Test unknown messages and filters without matches."""
+    response = await client.get("/api/v1/edi/regenerate", params={"message_id": str(ObjectId())})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = await client.get("/api/v1/edi/regenerate", params={"container_number": "MISSING"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -4,7 +4,9 @@ from datetime import datetime
 
 import pytest
 from bson import ObjectId
+from bson.errors import InvalidId
 
+from app.constants import EContentCodec
 from app.constants.error_messages import EErrorMessage
 from app.db.edi_repository import EDIRepository
 
@@ -69,3 +71,91 @@ async def test_store_edi_message_verify_content(edi_repository, sample_cargo_ids
         assert ObjectId.is_valid(id_)
     assert "created_at" in stored_doc
     assert isinstance(stored_doc["created_at"], datetime)
+
+
+@pytest.mark.asyncio
+async def test_store_edi_messages_bulk(sample_cargo_ids):
+    """Test storing several EDI messages at once."""
+    from app.db.database import get_database
+
+    result = await EDIRepository.store_edi_messages([(SAMPLE_EDI_CONTENT, sample_cargo_ids), ("LIN+2+I'", [])])
+    assert result is True
+
+    db = get_database()
+    assert await db.edi_messages.count_documents({}) == 2
+    stored_doc = await db.edi_messages.find_one({"edi_content": SAMPLE_EDI_CONTENT})
+    assert stored_doc["cargo_item_ids"] == sample_cargo_ids
+
+
+@pytest.mark.asyncio
+async def test_store_edi_messages_empty_content(sample_cargo_ids):
+    """Test that bulk storage rejects empty EDI content."""
+    with pytest.raises(ValueError) as exc_info:
+        await EDIRepository.store_edi_messages([("", sample_cargo_ids)])
+    assert str(exc_info.value) == EErrorMessage.EMPTY_EDI_CONTENT.value
+
+
+def large_edi_content(line_items: int) -> str:
+    """Build a message large enough to be compressed."""
+    return "".join(
+        f"LIN+{i}+I'\nPAC+++LCL:67:95'\nPAC+{i}+1'\nPCI+1'\nRFF+AAQ:CONT{i:07d}'\n" for i in range(1, line_items)
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("codec", ["zstd", "zlib"])
+async def test_store_edi_message_compressed(db, sample_cargo_ids, monkeypatch, codec):
+    """Test that content above the compression threshold is stored as compressed binary and read back."""
+    from app.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "EDI_CONTENT_CODEC", EContentCodec(codec))
+    edi_content = large_edi_content(1000)
+    message_id = str(ObjectId())
+
+    await EDIRepository.store_edi_message(edi_content, sample_cargo_ids, message_id=message_id)
+
+    stored_doc = await db.edi_messages.find_one({"_id": ObjectId(message_id)})
+    assert "edi_content" not in stored_doc
+    assert stored_doc["content_storage"] == "compressed"
+    assert stored_doc["content_codec"] == codec
+    assert len(stored_doc["content_data"]) < stored_doc["content_size"] == len(edi_content)
+    assert stored_doc["cargo_item_count"] == len(sample_cargo_ids)
+
+    message = await EDIRepository.get_edi_message(message_id)
+    assert message.edi_content == edi_content
+    assert message.content_hash == stored_doc["content_hash"]
+
+
+@pytest.mark.asyncio
+async def test_store_edi_message_gridfs(db, sample_cargo_ids, monkeypatch):
+    """Test that content above the GridFS threshold is moved out of the message document."""
+    from app.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "EDI_CONTENT_GRIDFS_THRESHOLD_BYTES", 1024)
+    edi_content = large_edi_content(1000)
+
+    await EDIRepository.store_edi_messages([(edi_content, sample_cargo_ids), (SAMPLE_EDI_CONTENT, [])])
+
+    stored_doc = await db.edi_messages.find_one({"content_storage": "gridfs"})
+    assert "content_data" not in stored_doc
+    assert await db["edi_content.files"].count_documents({"_id": stored_doc["content_file_id"]}) == 1
+    assert (await db.edi_messages.find_one({"content_storage": "inline"}))["edi_content"] == SAMPLE_EDI_CONTENT
+
+    message = await EDIRepository.get_edi_message(str(stored_doc["_id"]))
+    assert message.edi_content == edi_content
+    assert message.cargo_item_ids == sample_cargo_ids
+
+
+@pytest.mark.asyncio
+async def test_store_edi_messages_failed_build_leaves_no_content_files(db, sample_cargo_ids, monkeypatch):
+    """Test that GridFS content is only uploaded once every message document has been built."""
+    from app.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "EDI_CONTENT_GRIDFS_THRESHOLD_BYTES", 1024)
+    messages = [(large_edi_content(1000), sample_cargo_ids), (SAMPLE_EDI_CONTENT, [])]
+
+    with pytest.raises(InvalidId):
+        await EDIRepository.store_edi_messages(messages, message_ids=[str(ObjectId()), "not an id"])
+
+    assert await db["edi_content.files"].count_documents({}) == 0
+    assert await db.edi_messages.count_documents({}) == 0
@@ -0,0 +1,139 @@
+"""Tests for spool directory ingestion."""
+
+import asyncio
+import json
+import os
+import time
+
+import pytest
+from pymongo.errors import ServerSelectionTimeoutError
+
+from app.db.cargo_repository import CargoRepository
+from app.db.edi_repository import EDIRepository
+from app.services.edi_decode import EDIDecodingService
+from app.services.edi_spool import DONE_DIR, FAILED_DIR, PROCESSING_DIR, SPOOL_FILES, SpoolWatcher
+
+EDI_FILE = """LIN+1+I'
+PAC+++LCL:67:95'
+PAC+{}+1'"""
+
+
+@pytest.fixture
+def watcher(tmp_path) -> SpoolWatcher:
+    """Get a watcher on a temporary spool directory that does not wait for files to settle."""
+    return SpoolWatcher(
+        EDIDecodingService(CargoRepository(), EDIRepository()),
+        str(tmp_path),
+        workers=2,
+        pattern="*.edi",
+        poll_interval=0.01,
+        settle_seconds=0,
+        claim_timeout=60,
+    )
+
+
+def files_in(path):
+    """List file names in a directory."""
+    return sorted(os.listdir(path)) if os.path.isdir(path) else []
+
+
+@pytest.mark.asyncio
+async def test_spool_run_once(watcher: SpoolWatcher, tmp_path, db) -> None:
+    """Test decoding every waiting file into done or failed."""
+    for i in range(1, 6):
+        (tmp_path / f"{i}.edi").write_text(EDI_FILE.format(i))
+    (tmp_path / "bad.edi").write_text("LIN+1+I'\nPAC+++XYZ:67:95'")
+    (tmp_path / "ignored.txt").write_text("not EDI")
+    failed_before = SPOOL_FILES.value(outcome="failed")
+
+    await watcher.run_once()
+
+    done = files_in(tmp_path / DONE_DIR)
+    failed = files_in(tmp_path / FAILED_DIR)
+    assert len(done) == 5
+    assert [name.split("-", 1)[1] for name in failed] == ["bad.edi", "bad.edi.errors.json"]
+    assert json.loads((tmp_path / FAILED_DIR / failed[1]).read_text())[0]["message"]
+    assert files_in(tmp_path / PROCESSING_DIR) == []
+    assert files_in(tmp_path) == [DONE_DIR, FAILED_DIR, "ignored.txt", PROCESSING_DIR]
+    assert await db.cargo_items.count_documents({}) == 5
+    assert SPOOL_FILES.value(outcome="failed") == failed_before + 1
+
+
+@pytest.mark.asyncio
+async def test_spool_skips_unsettled_files(watcher: SpoolWatcher, tmp_path) -> None:
+    """Test that files still being written are left alone."""
+    watcher.settle_seconds = 60
+    (tmp_path / "1.edi").write_text(EDI_FILE.format(1))
+
+    await watcher.run_once()
+
+    assert files_in(tmp_path / DONE_DIR) == []
+    assert (tmp_path / "1.edi").exists()
+
+
+@pytest.mark.asyncio
+async def test_spool_requeues_stale_claims(watcher: SpoolWatcher, tmp_path) -> None:
+    """Test that a file abandoned in processing is returned and decoded."""
+    watcher._prepare()
+    (tmp_path / PROCESSING_DIR / "123-1.edi").write_text(EDI_FILE.format(1))
+    watcher.claim_timeout = -1
+
+    await watcher.run_once()
+
+    assert [name.split("-", 1)[1] for name in files_in(tmp_path / DONE_DIR)] == ["1.edi"]
+
+
+@pytest.mark.asyncio
+async def test_spool_watcher_picks_up_new_files(watcher: SpoolWatcher, tmp_path) -> None:
+    """Test that a running watcher decodes files as they arrive."""
+    await watcher.start()
+    try:
+        (tmp_path / "1.edi").write_text(EDI_FILE.format(1))
+        deadline = time.monotonic() + 5
+        while not files_in(tmp_path / DONE_DIR) and time.monotonic() < deadline:
+            await watcher.drain()
+            await asyncio.sleep(0.01)
+    finally:
+        await watcher.stop()
+
+    assert len(files_in(tmp_path / DONE_DIR)) == 1
+
+
+@pytest.mark.asyncio
+async def test_spool_requeues_files_that_failed_to_store(watcher: SpoolWatcher, tmp_path, db, monkeypatch) -> None:
+    """Test that a file whose items could not be stored is left for a retry rather than filed as done."""
+
+    async def unavailable(cargo_items):
+        raise ServerSelectionTimeoutError("database unavailable")
+
+    monkeypatch.setattr(CargoRepository, "create_cargo_items", staticmethod(unavailable))
+    (tmp_path / "1.edi").write_text(EDI_FILE.format(1))
+    requeued_before = SPOOL_FILES.value(outcome="requeued")
+
+    await watcher.run_once()
+
+    assert files_in(tmp_path / DONE_DIR) == files_in(tmp_path / FAILED_DIR) == []
+    assert [name.split("-", 1)[1] for name in files_in(tmp_path / PROCESSING_DIR)] == ["1.edi"]
+    assert SPOOL_FILES.value(outcome="requeued") == requeued_before + 1
+
+    monkeypatch.undo()
+    watcher.claim_timeout = -1
+    await watcher.run_once()
+    assert [name.split("-", 1)[1] for name in files_in(tmp_path / DONE_DIR)] == ["1.edi"]
+
+
+@pytest.mark.asyncio
+async def test_spool_renews_claims_while_decoding(watcher: SpoolWatcher, tmp_path) -> None:
+    """Test that claims are renewed by their own task while their files are being decoded."""
+    watcher._prepare()
+    claimed = tmp_path / PROCESSING_DIR / "123-1.edi"
+    claimed.write_text(EDI_FILE.format(1))
+    os.utime(claimed, (0, 0))
+    watcher._claimed.add(str(claimed))
+    watcher.claim_timeout = 0.03
+
+    renewer = asyncio.create_task(watcher._keep_claims())
+    await asyncio.sleep(0.05)
+    renewer.cancel()
+
+    assert claimed.stat().st_mtime > 0
@@ -0,0 +1,256 @@
+"""Tests for Idempotency-Key replay."""
+
+import asyncio
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI, Response, status
+from httpx import ASGITransport, AsyncClient
+
+from app.constants.error_messages import EErrorMessage
+from app.db import resilience
+from app.db.idempotency_repository import COLLECTION
+from app.db.resilience import CircuitBreaker
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.idempotency import IDEMPOTENCY_REQUESTS, REPLAYED_HEADER, IdempotencyMiddleware
+from app.tests.test_edi_decode import VALID_EDI_MESSAGE
+
+
+def counting_app(**middleware_options) -> tuple[FastAPI, dict]:
+    """Build an app whose endpoint counts its calls, optionally blocking until released."""
+    app = FastAPI()
+    state = {"calls": 0, "release": None, "status": status.HTTP_200_OK}
+
+    @app.post("/edi/decode")
+    async def decode(payload: dict, response: Response) -> dict:
+        state["calls"] += 1
+        if state["release"] is not None:
+            await state["release"].wait()
+        response.status_code = state["status"]
+        return {"call": state["calls"], "payload": payload}
+
+    app.add_middleware(IdempotencyMiddleware, paths=("/edi/decode",), **middleware_options)
+    app.add_middleware(CompressionMiddleware, minimum_size=1, decompress_paths=("/edi",))
+    return app, state
+
+
+@pytest.mark.asyncio
+async def test_retry_replays_stored_response(db):
+    """Test that a retry gets the first response without running the request again."""
+    app, state = counting_app()
+    key = str(uuid4())
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        first = await client.post("/edi/decode", json={"a": 1}, headers={"Idempotency-Key": key})
+        retry = await client.post("/edi/decode", json={"a": 1}, headers={"Idempotency-Key": key})
+        unkeyed = await client.post("/edi/decode", json={"a": 1})
+
+    assert first.status_code == retry.status_code == status.HTTP_200_OK
+    assert retry.json() == first.json() == {"call": 1, "payload": {"a": 1}}
+    assert retry.headers[REPLAYED_HEADER] == "true"
+    assert REPLAYED_HEADER not in first.headers
+    assert unkeyed.json()["call"] == 2
+    assert state["calls"] == 2
+
+    record = await db[COLLECTION].find_one({"_id": f"/edi/decode:{key}"})
+    assert record["state"] == "completed"
+    assert record["status"] == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_retry_replays_from_store_without_cache():
+    """Test that a response stored by another process is replayed."""
+    app, state = counting_app()
+    other_app, other_state = counting_app(cache_size=0)
+    key = str(uuid4())
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        first = await client.post("/edi/decode", json={"a": 1}, headers={"Idempotency-Key": key})
+    async with AsyncClient(transport=ASGITransport(app=other_app), base_url="http://test") as client:
+        retry = await client.post("/edi/decode", json={"a": 1}, headers={"Idempotency-Key": key})
+
+    assert retry.json() == first.json()
+    assert retry.headers[REPLAYED_HEADER] == "true"
+    assert (state["calls"], other_state["calls"]) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_inflight_duplicates_wait_for_original():
+    """Test that duplicates of a running request wait for it instead of running again."""
+    app, state = counting_app()
+    state["release"] = asyncio.Event()
+    key = str(uuid4())
+    waited_before = IDEMPOTENCY_REQUESTS.value(outcome="waited")
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        requests = [
+            asyncio.create_task(client.post("/edi/decode", json={"a": 1}, headers={"Idempotency-Key": key}))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0.05)
+        state["release"].set()
+        responses = await asyncio.gather(*requests)
+
+    assert state["calls"] == 1
+    assert [response.json()["call"] for response in responses] == [1, 1, 1]
+    assert IDEMPOTENCY_REQUESTS.value(outcome="waited") == waited_before + 2
+
+
+@pytest.mark.asyncio
+async def test_inflight_duplicates_wait_across_processes():
+    """Test that a duplicate reaching another process polls the pending record until the response is stored."""
+    app, state = counting_app()
+    other_app, other_state = counting_app(poll_interval=0.01)
+    state["release"] = asyncio.Event()
+    key = str(uuid4())
+
+    async with (
+        AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client,
+        AsyncClient(transport=ASGITransport(app=other_app), base_url="http://test") as other_client,
+    ):
+        original = asyncio.create_task(client.post("/edi/decode", json={"a": 1}, headers={"Idempotency-Key": key}))
+        await asyncio.sleep(0.05)
+        duplicate = asyncio.create_task(
+            other_client.post("/edi/decode", json={"a": 1}, headers={"Idempotency-Key": key})
+        )
+        await asyncio.sleep(0.05)
+        assert not duplicate.done()
+        state["release"].set()
+
+        assert (await duplicate).json() == (await original).json()
+
+    assert (state["calls"], other_state["calls"]) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_key_reused_for_different_request():
+    """Test that a key reused with a different body is rejected."""
+    app, state = counting_app()
+    key = str(uuid4())
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        await client.post("/edi/decode", json={"a": 1}, headers={"Idempotency-Key": key})
+        response = await client.post("/edi/decode", json={"a": 2}, headers={"Idempotency-Key": key})
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["detail"] == EErrorMessage.IDEMPOTENCY_KEY_REUSED
+    assert state["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalid_key():
+    """Test that empty and overlong keys are rejected."""
+    app, state = counting_app(max_key_length=8)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        for key in ("", "x" * 9):
+            response = await client.post("/edi/decode", json={}, headers={"Idempotency-Key": key})
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    assert state["calls"] == 0
+
+
+@pytest.mark.asyncio
+async def test_server_errors_are_not_stored(db):
+    """Test that a failed request runs again on retry."""
+    app, state = counting_app()
+    state["status"] = status.HTTP_503_SERVICE_UNAVAILABLE
+    key = str(uuid4())
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        await client.post("/edi/decode", json={"a": 1}, headers={"Idempotency-Key": key})
+        assert await db[COLLECTION].count_documents({}) == 0
+
+        state["status"] = status.HTTP_200_OK
+        response = await client.post("/edi/decode", json={"a": 1}, headers={"Idempotency-Key": key})
+
+    assert response.json()["call"] == 2
+    assert REPLAYED_HEADER not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_large_responses_are_not_stored():
+    """Test that responses over the size limit run again on retry."""
+    app, state = counting_app(max_response_bytes=10)
+    key = str(uuid4())
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        for _ in range(2):
+            await client.post("/edi/decode", json={"a": 1}, headers={"Idempotency-Key": key})
+
+    assert state["calls"] == 2
+
+
+@pytest.mark.asyncio
+async def test_decode_retry_stores_items_once(client: AsyncClient, db):
+    """Test that retrying a decode with the same key does not insert its cargo items again."""
+    headers = {"Idempotency-Key": str(uuid4())}
+    first = await client.post("/api/v1/edi/decode", json={"edi_content": VALID_EDI_MESSAGE}, headers=headers)
+    retry = await client.post("/api/v1/edi/decode", json={"edi_content": VALID_EDI_MESSAGE}, headers=headers)
+
+    assert first.status_code == retry.status_code == status.HTTP_200_OK
+    assert retry.json() == first.json()
+    assert retry.headers[REPLAYED_HEADER] == "true"
+    assert await db.cargo_items.count_documents({}) == 1
+
+
+@pytest.mark.asyncio
+async def test_replay_is_encoded_for_the_retry(db):
+    """Test that the uncompressed response is stored and compressed, or not, for each retry."""
+    app, state = counting_app()
+    headers = {"Idempotency-Key": str(uuid4())}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        first = await client.post("/edi/decode", json={"a": 1}, headers={**headers, "Accept-Encoding": "gzip"})
+        retry = await client.post("/edi/decode", json={"a": 1}, headers={**headers, "Accept-Encoding": "identity"})
+
+    assert first.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in retry.headers
+    assert retry.headers[REPLAYED_HEADER] == "true"
+    assert retry.json() == first.json()
+    assert state["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalid_compressed_body(db):
+    """Test that a keyed request with a corrupt compressed body is rejected with 400, not a server error."""
+    app, state = counting_app()
+    headers = {"Idempotency-Key": str(uuid4()), "Content-Type": "application/json", "Content-Encoding": "gzip"}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/edi/decode", content=b"not gzip", headers=headers)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == EErrorMessage.INVALID_COMPRESSED_BODY.value.format("gzip")
+    assert state["calls"] == 0
+
+
+@pytest.mark.asyncio
+async def test_key_reused_with_different_accept(db):
+    """Test that a retry asking for another media type is not given the stored representation."""
+    app, state = counting_app()
+    headers = {"Idempotency-Key": str(uuid4())}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        await client.post("/edi/decode", json={"a": 1}, headers={**headers, "Accept": "application/json"})
+        retry = await client.post("/edi/decode", json={"a": 1}, headers={**headers, "Accept": "application/msgpack"})
+
+    assert retry.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert state["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_database_unavailable(monkeypatch):
+    """Test that keyed requests fail fast with 503 while the database breaker is open."""
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    monkeypatch.setattr(resilience, "get_breaker", lambda: breaker)
+    app, state = counting_app()
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/edi/decode", json={"a": 1}, headers={"Idempotency-Key": str(uuid4())})
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json()["detail"] == EErrorMessage.DATABASE_UNAVAILABLE.value
+    assert "retry-after" in response.headers
+    assert state["calls"] == 0
@@ -0,0 +1,93 @@
+"""Tests for manifest summaries returned by decode."""
+
+import pytest
+from fastapi import status
+
+from app.constants import ECargoType
+from app.models.cargo_item import CargoItem
+from app.services.manifest_summary import summarize_cargo_items
+from app.tests.test_edi_decode import VALID_EDI_MESSAGE_MULTIPLE
+
+
+def test_summarize_cargo_items():
+    """Test totals per cargo type, container and master bill."""
+    summary = summarize_cargo_items(
+        [
+            CargoItem(
+                cargo_type=ECargoType.FCL,
+                number_of_packages=2,
+                container_number="C1",
+                master_bill_of_lading_number="M1",
+                house_bill_of_lading_number="H1",
+            ),
+            CargoItem(
+                cargo_type=ECargoType.LCL,
+                number_of_packages=3,
+                container_number="C1",
+                master_bill_of_lading_number="M1",
+                house_bill_of_lading_number="H2",
+            ),
+            CargoItem(
+                cargo_type=ECargoType.LCL,
+                number_of_packages=4,
+                container_number="C2",
+                master_bill_of_lading_number="M1",
+                house_bill_of_lading_number="H2",
+            ),
+            CargoItem(cargo_type=ECargoType.LCL, number_of_packages=5, master_bill_of_lading_number="M2"),
+            CargoItem(cargo_type=ECargoType.FCL, number_of_packages=6, house_bill_of_lading_number="H3"),
+        ]
+    ).model_dump(mode="json")
+
+    assert summary == {
+        "items": 5,
+        "packages": 20,
+        "cargo_types": [
+            {"cargo_type": "FCL", "items": 2, "packages": 8},
+            {"cargo_type": "LCL", "items": 3, "packages": 12},
+        ],
+        "containers": 2,
+        "packages_per_container": [
+            {"container_number": "C1", "items": 2, "packages": 5},
+            {"container_number": "C2", "items": 1, "packages": 4},
+        ],
+        "house_bills": 3,
+        "master_bills": [
+            {"master_bill_of_lading_number": "M1", "house_bills": 2, "items": 3, "packages": 9},
+            {"master_bill_of_lading_number": "M2", "house_bills": 0, "items": 1, "packages": 5},
+        ],
+    }
+
+
+def test_summarize_no_items():
+    """Test that an empty manifest sums to zero."""
+    summary = summarize_cargo_items([])
+    assert summary.items == summary.packages == summary.containers == summary.house_bills == 0
+    assert summary.cargo_types == summary.packages_per_container == summary.master_bills == []
+
+
+@pytest.mark.asyncio
+async def test_decode_with_summary(client, db):
+    """Test that decode returns the summary alongside the items only when asked."""
+    response = await client.post("/api/v1/edi/decode", json={"edi_content": VALID_EDI_MESSAGE_MULTIPLE})
+    assert response.json()["summary"] is None
+
+    response = await client.post(
+        "/api/v1/edi/decode", params={"summary": "true"}, json={"edi_content": VALID_EDI_MESSAGE_MULTIPLE}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert len(data["cargo_items"]) == 2
+    assert data["summary"]["packages"] == 12
+    assert data["summary"]["cargo_types"] == [
+        {"cargo_type": "FCL", "items": 1, "packages": 3},
+        {"cargo_type": "LCL", "items": 1, "packages": 9},
+    ]
+    assert data["summary"]["packages_per_container"] == [
+        {"container_number": "ABC123", "items": 1, "packages": 9},
+        {"container_number": "BETA123", "items": 1, "packages": 3},
+    ]
+    assert data["summary"]["master_bills"] == [
+        {"master_bill_of_lading_number": "DEF456", "house_bills": 1, "items": 1, "packages": 9},
+        {"master_bill_of_lading_number": "GAMMA345", "house_bills": 0, "items": 1, "packages": 3},
+    ]
@@ -0,0 +1,197 @@
+"""Tests for the local write outbox and its replay into MongoDB."""
+
+from datetime import UTC, datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import status
+
+from app.config import get_settings
+from app.db import outbox as outbox_module
+from app.db.cargo_repository import CargoRepository
+from app.db.outbox import CARGO_ITEMS, Outbox, OutboxCargoRepository, repositories
+from app.services.outbox_drainer import OUTBOX_DEAD_LETTERED, OUTBOX_REPLAY_FAILURES, OutboxDrainer
+from app.tests.test_edi_decode import VALID_EDI_MESSAGE, VALID_EDI_MESSAGE_MULTIPLE
+
+
+@pytest.fixture
+def outbox(tmp_path, monkeypatch):
+    """Route decode and generate writes through an outbox in a temporary directory."""
+    box = Outbox(str(tmp_path / "outbox" / "outbox.db"))
+    monkeypatch.setattr(outbox_module, "get_outbox", lambda: box)
+    yield box
+    box.close()
+
+
+@pytest.fixture
+def drainer(outbox):
+    """Drainer for the test outbox."""
+    return OutboxDrainer(outbox, interval=0.01, batch_size=100)
+
+
+def test_records_round_trip(outbox):
+    """Test that records keep their BSON types and are deleted once acknowledged."""
+    object_id, created_at = ObjectId(), datetime(2026, 10, 19, 12, 30, tzinfo=UTC)
+    outbox.append(CARGO_ITEMS, {"docs": [{"_id": object_id, "created_at": created_at}], "upsert": False})
+    outbox.append(CARGO_ITEMS, {"docs": [], "upsert": False})
+
+    records = outbox.read(10)
+    assert [record.kind for record in records] == [CARGO_ITEMS, CARGO_ITEMS]
+    assert records[0].payload["docs"] == [{"_id": object_id, "created_at": created_at}]
+
+    outbox.ack([records[0].seq], {"a": "b"})
+    assert outbox.pending() == 1
+    assert outbox.replaced_ids(["a", "c"]) == {"a": "b"}
+
+
+def test_repositories_without_outbox():
+    """Test that writes go straight to MongoDB unless the outbox is enabled."""
+    cargo_repository, _ = repositories()
+    assert type(cargo_repository) is CargoRepository
+
+
+@pytest.mark.asyncio
+async def test_decode_is_replayed_with_returned_ids(client, db, outbox, drainer):
+    """Test that a decode answers from the outbox and is stored under the same IDs once drained."""
+    response = await client.post("/api/v1/edi/decode", json={"edi_content": VALID_EDI_MESSAGE_MULTIPLE})
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    item_ids = [item["id"] for item in data["cargo_items"]]
+    assert all(item_ids) and data["message_id"]
+    assert await db.cargo_items.count_documents({}) == 0
+    assert outbox.pending() == 2
+
+    assert await drainer.drain_once() == 2
+    assert outbox.pending() == 0
+    stored = await db.cargo_items.find({}, {"_id": True}).to_list(None)
+    assert sorted(str(doc["_id"]) for doc in stored) == sorted(item_ids)
+    message = await db.edi_messages.find_one({"_id": ObjectId(data["message_id"])})
+    assert message["cargo_item_ids"] == item_ids
+    assert message["edi_content"] == VALID_EDI_MESSAGE_MULTIPLE
+
+
+@pytest.mark.asyncio
+async def test_generate_is_replayed(client, db, outbox, drainer):
+    """Test that generate appends its writes to the outbox."""
+    response = await client.post(
+        "/api/v1/edi/generate", json={"items": [{"cargo_type": "FCL", "number_of_packages": 2}]}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert outbox.pending() == 2
+
+    await drainer.drain()
+    assert await db.cargo_items.count_documents({}) == 1
+    assert await db.edi_messages.count_documents({"_id": ObjectId(response.json()["message_id"])}) == 1
+
+
+@pytest.mark.asyncio
+async def test_repeated_replay_skips_written_documents(client, db, outbox, drainer):
+    """Test that records replayed again after a crash before acknowledgement are not stored twice."""
+    await client.post("/api/v1/edi/decode", json={"edi_content": VALID_EDI_MESSAGE})
+    records = outbox.read(10)
+    for record in records:
+        await drainer._replay(record.kind, [record], {})
+
+    assert await drainer.drain_once() == len(records)
+    assert await db.cargo_items.count_documents({}) == 1
+    assert await db.edi_messages.count_documents({}) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_replay_keeps_records(client, db, outbox, drainer, monkeypatch):
+    """Test that records stay in the outbox until MongoDB takes them."""
+    await client.post("/api/v1/edi/decode", json={"edi_content": VALID_EDI_MESSAGE})
+    failures_before = OUTBOX_REPLAY_FAILURES.value()
+
+    async def unavailable(docs, upsert):
+        raise ConnectionError("MongoDB is down")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(OutboxCargoRepository, "replay", unavailable)
+        assert await drainer.drain_once() == 0
+    assert outbox.pending() == 2
+    assert OUTBOX_REPLAY_FAILURES.value() == failures_before + 1
+
+    assert await drainer.drain_once() == 2
+    assert await db.cargo_items.count_documents({}) == 1
+
+
+@pytest.mark.asyncio
+async def test_upserted_items_keep_stored_ids(client, db, outbox, drainer, monkeypatch):
+    """Test that an upsert returns, and its replayed message refers to, the stored item it matched."""
+    monkeypatch.setattr(get_settings(), "CARGO_UPSERT_NATURAL_KEY", True)
+    await client.post("/api/v1/edi/decode", json={"edi_content": VALID_EDI_MESSAGE})
+    await drainer.drain_once()
+    existing_id = str((await db.cargo_items.find_one({}))["_id"])
+
+    response = await client.post("/api/v1/edi/decode", json={"edi_content": VALID_EDI_MESSAGE})
+    await drainer.drain_once()
+
+    assert [item["id"] for item in response.json()["cargo_items"]] == [existing_id]
+    assert (await client.get(f"/api/v1/edi/cargo-items/{existing_id}")).status_code == status.HTTP_200_OK
+    assert await db.cargo_items.count_documents({}) == 1
+    message = await db.edi_messages.find_one({"_id": ObjectId(response.json()["message_id"])})
+    assert message["cargo_item_ids"] == [existing_id]
+
+
+def test_outbox_is_opened_per_process(tmp_path, monkeypatch):
+    """Test that the outbox is opened on first use in each process rather than when the app is built."""
+    monkeypatch.setattr(get_settings(), "OUTBOX_PATH", str(tmp_path / "outbox.db"))
+    monkeypatch.setattr(outbox_module, "_outboxes", {})
+    assert OutboxDrainer.from_settings(get_settings()).outbox is None
+    assert outbox_module._outboxes == {}
+
+    parent = outbox_module.get_outbox()
+    assert outbox_module.get_outbox() is parent
+    monkeypatch.setattr(outbox_module.os, "getpid", lambda: -1)
+    child = outbox_module.get_outbox()
+    assert child is not parent
+    for box in (parent, child):
+        box.close()
+
+
+@pytest.mark.asyncio
+async def test_one_drainer_at_a_time(client, db, outbox, drainer):
+    """Test that a second worker's drainer leaves the outbox alone until the lease holder stops."""
+    other_outbox = Outbox(outbox.path)
+    other = OutboxDrainer(other_outbox, interval=0.01, batch_size=100)
+    await client.post("/api/v1/edi/decode", json={"edi_content": VALID_EDI_MESSAGE})
+    assert await drainer.drain_once() == 2
+    await client.post("/api/v1/edi/decode", json={"edi_content": VALID_EDI_MESSAGE})
+    assert await other.drain_once() == 0
+
+    outbox.release_drain_lease(drainer.owner)
+    assert await other.drain_once() == 2
+    assert await drainer.drain_once() == 0
+    other_outbox.close()
+
+
+@pytest.mark.asyncio
+async def test_rejected_records_are_dead_lettered(db, outbox, monkeypatch):
+    """Test that a record MongoDB keeps rejecting is set aside after its attempts, unblocking later records."""
+    drainer = OutboxDrainer(outbox, interval=0.01, batch_size=100, max_attempts=2)
+    bad, good = ObjectId(), ObjectId()
+    created_at = datetime(2026, 10, 19, tzinfo=UTC)
+    for object_id in (bad, good):
+        doc = {"_id": object_id, "cargo_type": "FCL", "number_of_packages": 1, "created_at": created_at}
+        outbox.append(CARGO_ITEMS, {"docs": [doc], "upsert": False})
+    replay = OutboxCargoRepository.replay
+
+    async def reject_bad(docs, upsert):
+        if any(doc["_id"] == bad for doc in docs):
+            raise ValueError("document failed validation")
+        return await replay(docs, upsert)
+
+    monkeypatch.setattr(OutboxCargoRepository, "replay", reject_bad)
+    dead_before = OUTBOX_DEAD_LETTERED.value(kind=CARGO_ITEMS)
+
+    assert await drainer.drain_once() == 0
+    assert outbox.pending() == 2
+    assert await drainer.drain_once() == 1
+    assert outbox.pending() == 0
+    assert [(record.payload["docs"][0]["_id"], error) for record, error in outbox.dead_letters()] == [
+        (bad, "ValueError('document failed validation')")
+    ]
+    assert OUTBOX_DEAD_LETTERED.value(kind=CARGO_ITEMS) == dead_before + 1
+    assert [doc["_id"] for doc in await db.cargo_items.find({}).to_list(None)] == [good]
@@ -0,0 +1,153 @@
+"""Tests for monthly collection buckets and their retention."""
+
+import gzip
+import json
+from datetime import UTC, datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import status
+
+from app.config import get_settings
+from app.db.cargo_repository import CargoRepository
+from app.db.edi_repository import EDIRepository
+from app.db.partitions import bucket_name, object_id_at, read_collections
+from app.models.cargo_item import CargoItem
+from app.services.retention import RetentionService, retention_cutoff
+
+SEPTEMBER = datetime(2026, 9, 30, 23, 59, 59, tzinfo=UTC)
+OCTOBER = datetime(2026, 10, 1, tzinfo=UTC)
+
+
+@pytest.fixture
+def partitioned(monkeypatch):
+    """Enable monthly buckets."""
+    monkeypatch.setattr(get_settings(), "PARTITION_BY_MONTH", True)
+
+
+async def create_items(*created_at: datetime) -> list[str]:
+    """Store one cargo item per creation time."""
+    return await CargoRepository.create_cargo_items(
+        [
+            CargoItem(cargo_type="FCL", number_of_packages=index + 1, container_number="BUCKET1", created_at=when)
+            for index, when in enumerate(created_at)
+        ]
+    )
+
+
+def test_object_id_at():
+    """Test that generated IDs carry the creation time and stay unique."""
+    first, second = object_id_at(SEPTEMBER), object_id_at(SEPTEMBER)
+    assert first != second
+    assert first.generation_time == SEPTEMBER
+    assert bucket_name("cargo_items", first.generation_time) == "cargo_items_2026_09"
+
+
+def test_retention_cutoff():
+    """Test counting whole months back across a year boundary."""
+    assert retention_cutoff(datetime(2026, 2, 15, tzinfo=UTC), 3) == datetime(2025, 11, 1, tzinfo=UTC)
+
+
+@pytest.mark.asyncio
+async def test_items_written_to_monthly_buckets(db, partitioned):
+    """Test that items land in their month's bucket and are found by ID and in order."""
+    ids = await create_items(OCTOBER, SEPTEMBER, OCTOBER)
+
+    assert await db.cargo_items_2026_09.count_documents({}) == 1
+    assert await db.cargo_items_2026_10.count_documents({}) == 2
+    assert await db.cargo_items.count_documents({}) == 0
+
+    assert (await CargoRepository.get_cargo_item(ids[1])).number_of_packages == 2
+    docs = await CargoRepository.find_cargo_items_by_ids(ids)
+    assert [str(doc["_id"]) for doc in docs] == ids
+
+
+@pytest.mark.asyncio
+async def test_reads_fan_out_to_touched_buckets(db, partitioned):
+    """Test that date ranges only read the buckets they overlap and pages continue across buckets."""
+    await create_items(SEPTEMBER, OCTOBER)
+
+    assert await read_collections("cargo_items", start=OCTOBER) == ["cargo_items_2026_10"]
+    assert await read_collections("cargo_items", end=OCTOBER) == ["cargo_items_2026_09"]
+    assert await read_collections("cargo_items", newest_first=True) == ["cargo_items_2026_10", "cargo_items_2026_09"]
+
+    page = await CargoRepository.search_cargo_items({"container_number": "BUCKET1"}, 1)
+    assert page[0]["created_at"].replace(tzinfo=UTC) == OCTOBER
+    after = (page[0]["created_at"].replace(tzinfo=UTC), page[0]["_id"])
+    page = await CargoRepository.search_cargo_items({"container_number": "BUCKET1"}, 1, after=after)
+    assert page[0]["created_at"].replace(tzinfo=UTC) == SEPTEMBER
+
+
+@pytest.mark.asyncio
+async def test_search_endpoint_across_buckets(client, partitioned):
+    """Test paging through the search endpoint when results span buckets."""
+    ids = await create_items(SEPTEMBER, OCTOBER, OCTOBER)
+
+    response = await client.get("/api/v1/edi/cargo-items", params={"container_number": "BUCKET1", "limit": 2})
+    data = response.json()
+    response = await client.get("/api/v1/edi/cargo-items", params={"cursor": data["next_cursor"], "limit": 2})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["id"] for item in response.json()["cargo_items"]] == [ids[0]]
+
+
+@pytest.mark.asyncio
+async def test_messages_written_to_monthly_buckets(db, partitioned):
+    """Test that messages are stored in the bucket of their ID's month."""
+    message_id = str(ObjectId())
+
+    await EDIRepository.store_edi_message("LIN+1+I'", [], message_id=message_id)
+
+    name = bucket_name("edi_messages", ObjectId(message_id).generation_time)
+    assert await db[name].count_documents({}) == 1
+    assert (await EDIRepository.get_edi_message(message_id)).edi_content == "LIN+1+I'"
+    assert await EDIRepository.edi_message_exists(message_id)
+
+
+@pytest.mark.asyncio
+async def test_archive_expired_buckets(db, partitioned, monkeypatch, tmp_path):
+    """Test that expired buckets are archived with their GridFS content and dropped."""
+    monkeypatch.setattr(get_settings(), "EDI_CONTENT_COMPRESS_THRESHOLD_BYTES", 1)
+    monkeypatch.setattr(get_settings(), "EDI_CONTENT_GRIDFS_THRESHOLD_BYTES", 1)
+    await create_items(SEPTEMBER, OCTOBER)
+    old_message_id = str(object_id_at(SEPTEMBER))
+    await EDIRepository.store_edi_message("LIN+1+I'", [], message_id=old_message_id)
+
+    service = RetentionService(retention_months=1, archive_dir=str(tmp_path))
+    now = datetime(2026, 11, 5, tzinfo=UTC)
+    assert await service.expired_buckets(now) == ["cargo_items_2026_09", "edi_messages_2026_09"]
+
+    assert await service.run_once(now) == {"cargo_items_2026_09": 1, "edi_messages_2026_09": 1}
+
+    assert "cargo_items_2026_09" not in await db.list_collection_names()
+    assert await db.cargo_items_2026_10.count_documents({}) == 1
+    assert await db["edi_content.files"].count_documents({}) == 0
+    with gzip.open(tmp_path / "edi_messages_2026_09.ndjson.gz") as archive:
+        [message] = [json.loads(line) for line in archive]
+    assert message["_id"] == {"$oid": old_message_id}
+    assert message["content_storage"] == "compressed"
+    assert "content_data" in message
+
+
+@pytest.mark.asyncio
+async def test_upsert_matches_items_in_earlier_buckets(db, partitioned, monkeypatch):
+    """Test that a re-sent item updates the stored item in its own month rather than duplicating it."""
+    monkeypatch.setattr(get_settings(), "CARGO_UPSERT_NATURAL_KEY", True)
+    [first] = await create_items(SEPTEMBER)
+    [again] = await create_items(OCTOBER)
+
+    assert again == first
+    assert await db.cargo_items_2026_09.count_documents({}) == 1
+    assert await db.cargo_items_2026_10.count_documents({}) == 0
+
+
+@pytest.mark.asyncio
+async def test_offset_creation_time_uses_utc_bucket(db, client, partitioned):
+    """Test that an item created with a UTC offset lands in, and is found in, its UTC month's bucket."""
+    [item_id] = await create_items(datetime.fromisoformat("2026-10-31T23:30:00-05:00"))
+
+    assert await db.cargo_items_2026_11.count_documents({}) == 1
+    response = await client.get(f"/api/v1/edi/cargo-items/{item_id}")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert datetime.fromisoformat(response.json()["created_at"]) == datetime(2026, 11, 1, 4, 30, tzinfo=UTC)
@@ -0,0 +1,168 @@
+"""Tests for deadlines, retries and the circuit breaker around database calls."""
+
+import asyncio
+from functools import partial
+
+import pytest
+from bson import ObjectId
+from fastapi import status
+from pymongo.errors import AutoReconnect, OperationFailure
+
+from app.config import get_settings
+from app.constants.error_messages import EErrorMessage
+from app.db import resilience
+from app.db.cargo_repository import CargoRepository
+from app.db.edi_repository import EDIRepository
+from app.db.resilience import (
+    BREAKER_STATE,
+    DATABASE_RETRIES,
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceededError,
+    call_database,
+    insert_once,
+    request_deadline,
+)
+from app.tests.test_edi_decode import VALID_EDI_MESSAGE
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    """Use a fresh breaker that opens after two failures, and retry without waiting."""
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+    monkeypatch.setattr(resilience, "get_breaker", lambda: breaker)
+    monkeypatch.setattr(get_settings(), "DB_RETRY_BASE_DELAY_SECONDS", 0)
+    return breaker
+
+
+def flaky(failures: int, error: Exception):
+    """Operation raising ``error`` on its first ``failures`` calls, then returning the number of calls."""
+    calls = []
+
+    async def operation() -> int:
+        calls.append(None)
+        if len(calls) <= failures:
+            raise error
+        return len(calls)
+
+    return operation
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried(breaker):
+    """Test that a call failing with a transient error is retried until it succeeds."""
+    retries_before = DATABASE_RETRIES.value(operation="flaky")
+
+    assert await call_database(flaky(1, AutoReconnect("failover")), "flaky") == 2
+    assert DATABASE_RETRIES.value(operation="flaky") == retries_before + 1
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_other_errors_are_not_retried(breaker):
+    """Test that errors the database answered with are raised at once and do not count against it."""
+    with pytest.raises(OperationFailure):
+        await call_database(flaky(1, OperationFailure("bad query")), "flaky")
+    assert breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_and_recovers(breaker):
+    """Test that repeated failures open the breaker, which fails fast until a trial call succeeds."""
+    with pytest.raises(AutoReconnect):
+        await call_database(flaky(5, AutoReconnect("down")), "flaky")
+    assert breaker.state == CircuitBreaker.OPEN
+    assert BREAKER_STATE.value(breaker="test") == CircuitBreaker.OPEN
+
+    operation = flaky(0, AutoReconnect("down"))
+    with pytest.raises(CircuitOpenError):
+        await call_database(operation, "flaky")
+
+    breaker.opened_at -= breaker.reset_timeout
+    assert await call_database(operation, "flaky") == 1
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert BREAKER_STATE.value(breaker="test") == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_failed_trial_reopens_breaker(breaker):
+    """Test that a failing trial call reopens the breaker without retrying."""
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.opened_at -= breaker.reset_timeout
+
+    with pytest.raises(AutoReconnect):
+        await call_database(flaky(5, AutoReconnect("down")), "flaky")
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.retry_after > 0
+
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_calls(breaker):
+    """Test that a call still running when the request deadline passes is abandoned."""
+
+    async def hang() -> None:
+        await asyncio.sleep(10)
+
+    with request_deadline(0.05), pytest.raises(DeadlineExceededError):
+        await call_database(hang, "hang")
+
+    with request_deadline(0), pytest.raises(DeadlineExceededError):
+        await call_database(flaky(0, AutoReconnect("down")), "flaky")
+
+
+@pytest.mark.asyncio
+async def test_insert_once_can_be_repeated(db):
+    """Test that repeating an insert skips the documents already written."""
+    docs = [{"_id": ObjectId(), "value": index} for index in range(3)]
+    assert await insert_once(db.resilience_test, docs[:2])
+    assert await insert_once(db.resilience_test, docs)
+    assert await insert_once(db.resilience_test, docs[:1])
+
+    assert await db.resilience_test.count_documents({}) == 3
+
+
+@pytest.mark.asyncio
+async def test_decode_falls_back_while_breaker_open(client, db, breaker):
+    """Test that decoding still returns its items, unstored, while the database is unavailable."""
+    breaker.record_failure()
+    breaker.record_failure()
+
+    response = await client.post("/api/v1/edi/decode", json={"edi_content": VALID_EDI_MESSAGE})
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert len(data["cargo_items"]) == 1
+    assert data["message_id"] is None
+    assert EErrorMessage.DATABASE_UNAVAILABLE.value in data["errors"][0]["message"]
+    assert await db.cargo_items.count_documents({}) == 0
+
+
+@pytest.mark.asyncio
+async def test_reads_fail_fast_while_breaker_open(client, breaker):
+    """Test that reads are rejected with 503 and Retry-After while the breaker is open."""
+    breaker.record_failure()
+    breaker.record_failure()
+
+    response = await client.get(f"/api/v1/edi/cargo-items/{ObjectId()}")
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json()["detail"] == EErrorMessage.DATABASE_UNAVAILABLE
+    assert int(response.headers["retry-after"]) == 60
+
+
+@pytest.mark.asyncio
+async def test_lookups_go_through_breaker(breaker):
+    """Test that message lookups and cargo item searches are rejected while the breaker is open."""
+    breaker.record_failure()
+    breaker.record_failure()
+    message_id = str(ObjectId())
+
+    for lookup in (
+        partial(EDIRepository.get_cargo_item_ids, message_id),
+        partial(EDIRepository.get_group_hashes, message_id),
+        partial(EDIRepository.edi_message_exists, message_id),
+        partial(CargoRepository.search_cargo_items, {}, 10),
+    ):
+        with pytest.raises(CircuitOpenError):
+            await lookup()
@@ -0,0 +1,72 @@
+"""Tests for response serialization and content negotiation."""
+
+import msgpack
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from app.tests.test_data import SAMPLE_CARGO_ITEMS
+from app.utils.serialization import prefers_msgpack
+
+VALID_EDI_MESSAGE = """LIN+1+I'
+PAC+++LCL:67:95'
+PAC+9+1'
+PCI+1'
+RFF+AAQ:ABC123'"""
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        ("", False),
+        ("*/*", False),
+        ("application/json", False),
+        ("application/msgpack", True),
+        ("application/x-msgpack", True),
+        ("application/msgpack, application/json;q=0.5", True),
+        ("application/json, application/msgpack;q=0.5", False),
+        ("application/msgpack;q=0", False),
+    ],
+)
+def test_prefers_msgpack(accept: str, expected: bool):
+    """Test Accept header negotiation between JSON and MessagePack."""
+    assert prefers_msgpack(accept) is expected
+
+
+@pytest.mark.asyncio
+async def test_decode_endpoint_json_by_default(client: AsyncClient):
+    """Test that the decode endpoint answers with JSON and UTC timestamps by default."""
+    response = await client.post("/api/v1/edi/decode", json={"edi_content": VALID_EDI_MESSAGE})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/json"
+    cargo_item = response.json()["cargo_items"][0]
+    assert cargo_item["cargo_type"] == "LCL"
+    assert cargo_item["created_at"].endswith("Z")
+
+
+@pytest.mark.asyncio
+async def test_decode_endpoint_msgpack(client: AsyncClient):
+    """Test that the decode endpoint answers with MessagePack when asked to."""
+    response = await client.post(
+        "/api/v1/edi/decode", json={"edi_content": VALID_EDI_MESSAGE}, headers={"Accept": "application/msgpack"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/msgpack"
+    data = msgpack.unpackb(response.content)
+    assert data["errors"] is None
+    assert data["cargo_items"][0]["container_number"] == "ABC123"
+    assert data["cargo_items"][0]["number_of_packages"] == 9
+
+
+@pytest.mark.asyncio
+async def test_generate_endpoint_msgpack(client: AsyncClient):
+    """Test that the generate endpoint answers with MessagePack when asked to."""
+    response = await client.post(
+        "/api/v1/edi/generate", json={"items": SAMPLE_CARGO_ITEMS}, headers={"Accept": "application/msgpack"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    data = msgpack.unpackb(response.content)
+    assert "LIN+1+I'" in data["edi_content"]
@@ -0,0 +1,27 @@
+"""Tests for the production server runtime."""
+
+import os
+
+from app.config import settings
+from app.server import resolve_worker_count, uvicorn_options
+
+
+def test_resolve_worker_count_configured():
+    """Test that a configured worker count is used as-is."""
+    assert resolve_worker_count(3) == 3
+
+
+def test_resolve_worker_count_defaults_to_cpus():
+    """Test that the worker count defaults to the CPUs available to the process."""
+    workers = resolve_worker_count(None)
+    assert 1 <= workers <= (os.cpu_count() or 1)
+
+
+def test_uvicorn_options():
+    """Test that the runtime options carry the keep-alive, backlog and shutdown settings."""
+    options = uvicorn_options(settings)
+    assert options["loop"] in ("uvloop", "asyncio")
+    assert options["http"] in ("httptools", "h11")
+    assert options["timeout_keep_alive"] == settings.KEEP_ALIVE_SECONDS
+    assert options["backlog"] == settings.BACKLOG
+    assert options["timeout_graceful_shutdown"] == settings.GRACEFUL_SHUTDOWN_SECONDS
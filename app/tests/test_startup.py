@@ -0,0 +1,60 @@
+"""Tests for application cold start and the cached health check."""
+
+import subprocess
+import sys
+
+import pytest
+from fastapi import FastAPI, status
+from httpx import AsyncClient
+
+# Generous ceiling for `import app.main`; almost all of it is FastAPI itself
+IMPORT_TIME_BUDGET_US = 1_500_000
+
+# Modules that must only be imported once an app is built or the database is used
+DEFERRED_MODULES = ("motor", "pymongo", "app.api", "app.services", "app.db")
+
+
+def _import_times(module: str) -> dict[str, int]:
+    """Import a module in a fresh interpreter and return cumulative import times in microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_import_main_within_budget():
+    """Test that importing the app module stays within the import-time budget."""
+    times = _import_times("app.main")
+    assert times["app.main"] < IMPORT_TIME_BUDGET_US
+
+
+def test_import_main_defers_heavy_modules():
+    """Test that importing the app module does not import the database driver or the routers."""
+    times = _import_times("app.main")
+    deferred = [name for name in times if name.startswith(DEFERRED_MODULES)]
+    assert deferred == []
+
+
+@pytest.mark.asyncio
+async def test_health_check_is_cached(app: FastAPI, client: AsyncClient):
+    """Test that repeated health checks are served from the cached status."""
+    response = await client.get("/health")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == "healthy"
+    assert response.json()["database"] == "connected"
+
+    monitor = app.state.health_monitor
+    checked_at = monitor.checked_at
+    for _ in range(5):
+        response = await client.get("/health")
+        assert response.status_code == status.HTTP_200_OK
+    assert monitor.checked_at == checked_at
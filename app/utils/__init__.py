@@ -1,16 +1,20 @@
 """Utility functions and helpers."""
 
-from app.utils.cargo_edi import (
-    escape_quotes,
-    generate_edi_segment,
-    parse_edi_message,
-    parse_pac_segment,
-    parse_rff_segment,
-    parse_segment,
-    process_edi_content,
-    unescape_quotes,
-)
-from app.utils.validation import validate_ascii_characters
+import importlib
+from typing import Any
+
+# Re-exported helpers are imported on first access so importing the package stays cheap
+_EXPORTS = {
+    "escape_quotes": "app.utils.cargo_edi",
+    "unescape_quotes": "app.utils.cargo_edi",
+    "generate_edi_segment": "app.utils.cargo_edi",
+    "parse_segment": "app.utils.cargo_edi",
+    "parse_pac_segment": "app.utils.cargo_edi",
+    "parse_rff_segment": "app.utils.cargo_edi",
+    "process_edi_content": "app.utils.cargo_edi",
+    "parse_edi_message": "app.utils.cargo_edi",
+    "validate_ascii_characters": "app.utils.validation",
+}
 
 __all__ = [
     "escape_quotes",
@@ -23,3 +27,10 @@ __all__ = [
     "parse_edi_message",
     "validate_ascii_characters",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """Import a re-exported helper from its defining module."""
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_EXPORTS[name]), name)
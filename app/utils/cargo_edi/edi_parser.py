@@ -1,5 +1,8 @@
 """EDI parsing utilities."""
 
+import hashlib
+import re
+from collections.abc import Iterable, Iterator
 from typing import Optional
 
 from app.constants.cargo import ECargoType
@@ -7,6 +10,8 @@ from app.constants.edi import EEDISegmentType
 from app.constants.error_messages import EErrorMessage
 from app.utils.cargo_edi.edi_generator import unescape_quotes
 
+_LIN_LINE_PATTERN = re.compile(r"^[ \t\r]*LIN\+", re.MULTILINE)
+
 
 def parse_segment(segment: str) -> tuple[str, list[str]]:
     """Parse a segment into its ID and data elements."""
@@ -69,27 +74,72 @@ def parse_rff_segment(elements: list[str]) -> dict[str, str]:
     return {mapping[ref_type]: unescape_quotes(value)}
 
 
-def process_edi_content(edi_content: str) -> list[list[str]]:
-    """Process EDI content into grouped messages."""
-    if not edi_content.strip():
-        raise ValueError(EErrorMessage.NO_ITEMS)
-
-    segments = [s.strip() for s in edi_content.split("\n") if s.strip()]
-    if not segments:
-        raise ValueError(EErrorMessage.NO_ITEMS)
-
-    messages, current = [], []
+def _group_segments(segments: Iterable[str]) -> Iterator[list[str]]:
+    """Group stripped segments into messages that each start with a LIN segment."""
+    current: list[str] = []
     for segment in segments:
+        if not segment:
+            continue
         if segment.startswith("LIN+"):
             if current:
-                messages.append(current)
+                yield current
             current = [segment]
         else:
             if not current:
                 raise ValueError(EErrorMessage.INVALID_SEGMENT_FORMAT)
             current.append(segment)
 
-    if current:
-        messages.append(current)
+    if not current:
+        raise ValueError(EErrorMessage.NO_ITEMS)
+    yield current
+
+
+def process_edi_content(edi_content: str) -> list[list[str]]:
+    """Process EDI content into grouped messages."""
+    if not edi_content.strip():
+        raise ValueError(EErrorMessage.NO_ITEMS)
+
+    return list(_group_segments(s.strip() for s in edi_content.split("\n")))
+
+
+def _iter_lines(edi_content: str) -> Iterator[str]:
+    """Yield the lines of the content without splitting it all at once."""
+    start = 0
+    while start <= len(edi_content):
+        end = edi_content.find("\n", start)
+        if end == -1:
+            end = len(edi_content)
+        yield edi_content[start:end]
+        start = end + 1
+
+
+def iter_message_groups(edi_content: str) -> Iterator[list[str]]:
+    """
+    Yield grouped messages one at a time.
+
+    Same grouping and errors as process_edi_content, but memory stays proportional to one
+    group, which matters for very large documents.
+    """
+    return _group_segments(line.strip() for line in _iter_lines(edi_content))
+
+
+def count_message_groups(edi_content: str) -> int:
+    """Count the message groups in the content without parsing it."""
+    return sum(1 for _ in _LIN_LINE_PATTERN.finditer(edi_content))
+
+
+def group_hash(group: list[str]) -> str:
+    """
+    Hash the content of a message group.
+
+    The LIN segment only carries the line number, so it is left out: a group that merely moved because lines
+    were added or removed before it keeps its hash.
+    """
+    return hashlib.blake2b("\n".join(group[1:]).encode(), digest_size=16).hexdigest()
+
 
-    return messages
+def iter_hashed_groups(groups: Iterable[list[str]], hashes: list[str]) -> Iterator[list[str]]:
+    """Pass message groups through, appending each group's hash to ``hashes``."""
+    for group in groups:
+        hashes.append(group_hash(group))
+        yield group
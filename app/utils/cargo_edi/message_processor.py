@@ -1,11 +1,21 @@
 """EDI message processing utilities."""
 
+from collections import deque
+from collections.abc import Iterator
+from itertools import islice
 from typing import Any, Optional
 
 from app.constants.error_messages import EErrorMessage
 from app.models.cargo_item import CargoItem
 from app.models.responses import ProcessingError
-from app.utils.cargo_edi.edi_parser import parse_pac_segment, parse_rff_segment, parse_segment, process_edi_content
+from app.utils.cargo_edi.edi_parser import (
+    group_hash,
+    iter_message_groups,
+    parse_pac_segment,
+    parse_rff_segment,
+    parse_segment,
+    process_edi_content,
+)
 
 
 def process_segment(segment: str, cargo_data: dict[str, Any]) -> list[str]:
@@ -69,6 +79,76 @@ def parse_message_group(
     return None, None
 
 
+def parse_message_groups(
+    groups: Iterator[list[str]], start: int, count: int
+) -> tuple[list[tuple[int, CargoItem]], list[ProcessingError], int]:
+    """
+    Parse the next message groups of a document.
+
+    Args:
+        groups: Iterator over the document's remaining message groups
+        start: Index of the next group in the document
+        count: Maximum number of groups to parse
+
+    Returns:
+        Tuple containing:
+        - (LIN group index, cargo item) pairs
+        - Errors for groups that failed to parse
+        - Number of groups consumed
+    """
+    cargo_items, errors = [], []
+    consumed = 0
+    for group_idx, group in enumerate(islice(groups, count), start=start):
+        cargo_item, error = parse_message_group(group, group_idx)
+        if cargo_item:
+            cargo_items.append((group_idx, cargo_item))
+        if error:
+            errors.append(error)
+        consumed += 1
+    return cargo_items, errors, consumed
+
+
+def hash_decoded_groups(edi_content: str) -> list[str]:
+    """Hashes of the groups that decode to a cargo item, aligned with the items stored for the message."""
+    hashes = []
+    for group_idx, group in enumerate(iter_message_groups(edi_content)):
+        cargo_item, _ = parse_message_group(group, group_idx)
+        if cargo_item:
+            hashes.append(group_hash(group))
+    return hashes
+
+
+def match_message_groups(
+    edi_content: str, previous_ids: dict[str, deque[str]]
+) -> tuple[list[tuple[str, Optional[str], Optional[CargoItem]]], list[ProcessingError]]:
+    """
+    Decode only the groups of a message that are not in a previous version of it.
+
+    Args:
+        edi_content: The new version of the message
+        previous_ids: Cargo item IDs of the previous version by group hash; matched IDs are removed,
+            so what is left afterwards are the previous items missing from the new version
+
+    Returns:
+        Tuple containing:
+        - (group hash, previous item ID, None) for unchanged groups and (group hash, None, cargo item)
+          for parsed ones, in document order
+        - Errors for groups that failed to parse
+    """
+    groups, errors = [], []
+    for group_idx, group in enumerate(iter_message_groups(edi_content)):
+        hash_ = group_hash(group)
+        if previous_ids.get(hash_):
+            groups.append((hash_, previous_ids[hash_].popleft(), None))
+            continue
+        cargo_item, error = parse_message_group(group, group_idx)
+        if cargo_item:
+            groups.append((hash_, None, cargo_item))
+        if error:
+            errors.append(error)
+    return groups, errors
+
+
 def parse_edi_message(edi_content: str) -> tuple[list[CargoItem], list[ProcessingError]]:
     """Parse EDI message into cargo items.
 
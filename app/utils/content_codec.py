@@ -0,0 +1,22 @@
+"""Compression codecs for stored EDI content."""
+
+import zlib
+
+import zstandard
+
+from app.constants import EContentCodec
+
+
+def compress_content(data: bytes, codec: EContentCodec, level: int) -> bytes:
+    """Compress stored content with the given codec."""
+    if codec == EContentCodec.ZLIB:
+        return zlib.compress(data, level)
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def decompress_content(data: bytes, codec: EContentCodec) -> bytes:
+    """Decompress content stored with the given codec."""
+    if codec == EContentCodec.ZLIB:
+        return zlib.decompress(data)
+    # The frame header records the content size, so zstd can allocate the output once
+    return zstandard.ZstdDecompressor().decompress(data)
@@ -0,0 +1,51 @@
+"""Conditional request helpers for cached resources."""
+
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+from app.utils.serialization import prefers_msgpack
+
+
+def representation_etag(request: Request, *parts: str) -> str:
+    """
+    Build a strong ETag for an immutable resource from its identity.
+
+    The negotiated media type is part of the tag, since JSON and MessagePack bodies differ byte for byte.
+    """
+    media = "msgpack" if prefers_msgpack(request.headers.get("accept", "")) else "json"
+    return '"' + "-".join((*parts, media)) + '"'
+
+
+def version_etag(request: Request, *parts: str) -> str:
+    """
+    Build a weak ETag for a resource that can change, from its identity and current version.
+
+    Weak tags only promise an equivalent representation, which is all a version stamp can vouch for.
+    """
+    return "W/" + representation_etag(request, *parts)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag using the weak comparison RFC 9110 requires."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+def cache_headers(etag: str, max_age: int) -> dict[str, str]:
+    """Headers letting clients and shared caches keep an immutable representation."""
+    return {"ETag": etag, "Cache-Control": f"public, max-age={max_age}, immutable", "Vary": "Accept"}
+
+
+def revalidate_headers(etag: str) -> dict[str, str]:
+    """Headers letting caches keep a representation that can change, as long as they revalidate it before use."""
+    return {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+
+
+def not_modified(headers: dict[str, str]) -> Response:
+    """Answer a matching conditional request without a body."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -0,0 +1,100 @@
+"""In-process metrics exported in the Prometheus text format."""
+
+from typing import Union
+
+Number = Union[int, float]
+
+
+class _Metric:
+    """A named metric with optional labels."""
+
+    kind = ""
+
+    def __init__(self, name: str, description: str, labelnames: tuple[str, ...] = ()):
+        """Initialize the metric."""
+        self.name = name
+        self.description = description
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], Number] = {}
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        """Return the label values in declaration order."""
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def value(self, **labels: str) -> Number:
+        """Return the current value for a label set."""
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> list[str]:
+        """Render the metric in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self._values.items()):
+            labels = ",".join(f'{name}="{label}"' for name, label in zip(self.labelnames, key))
+            lines.append(f"{self.name}{{{labels}}} {value}" if labels else f"{self.name} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def inc(self, amount: Number = 1, **labels: str) -> None:
+        """Increase the counter."""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: Number, **labels: str) -> None:
+        """Set the gauge."""
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: Number = 1, **labels: str) -> None:
+        """Increase the gauge."""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: Number = 1, **labels: str) -> None:
+        """Decrease the gauge."""
+        self.inc(-amount, **labels)
+
+
+class MetricsRegistry:
+    """Collection of metrics, keyed by name."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics: dict[str, _Metric] = {}
+
+    def _get_or_create(self, metric_class: type, name: str, description: str, labelnames: tuple[str, ...]) -> _Metric:
+        """Return the registered metric, creating it on first use."""
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = metric_class(name, description, labelnames)
+        elif not isinstance(metric, metric_class) or metric.labelnames != labelnames:
+            raise ValueError(f"Metric {name} is already registered with a different type or labels")
+        return metric
+
+    def counter(self, name: str, description: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        """Get or create a counter."""
+        return self._get_or_create(Counter, name, description, labelnames)
+
+    def gauge(self, name: str, description: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        """Get or create a gauge."""
+        return self._get_or_create(Gauge, name, description, labelnames)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text format."""
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+
+# Metrics are per process; with several workers each one reports its own values
+registry = MetricsRegistry()
@@ -0,0 +1,32 @@
+"""Opaque keyset pagination cursors."""
+
+import base64
+from datetime import UTC, datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from app.constants.error_messages import EErrorMessage
+
+
+def encode_cursor(created_at: datetime, document_id: ObjectId | str) -> str:
+    """Encode the (created_at, _id) sort key of the last document on a page."""
+    if created_at.tzinfo is None:  # MongoDB returns naive UTC datetimes
+        created_at = created_at.replace(tzinfo=UTC)
+    key = f"{created_at.timestamp() * 1000:.0f}:{document_id}"
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, ObjectId]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        key = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        milliseconds, document_id = key.split(":", 1)
+        return datetime.fromtimestamp(int(milliseconds) / 1000, UTC), ObjectId(document_id)
+    except (ValueError, UnicodeDecodeError, InvalidId) as e:
+        raise ValueError(EErrorMessage.INVALID_CURSOR.value) from e
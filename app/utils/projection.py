@@ -0,0 +1,48 @@
+"""Field projection for stored cargo items."""
+
+from datetime import UTC, datetime
+from typing import Any, Optional
+
+from app.constants.error_messages import EErrorMessage
+from app.models.cargo_item import CargoItem
+
+# Fields clients can ask for; ``id`` is always returned
+SELECTABLE_FIELDS = tuple(name for name in CargoItem.model_fields if name != "id")
+
+
+def parse_fields(fields: Optional[str]) -> Optional[list[str]]:
+    """
+    Parse a comma-separated ``fields`` parameter.
+
+    Returns:
+        The requested fields, or None for all fields
+
+    Raises:
+        ValueError: If unknown fields are requested
+    """
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in SELECTABLE_FIELDS]
+    if unknown:
+        raise ValueError(EErrorMessage.INVALID_FIELDS.value.format(", ".join(unknown)))
+    return requested
+
+
+def project_document(doc: dict[str, Any], fields: Optional[list[str]]) -> dict[str, Any]:
+    """Convert a stored cargo item document to a response item with only the requested fields."""
+    item = {"id": str(doc["_id"])}
+    for field in fields or SELECTABLE_FIELDS:
+        if field in doc:
+            item[field] = doc[field]
+    if isinstance(item.get("created_at"), datetime) and item["created_at"].tzinfo is None:
+        item["created_at"] = item["created_at"].replace(tzinfo=UTC)  # MongoDB returns naive UTC datetimes
+    return item
+
+
+def project_item(item: CargoItem, fields: list[str]) -> dict[str, Any]:
+    """Convert a cargo item to a response item with only the requested fields, without dumping the whole model."""
+    projected = {"id": item.id}
+    for field in fields:
+        projected[field] = getattr(item, field)
+    return projected
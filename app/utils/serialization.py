@@ -0,0 +1,87 @@
+"""Response serialization with content negotiation."""
+
+from datetime import datetime
+from enum import Enum
+from typing import Any
+
+import msgpack
+import orjson
+from fastapi import Request, status
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+JSON_MEDIA_TYPES = ("application/json", "application/*", "*/*")
+
+
+class FastJSONResponse(ORJSONResponse):
+    """orjson response that writes UTC datetimes with a ``Z`` suffix, like pydantic does."""
+
+    def render(self, content: Any) -> bytes:
+        """Serialize content to JSON bytes."""
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def _msgpack_default(value: Any) -> Any:
+    """Convert values msgpack cannot encode natively."""
+    if isinstance(value, datetime):
+        return value.isoformat().replace("+00:00", "Z")
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
+
+
+class MsgPackResponse(Response):
+    """MessagePack response."""
+
+    media_type = MSGPACK_MEDIA_TYPES[0]
+
+    def render(self, content: Any) -> bytes:
+        """Serialize content to MessagePack bytes."""
+        return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+
+
+def _accept_quality(accept: str, media_types: tuple[str, ...]) -> float:
+    """Return the highest quality the Accept header gives to any of the media types."""
+    quality = 0.0
+    for media_range in accept.split(","):
+        media_type, *params = (part.strip() for part in media_range.split(";"))
+        if media_type.lower() not in media_types:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        quality = max(quality, q)
+    return quality
+
+
+def prefers_msgpack(accept: str) -> bool:
+    """Check whether the client asked for MessagePack at least as strongly as for JSON."""
+    msgpack_quality = _accept_quality(accept, MSGPACK_MEDIA_TYPES)
+    return msgpack_quality > 0 and msgpack_quality >= _accept_quality(accept, JSON_MEDIA_TYPES)
+
+
+def negotiate_response(request: Request, content: Any, status_code: int = status.HTTP_200_OK) -> Response:
+    """
+    Serialize content in the format the client prefers.
+
+    Args:
+        request: The incoming request, used for its Accept header
+        content: JSON-compatible content; datetimes and enums are handled by the encoders
+        status_code: HTTP status code of the response
+
+    Returns:
+        MessagePack response if the client prefers it, orjson response otherwise
+    """
+    response_class = MsgPackResponse if prefers_msgpack(request.headers.get("accept", "")) else FastJSONResponse
+    return response_class(content, status_code=status_code, headers={"Vary": "Accept"})
+
+
+def model_response(request: Request, model: BaseModel, status_code: int = status.HTTP_200_OK) -> Response:
+    """Serialize an already-built response model without validating it again."""
+    return negotiate_response(request, model.model_dump(), status_code)
@@ -0,0 +1,257 @@
+"""Tabular writers and streaming encoders for cargo item rows."""
+
+import asyncio
+import csv
+import gzip
+import io
+import os
+import sys
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from typing import Any, BinaryIO, Optional
+
+import orjson
+
+from app.constants import EOutputFormat
+from app.constants.error_messages import EErrorMessage
+
+# Column name -> Python type, so columnar formats get the same schema for every batch
+CARGO_ITEM_COLUMNS: dict[str, type] = {
+    "id": str,
+    "cargo_type": str,
+    "number_of_packages": int,
+    "container_number": str,
+    "master_bill_of_lading_number": str,
+    "house_bill_of_lading_number": str,
+}
+
+# Exported rows also carry the creation time, as an ISO 8601 string
+EXPORT_COLUMNS: dict[str, type] = {**CARGO_ITEM_COLUMNS, "created_at": str}
+
+# Formats that can be encoded incrementally without seeking back, e.g. into an HTTP response
+STREAMABLE_FORMATS = (EOutputFormat.NDJSON, EOutputFormat.CSV)
+
+_GZIP_SUFFIX = ".gz"
+
+# gzip's own default of 9 is several times slower than 6 for output that is barely smaller
+DEFAULT_GZIP_LEVEL = 6
+
+_SUFFIX_FORMATS = {
+    ".ndjson": EOutputFormat.NDJSON,
+    ".jsonl": EOutputFormat.NDJSON,
+    ".csv": EOutputFormat.CSV,
+    ".parquet": EOutputFormat.PARQUET,
+}
+
+
+def is_gzip_path(path: Optional[str]) -> bool:
+    """Whether a file name asks for gzip compression, e.g. ``items.csv.gz``."""
+    return bool(path) and path.lower().endswith(_GZIP_SUFFIX)
+
+
+def infer_format(path: Optional[str]) -> EOutputFormat:
+    """Pick the output format from a file name, ignoring a ``.gz`` suffix and defaulting to NDJSON."""
+    if not path or path == "-":
+        return EOutputFormat.NDJSON
+    if is_gzip_path(path):
+        path = path[: -len(_GZIP_SUFFIX)]
+    return _SUFFIX_FORMATS.get(os.path.splitext(path)[1].lower(), EOutputFormat.NDJSON)
+
+
+class RowWriter(ABC):
+    """Writes rows of a fixed set of columns to a file."""
+
+    def __init__(self, stream: BinaryIO, columns: dict[str, type]):
+        """Initialize with an open binary stream and the output columns."""
+        self.stream = stream
+        self.columns = columns
+
+    @abstractmethod
+    def write_rows(self, rows: list[dict[str, Any]]) -> None:
+        """Write rows; missing columns are written as nulls."""
+
+    def flush(self) -> None:
+        """Push written rows to the operating system."""
+        self.stream.flush()
+
+    def close(self) -> None:
+        """Flush and close the output, leaving standard output open."""
+        self.flush()
+        if self.stream is not sys.stdout.buffer:
+            self.stream.close()
+
+
+class NDJSONWriter(RowWriter):
+    """Writes one JSON object per line."""
+
+    def write_rows(self, rows: list[dict[str, Any]]) -> None:
+        """Write rows as JSON lines."""
+        self.stream.write(
+            b"".join(orjson.dumps({column: row.get(column) for column in self.columns}) + b"\n" for row in rows)
+        )
+
+
+class CSVWriter(RowWriter):
+    """Writes comma-separated values with a header row."""
+
+    def __init__(self, stream: BinaryIO, columns: dict[str, type], write_header: bool = True):
+        """Initialize and write the header unless appending to an existing file."""
+        super().__init__(stream, columns)
+        self.text = io.TextIOWrapper(stream, encoding="utf-8", newline="", write_through=True)
+        self.writer = csv.DictWriter(self.text, fieldnames=list(columns), extrasaction="ignore")
+        if write_header:
+            self.writer.writeheader()
+
+    def write_rows(self, rows: list[dict[str, Any]]) -> None:
+        """Write rows as CSV records."""
+        self.writer.writerows(rows)
+
+    def close(self) -> None:
+        """Flush and close the output, leaving standard output open."""
+        self.text.flush()
+        if self.stream is sys.stdout.buffer:
+            self.text.detach()
+        else:
+            self.text.close()
+
+
+class ParquetWriter(RowWriter):
+    """Writes a Parquet file with one row group per batch of rows."""
+
+    def __init__(self, stream: BinaryIO, columns: dict[str, type]):
+        """Initialize the Parquet writer; requires pyarrow."""
+        super().__init__(stream, columns)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ValueError(EErrorMessage.PARQUET_UNAVAILABLE.value) from e
+
+        types = {str: pa.string(), int: pa.int64(), float: pa.float64(), bool: pa.bool_()}
+        self.pa = pa
+        self.schema = pa.schema([(name, types[python_type]) for name, python_type in columns.items()])
+        self.writer = pq.ParquetWriter(stream, self.schema)
+
+    def write_rows(self, rows: list[dict[str, Any]]) -> None:
+        """Write rows as a row group."""
+        if rows:
+            self.writer.write_table(self.pa.Table.from_pylist(rows, schema=self.schema))
+
+    def flush(self) -> None:
+        """Row groups are written as they are added; the file is complete once closed."""
+
+    def close(self) -> None:
+        """Write the Parquet footer and close the file."""
+        self.writer.close()
+        self.stream.close()
+
+
+def _writer_for(stream: BinaryIO, output_format: EOutputFormat, columns: dict[str, type], header: bool) -> RowWriter:
+    """Create the row writer for a format on an open stream."""
+    if output_format == EOutputFormat.CSV:
+        return CSVWriter(stream, columns, write_header=header)
+    if output_format == EOutputFormat.PARQUET:
+        return ParquetWriter(stream, columns)
+    return NDJSONWriter(stream, columns)
+
+
+def open_writer(
+    path: Optional[str],
+    output_format: EOutputFormat,
+    columns: dict[str, type],
+    append: bool = False,
+    gzip_level: int = DEFAULT_GZIP_LEVEL,
+) -> RowWriter:
+    """
+    Open a row writer.
+
+    Args:
+        path: Output file, or None or "-" for standard output
+        output_format: Format to write
+        columns: Output column names and types
+        append: Add to an existing file instead of replacing it; a ``.gz`` path is written gzip-compressed,
+            appending a new gzip member
+        gzip_level: Compression level of a ``.gz`` path
+
+    Returns:
+        The row writer
+    """
+    to_stdout = not path or path == "-"
+    existing = not to_stdout and append and os.path.exists(path) and os.path.getsize(path) > 0
+
+    if output_format == EOutputFormat.PARQUET:
+        if to_stdout:
+            raise ValueError(EErrorMessage.PARQUET_REQUIRES_FILE.value)
+        if existing:
+            raise ValueError(EErrorMessage.CANNOT_APPEND_PARQUET.value.format(path))
+
+    mode = "ab" if append else "wb"
+    if to_stdout:
+        stream = sys.stdout.buffer
+    elif is_gzip_path(path) and output_format != EOutputFormat.PARQUET:
+        stream = gzip.open(path, mode, compresslevel=gzip_level)
+    else:
+        stream = open(path, mode)
+    return _writer_for(stream, output_format, columns, header=not existing)
+
+
+class _ChunkBuffer(io.BytesIO):
+    """In-memory sink that is emptied after every batch, so it never holds more than one batch."""
+
+    def take(self) -> bytes:
+        """Return and discard everything written so far."""
+        data = self.getvalue()
+        self.seek(0)
+        self.truncate()
+        return data
+
+    def close(self) -> None:
+        """Stay open when the writer closes, so the final bytes can still be taken."""
+
+
+async def _encode(
+    batches: AsyncIterator[list[dict[str, Any]]],
+    output_format: EOutputFormat,
+    columns: dict[str, type],
+    compress: bool,
+    gzip_level: int,
+) -> AsyncIterator[bytes]:
+    """Write each batch into a chunk buffer in a thread, so encoding never stalls the loop, and yield the result."""
+    sink = _ChunkBuffer()
+    stream = gzip.GzipFile(fileobj=sink, mode="wb", compresslevel=gzip_level) if compress else sink
+    writer = _writer_for(stream, output_format, columns, True)
+    async for rows in batches:
+        await asyncio.to_thread(writer.write_rows, rows)
+        if chunk := sink.take():
+            yield chunk
+    await asyncio.to_thread(writer.close)
+    if chunk := sink.take():
+        yield chunk
+
+
+def encode_rows(
+    batches: AsyncIterator[list[dict[str, Any]]],
+    output_format: EOutputFormat,
+    columns: dict[str, type],
+    compress: bool = False,
+    gzip_level: int = DEFAULT_GZIP_LEVEL,
+) -> AsyncIterator[bytes]:
+    """
+    Encode batches of rows incrementally, e.g. for a streaming HTTP response.
+
+    Args:
+        batches: Batches of rows, such as pages of a database cursor
+        output_format: NDJSON or CSV
+        columns: Output column names and types
+        compress: Gzip the output on the fly
+        gzip_level: Compression level with ``compress``
+
+    Returns:
+        The encoded output, one chunk per batch; gzip may hold small batches back until later chunks
+
+    Raises:
+        ValueError: If the format cannot be streamed
+    """
+    if output_format not in STREAMABLE_FORMATS:
+        raise ValueError(EErrorMessage.UNSUPPORTED_STREAM_FORMAT.value.format(output_format.value))
+    return _encode(batches, output_format, columns, compress, gzip_level)